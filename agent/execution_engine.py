@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Motor de ejecución de tareas para el Agente Inteligente.
+
+Reúne en una sola API (execute_task / execute_many) la ejecución de los
+comandos de las tareas, sea cual sea la estrategia:
+
+- 'thread': un proceso nuevo por comando, supervisado desde un pool de hilos.
+- 'process': shells persistentes (utils/shell_pool.py); evita lanzar una
+  shell por comando en planes de muchos comandos pequeños.
+- 'async': un solo event loop supervisa todos los comandos
+  (utils/async_handlers.py).
+
+Todos los comandos pasan por validate_command y todos los resultados tienen
+la misma forma, con tiempos, para poder medir y comparar las estrategias. El
+código Python de las tareas se marca de forma explícita con el prefijo
+'python:' (p. ej. 'python: import os; print(os.getcwd())'), está desactivado
+salvo que se active allow_python y no se ejecuta en el proceso del agente sino
+en un intérprete nuevo, con el mismo límite de tiempo.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from providers.async_utils import run_sync
+from providers.provider_config import get_section
+from utils.async_handlers import AsyncCommandRunner
+from utils.command_validator import validate_command
+from utils.output_capture import OutputCapture, pump
+from utils.shell_pool import ShellPool
+
+from .task import Task
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ('thread', 'process', 'async')
+
+PYTHON_PREFIX = 'python:'
+
+Command = Union[str, Sequence[str]]
+
+
+class ExecutionEngine:
+    """
+    Ejecuta los comandos de las tareas con una estrategia intercambiable.
+    """
+
+    def __init__(self, strategy: str = 'thread', max_workers: int = 4, timeout: float = 60,
+                 allow_python: bool = False, working_dir: Optional[str] = None):
+        """
+        Inicializa el motor.
+
+        Args:
+            strategy: 'thread', 'process' o 'async' (ver el docstring del módulo)
+            max_workers: Número máximo de comandos en ejecución a la vez
+            timeout: Tiempo máximo por comando en segundos
+            allow_python: Si es True se ejecutan las tareas con código Python
+                          (prefijo 'python:'); por defecto se rechazan
+            working_dir: Directorio de trabajo de los comandos (por defecto el actual)
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Estrategia de ejecución desconocida: {strategy!r} "
+                             f"(disponibles: {', '.join(STRATEGIES)})")
+        if max_workers < 1:
+            raise ValueError("max_workers debe ser al menos 1")
+        self.strategy = strategy
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.allow_python = allow_python
+        self.working_dir = working_dir
+        self._shell_pool = ShellPool(size=max_workers, timeout=timeout) \
+            if strategy == 'process' else None
+        self._runner = AsyncCommandRunner(max_concurrency=max_workers, timeout=timeout) \
+            if strategy == 'async' else None
+        self._lock = threading.Lock()
+        self._counters = {'executed': 0, 'succeeded': 0, 'failed': 0, 'rejected': 0,
+                          'cancelled': 0, 'seconds': 0.0}
+
+    @classmethod
+    def from_settings(cls, **overrides) -> 'ExecutionEngine':
+        """
+        Crea el motor según la sección executor de settings.yaml.
+
+        Args:
+            **overrides: Parámetros que sustituyen a los de la configuración
+                         (los valores None se ignoran)
+
+        Returns:
+            Instancia de ExecutionEngine
+        """
+        config = get_section('executor')
+        params = {
+            'strategy': config.get('strategy', 'thread'),
+            'max_workers': config.get('max_workers', 4),
+            'timeout': config.get('timeout', 60),
+            'allow_python': config.get('allow_python', False),
+        }
+        params.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**params)
+
+    def validate_command(self, command: str) -> Dict[str, Any]:
+        """
+        Comprueba si un comando puede ejecutarse.
+
+        Args:
+            command: Comando de la tarea (de la shell o código Python)
+
+        Returns:
+            Diccionario con 'valid' y 'reason'
+        """
+        if _is_python(command):
+            # validate_command analiza comandos de la shell, no código Python
+            if self.allow_python:
+                return {'valid': True, 'reason': None}
+            return {'valid': False, 'reason': "La ejecución de código Python está desactivada"}
+        return validate_command(command)
+
+    def execute_task(self, task: Union[Task, Dict[str, Any]],
+                     cancel: Optional[threading.Event] = None,
+                     on_line: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        Ejecuta el comando de una tarea.
+
+        Args:
+            task: Task o diccionario de tarea con 'comando'
+            cancel: Evento que cancela la ejecución en curso
+            on_line: Función que recibe cada línea de la salida estándar. Con la
+                     estrategia 'thread' (y el código Python) recibe las líneas a
+                     medida que el comando las escribe; con las demás, al terminar
+
+        Returns:
+            Diccionario con 'success', 'output', 'error', 'exit_code',
+            'cancelled', 'command', 'strategy', 'started_at', 'finished_at' y
+            'duration' (y 'output_file' si la salida no cabía en memoria)
+        """
+        command = _command_of(task)
+        started_at = time.time()
+        start = time.perf_counter()
+        rejected = self._reject(command)
+        if rejected is not None:
+            raw = rejected
+        elif self.strategy == 'thread' or _is_python(command):
+            raw = run_process(_argv(command), self.timeout, cancel, self.working_dir, on_line)
+        else:
+            if self.strategy == 'async':
+                raw = run_sync(self._run_async(command, cancel))
+            else:
+                raw = _from_handler_result(self._shell_pool.execute(
+                    command, self.timeout, self.working_dir, cancel=cancel, validate=False))
+            if on_line is not None and raw['output']:
+                for line in raw['output'].splitlines():
+                    on_line(line)
+        return self._finish(command, raw, started_at, start, rejected is not None)
+
+    def execute_many(self, tasks: Sequence[Union[Task, Dict[str, Any]]],
+                     cancel: Optional[threading.Event] = None) -> List[Dict[str, Any]]:
+        """
+        Ejecuta los comandos de varias tareas a la vez (como mucho max_workers).
+
+        No tiene en cuenta dependencias entre tareas; para eso está
+        Executor.execute_tasks (agent/scheduler.py).
+
+        Args:
+            tasks: Tareas a ejecutar
+            cancel: Evento que cancela las ejecuciones en curso
+
+        Returns:
+            Resultados de execute_task en el mismo orden que las tareas
+        """
+        if self.strategy == 'async':
+            return run_sync(self._execute_many_async(tasks, cancel))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers,
+                                                   thread_name_prefix="engine") as pool:
+            return list(pool.map(lambda task: self.execute_task(task, cancel), tasks))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Devuelve los contadores del motor.
+
+        Returns:
+            Diccionario con la estrategia, comandos ejecutados, correctos,
+            fallidos, rechazados, cancelados y segundos acumulados
+        """
+        with self._lock:
+            return dict(self._counters, strategy=self.strategy)
+
+    def close(self) -> None:
+        """
+        Libera los recursos de la estrategia (p. ej. las shells persistentes).
+        """
+        if self._shell_pool is not None:
+            self._shell_pool.close()
+
+    def _reject(self, command: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not command:
+            return {'success': False, 'output': None, 'exit_code': None, 'cancelled': False,
+                    'error': "La tarea no tiene comando"}
+        validation = self.validate_command(command)
+        if not validation['valid']:
+            logger.warning(f"Comando no válido: {command}. Razón: {validation['reason']}")
+            return {'success': False, 'output': None, 'exit_code': None, 'cancelled': False,
+                    'error': f"Comando no válido: {validation['reason']}"}
+        return None
+
+    async def _run_async(self, command: str, cancel: Optional[threading.Event]) -> Dict[str, Any]:
+        run = asyncio.ensure_future(self._runner.execute(_argv(command), self.timeout,
+                                                         self.working_dir, validate=False))
+        while not run.done():
+            await asyncio.wait({run}, timeout=0.05)
+            if cancel is not None and cancel.is_set() and not run.done():
+                run.cancel()
+                try:
+                    await run
+                except asyncio.CancelledError:
+                    pass
+                return _cancelled()
+        return _from_handler_result(run.result())
+
+    async def _execute_many_async(self, tasks, cancel) -> List[Dict[str, Any]]:
+        async def one(task):
+            command = _command_of(task)
+            started_at = time.time()
+            start = time.perf_counter()
+            rejected = self._reject(command)
+            raw = rejected if rejected is not None else await self._run_async(command, cancel)
+            return self._finish(command, raw, started_at, start, rejected is not None)
+
+        return list(await asyncio.gather(*(one(task) for task in tasks)))
+
+    def _finish(self, command: Optional[str], raw: Dict[str, Any], started_at: float,
+                start: float, rejected: bool) -> Dict[str, Any]:
+        duration = time.perf_counter() - start
+        result = dict(raw, command=command, strategy=self.strategy, started_at=started_at,
+                      finished_at=started_at + duration, duration=duration)
+        with self._lock:
+            if rejected:
+                self._counters['rejected'] += 1
+                return result
+            self._counters['executed'] += 1
+            self._counters['seconds'] += duration
+            if result['success']:
+                self._counters['succeeded'] += 1
+            elif result['cancelled']:
+                self._counters['cancelled'] += 1
+            else:
+                self._counters['failed'] += 1
+        return result
+
+
+def run_process(command: Command, timeout: float, cancel: Optional[threading.Event] = None,
+                working_dir: Optional[str] = None,
+                on_line: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    Ejecuta un comando en un proceso nuevo sin validarlo.
+
+    El comando se lanza en su propio grupo de procesos: si se activa el evento
+    de cancelación o se agota el tiempo se termina el grupo entero.
+
+    Args:
+        command: Comando de la shell (texto) o lista de argumentos
+        timeout: Tiempo máximo de ejecución en segundos
+        cancel: Evento que cancela la ejecución en curso
+        working_dir: Directorio de trabajo para la ejecución
+        on_line: Función que recibe cada línea de la salida estándar en cuanto
+                 llega
+
+    Returns:
+        Diccionario con 'success', 'output', 'error', 'exit_code' y 'cancelled'
+        (y 'output_file' si la salida no cabía en memoria)
+    """
+    stdout = OutputCapture()
+    stderr = OutputCapture(spill_limit=0)
+    try:
+        process = subprocess.Popen(command, shell=isinstance(command, str), cwd=working_dir,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   start_new_session=True)
+    except OSError as e:
+        return {'success': False, 'output': None, 'error': str(e), 'exit_code': None,
+                'cancelled': False}
+
+    with process:
+        if on_line is None:
+            status = pump(process, stdout, stderr, timeout=timeout, cancel=cancel)
+        else:
+            status = _stream(process, stdout, stderr, timeout, cancel, on_line)
+        if status is not None:
+            _kill_group(process)
+    if status is not None:
+        stdout.close(keep_spill=False)
+        if status == 'cancelled':
+            return _cancelled()
+        return {'success': False, 'output': None, 'exit_code': None, 'cancelled': False,
+                'error': f"El comando excedió el tiempo máximo de ejecución ({timeout}s)"}
+
+    stdout.close()
+    result = {'success': process.returncode == 0, 'output': stdout.text().strip(),
+              'error': stderr.text().strip() or None, 'exit_code': process.returncode,
+              'cancelled': False}
+    if stdout.truncated:
+        result['output_file'] = stdout.spill_path
+    return result
+
+
+def _stream(process: subprocess.Popen, stdout: OutputCapture, stderr: OutputCapture,
+            timeout: float, cancel: Optional[threading.Event],
+            on_line: Callable[[str], None]) -> Optional[str]:
+    """
+    Como pump, pero entrega las líneas de stdout a on_line a medida que llegan.
+
+    stderr se lee en un hilo aparte. La lectura de stdout bloquea, así que un
+    vigilante termina el grupo de procesos si se agota el tiempo o se cancela;
+    eso cierra las tuberías y termina la lectura.
+    """
+    status: List[str] = []
+    finished = threading.Event()
+
+    def watch():
+        deadline = time.monotonic() + timeout
+        while not finished.wait(min(0.05, max(0.0, deadline - time.monotonic()))):
+            if cancel is not None and cancel.is_set():
+                status.append('cancelled')
+            elif time.monotonic() >= deadline:
+                status.append('timeout')
+            else:
+                continue
+            _kill_group(process)
+            return
+
+    def drain():
+        for _ in stderr.iter_lines(process.stderr):
+            pass
+
+    threads = [threading.Thread(target=watch, daemon=True),
+               threading.Thread(target=drain, daemon=True)]
+    for thread in threads:
+        thread.start()
+    try:
+        for line in stdout.iter_lines(process.stdout):
+            on_line(line)
+    except BaseException:
+        _kill_group(process)
+        raise
+    finally:
+        threads[1].join()
+        finished.set()
+        threads[0].join()
+    return status[0] if status else None
+
+
+def _kill_group(process: subprocess.Popen) -> None:
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def _is_python(command: str) -> bool:
+    return command.lstrip().startswith(PYTHON_PREFIX)
+
+
+def _argv(command: str) -> Command:
+    """
+    El código Python se ejecuta en un intérprete nuevo y aislado (-I).
+    """
+    if _is_python(command):
+        code = command.lstrip()[len(PYTHON_PREFIX):].strip()
+        return [sys.executable, '-I', '-c', code]
+    return command
+
+
+def _command_of(task: Union[Task, Dict[str, Any]]) -> Optional[str]:
+    if isinstance(task, Task):
+        return task.command
+    return task.get('comando') or task.get('command')
+
+
+def _cancelled() -> Dict[str, Any]:
+    return {'success': False, 'output': None, 'error': "Cancelada", 'exit_code': None,
+            'cancelled': True}
+
+
+def _from_handler_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Adapta un resultado con el formato de execute_command al del motor.
+    """
+    adapted = {
+        'success': result['success'],
+        'output': result['output'],
+        'error': result['error'] or None,
+        'exit_code': result.get('returncode'),
+        'cancelled': result.get('cancelled', False),
+    }
+    if result.get('output_file'):
+        adapted['output_file'] = result['output_file']
+    return adapted
+
@@ -1,59 +1,259 @@
+import queue
+import threading
+
+from .execution_engine import ExecutionEngine
+from .scheduler import DAGScheduler
+from .task import task_from_item
+
 class Executor:
-    def __init__(self, tareas):
+    def __init__(self, tareas=None, max_workers=None, timeout=None, strategy=None, engine=None):
         """
         Inicializa el ejecutor con una lista de tareas.
 
         :param tareas: Lista de tareas a ejecutar. Cada tarea debe ser un diccionario con al menos la clave 'tarea'.
+        :param max_workers: Tareas (Task) ejecutadas a la vez por execute_tasks.
+                            Por defecto executor.max_workers en settings.yaml (4).
+        :param timeout: Segundos máximos por comando en execute_task.
+                        Por defecto executor.timeout en settings.yaml (60).
+        :param strategy: Estrategia del motor de ejecución ('thread', 'process' o 'async').
+                         Por defecto executor.strategy en settings.yaml ('thread').
+        :param engine: Motor de ejecución (ver agent/execution_engine.py). Si se
+                       indica, max_workers, timeout y strategy se toman de él.
         """
-        self.tareas = tareas
+        self.tareas = list(tareas) if tareas is not None else []
+        self.engine = engine or ExecutionEngine.from_settings(
+            max_workers=max_workers, timeout=timeout, strategy=strategy)
+        self.max_workers = self.engine.max_workers
+        self.timeout = self.engine.timeout
 
     def execute(self, mode="display"):
         """
-        Ejecuta cada tarea en la lista de tareas. Maneja errores y reporta el estado de ejecución.
-        
+        Ejecuta las tareas de la lista con el planificador de dependencias
+        (ver execute_tasks): las independientes se ejecutan en paralelo y si
+        una tarea crítica falla se cancela el resto del plan.
+
+        Si ninguna tarea declara 'id' ni 'depends_on' (los pasos numerados
+        de un proveedor) se ejecutan en orden, cada una tras la anterior. En
+        modo interactivo se pide confirmación de cada tarea antes de empezar;
+        una tarea omitida cancela las que dependen de ella.
+
+        :param mode: Modo de ejecución ('display', 'interactive', 'auto')
+        :return: Resultado de DAGScheduler.run (None en modo 'display').
+        """
+        if mode == "display":
+            for idx, tarea in enumerate(self.tareas, start=1):
+                self._ejecutar_tarea(idx, tarea, mode)
+            return None
+
+        tasks = self._plan(self.tareas)
+        indices = {task.id: idx for idx, task in enumerate(tasks, start=1)}
+        omitidas = set()
+        if mode == "interactive":
+            for task in tasks:
+                print(f"🔄 Tarea {indices[task.id]}: {task.description}")
+                confirmacion = input(f"  ¿Ejecutar esta tarea? (s/n): ").strip().lower()
+                if confirmacion != "s":
+                    print(f"  ⏭️ Tarea omitida por el usuario")
+                    omitidas.add(task.id)
+
+        def ejecutar(task, cancel):
+            if task.id in omitidas:
+                return {"success": False, "output": None, "error": "Omitida por el usuario",
+                        "exit_code": None, "cancelled": True}
+            return self._ejecutar_task(indices[task.id], task, cancel)
+
+        resultado = DAGScheduler(ejecutar, max_workers=self.max_workers).run(tasks)
+        if resultado["critical_failure"] is not None:
+            print(f"⛔ Falló la tarea crítica {indices[resultado['critical_failure']]}: "
+                  f"se cancela el resto del plan")
+        for task_id in resultado["cancelled"]:
+            if task_id not in omitidas and task_id not in resultado["results"]:
+                print(f"⏭️ Tarea {indices[task_id]} cancelada: depende de una tarea que no se completó")
+        return resultado
+
+    def execute_stream(self, tareas, mode="auto"):
+        """
+        Ejecuta tareas a medida que se van generando (modo pipeline).
+
+        Las tareas se leen del iterable en un hilo aparte, de forma que la tarea 1
+        se valida y ejecuta mientras el proveedor sigue generando las siguientes.
+
+        :param tareas: Iterable de tareas (p. ej. provider.generar_tareas_stream()).
         :param mode: Modo de ejecución ('display', 'interactive', 'auto')
+        :return: Lista de tareas recibidas.
         """
-        for idx, tarea in enumerate(self.tareas, start=1):
+        cola = queue.Queue()
+        fin = object()
+
+        def productor():
             try:
-                print(f"🔄 Tarea {idx}: {tarea['tarea']}")
-                
-                # Modo de solo visualización
-                if mode == "display":
-                    print(f"ℹ️ (Modo visualización: No se ejecuta)")
-                    continue
-                
-                # Modo interactivo
-                if mode == "interactive":
-                    confirmacion = input(f"  ¿Ejecutar esta tarea? (s/n): ").strip().lower()
-                    if confirmacion != "s":
-                        print(f"  ⏭️ Tarea omitida por el usuario")
-                        continue
-                
-                # Comprobar si la tarea tiene un comando para ejecutar
-                if 'comando' in tarea:
-                    import os
-                    import sys
-                    
-                    # Si es un comando Python
-                    if tarea['comando'].startswith('import'):
-                        # Ejecutar código Python de forma segura
-                        try:
-                            exec(tarea['comando'])
-                            resultado = "Comando Python ejecutado correctamente"
-                        except Exception as e:
-                            resultado = f"Error al ejecutar Python: {str(e)}"
-                    # Si es un comando del sistema
-                    else:
-                        print(f"  Ejecutando: {tarea['comando']}")
-                        exit_code = os.system(tarea['comando'])
-                        resultado = f"Comando ejecutado con código de salida: {exit_code}"
-                else:
-                    # Procesamiento normal de tareas
-                    resultado = self._procesar_tarea(tarea)
-                    
-                print(f"✅ Tarea {idx} completada: {resultado}")
+                for tarea in tareas:
+                    cola.put(tarea)
             except Exception as e:
-                print(f"❌ Error al ejecutar la tarea {idx}: {e}")
+                cola.put(e)
+            finally:
+                cola.put(fin)
+
+        hilo = threading.Thread(target=productor, daemon=True)
+        hilo.start()
+
+        recibidas = []
+        error = None
+        while True:
+            item = cola.get()
+            if item is fin:
+                break
+            if isinstance(item, Exception):
+                error = item
+                continue
+
+            recibidas.append(item)
+            self.tareas.append(item)
+            idx = len(recibidas)
+
+            # Validar el comando antes de ejecutarlo
+            if 'comando' in item and mode != "display":
+                validacion = self.engine.validate_command(item['comando'])
+                if not validacion['valid']:
+                    print(f"🔄 Tarea {idx}: {item['tarea']}")
+                    print(f"⛔ Tarea {idx} rechazada: {validacion['reason']}")
+                    continue
+
+            self._ejecutar_tarea(idx, item, mode)
+
+        hilo.join()
+        if error is not None:
+            raise error
+        return recibidas
+
+    def execute_tasks(self, tasks):
+        """
+        Ejecuta un plan de tareas (Task) respetando sus dependencias: las
+        independientes se ejecutan en paralelo (ver agent/scheduler.py).
+
+        :param tasks: Lista de tareas (Task).
+        :return: Resultado de DAGScheduler.run.
+        """
+        return DAGScheduler(self.execute_task, max_workers=self.max_workers).run(tasks)
+
+    def execute_task(self, task, cancel=None, on_line=None):
+        """
+        Ejecuta el comando de una tarea (Task) con el motor de ejecución.
+
+        El comando se valida y se lanza en su propio grupo de procesos: si se
+        activa el evento de cancelación o se agota el tiempo se termina el grupo
+        entero.
+
+        :param task: Tarea a ejecutar.
+        :param cancel: Evento (opcional) que cancela la ejecución en curso.
+        :param on_line: Función (opcional) que recibe cada línea de la salida.
+        :return: Diccionario con 'success', 'output', 'error', 'exit_code', 'cancelled'
+                 y los tiempos de la ejecución (ver ExecutionEngine.execute_task).
+        """
+        if not task.command:
+            return {"success": True, "output": self._procesar_tarea({"tarea": task.description}),
+                    "error": None, "exit_code": None, "cancelled": False}
+        return self.engine.execute_task(task, cancel, on_line)
+
+    def execute_many(self, tasks, cancel=None):
+        """
+        Ejecuta varias tareas a la vez sin tener en cuenta sus dependencias.
+
+        :param tasks: Lista de tareas (Task o diccionarios con 'comando').
+        :param cancel: Evento (opcional) que cancela las ejecuciones en curso.
+        :return: Lista de resultados de ExecutionEngine.execute_task, en orden.
+        """
+        return self.engine.execute_many(tasks, cancel)
+
+    def _ejecutar_tarea(self, idx, tarea, mode):
+        """
+        Ejecuta una tarea individual según el modo indicado.
+
+        :param idx: Posición de la tarea (para los mensajes).
+        :param tarea: Diccionario con la información de la tarea.
+        :param mode: Modo de ejecución ('display', 'interactive', 'auto')
+        """
+        try:
+            print(f"🔄 Tarea {idx}: {tarea['tarea']}")
+            
+            # Modo de solo visualización
+            if mode == "display":
+                print(f"ℹ️ (Modo visualización: No se ejecuta)")
+                return
+            
+            # Modo interactivo
+            if mode == "interactive":
+                confirmacion = input(f"  ¿Ejecutar esta tarea? (s/n): ").strip().lower()
+                if confirmacion != "s":
+                    print(f"  ⏭️ Tarea omitida por el usuario")
+                    return
+            
+            # Comprobar si la tarea tiene un comando para ejecutar (del sistema o
+            # código Python); el motor lo valida y muestra su salida según llega
+            if 'comando' in tarea:
+                print(f"  Ejecutando: {tarea['comando']}")
+                self._informar(idx, self.engine.execute_task(tarea, on_line=print))
+            else:
+                # Procesamiento normal de tareas
+                print(f"✅ Tarea {idx} completada: {self._procesar_tarea(tarea)}")
+        except Exception as e:
+            print(f"❌ Error al ejecutar la tarea {idx}: {e}")
+
+    def _ejecutar_task(self, idx, task, cancel):
+        """
+        Ejecuta una tarea del plan de execute() desde el planificador.
+
+        Las tareas pueden ejecutarse a la vez, así que cada línea de su salida
+        lleva delante el número de la tarea.
+
+        :param idx: Posición de la tarea (para los mensajes).
+        :param task: Tarea (Task) a ejecutar.
+        :param cancel: Evento del planificador que cancela la ejecución.
+        :return: Resultado de execute_task.
+        """
+        if task.command:
+            print(f"  Ejecutando tarea {idx}: {task.command}")
+        ejecucion = self.execute_task(task, cancel, on_line=lambda linea: print(f"  [{idx}] {linea}"))
+        self._informar(idx, ejecucion)
+        return ejecucion
+
+    def _informar(self, idx, ejecucion):
+        """
+        Muestra el resultado de la ejecución de una tarea.
+
+        :param idx: Posición de la tarea (para los mensajes).
+        :param ejecucion: Resultado de execute_task.
+        """
+        if ejecucion.get('cancelled'):
+            print(f"⏹️ Tarea {idx} cancelada")
+        elif not ejecucion['success']:
+            error = ejecucion['error'] or \
+                f"el comando terminó con código de salida {ejecucion['exit_code']}"
+            print(f"❌ Error al ejecutar la tarea {idx}: {error}")
+        elif ejecucion.get('exit_code') is None:
+            print(f"✅ Tarea {idx} completada: {ejecucion['output']}")
+        else:
+            print(f"✅ Tarea {idx} completada: Comando ejecutado con código de salida: "
+                  f"{ejecucion['exit_code']} ({ejecucion['duration']:.2f}s)")
+
+    @staticmethod
+    def _plan(tareas):
+        """
+        Convierte las tareas (diccionarios) en Task para el planificador.
+
+        :param tareas: Tareas con 'tarea', 'comando' y opcionalmente 'id',
+                       'depends_on', 'critical' y 'priority'.
+        :return: Lista de Task.
+        """
+        # Sin dependencias declaradas los pasos van en orden
+        en_orden = not any('id' in tarea or 'depends_on' in tarea for tarea in tareas)
+        tasks = []
+        aliases = {}
+        for tarea in tareas:
+            task = task_from_item(tarea, tasks, chain=en_orden, aliases=aliases)
+            if task is not None:
+                tasks.append(task)
+        return tasks
 
     def _procesar_tarea(self, tarea):
         """
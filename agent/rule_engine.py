@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Motor de reglas de la vía rápida.
+
+Las peticiones habituales (información del sistema, archivos ocultos,
+montajes...) se resuelven con planes fijos declarados en config/rules.yaml,
+sin llamar al modelo: la intención se reconoce con expresiones regulares y
+sus grupos con nombre rellenan los parámetros de las plantillas de tareas.
+Una regla no se aplica si la petición contiene un verbo de acción que la
+regla no admite ("borrar archivos ocultos" no es un listado), y ninguna se
+aplica a peticiones con varias partes ("... y ..."). Si el patrón deja
+palabras sin cubrir la confianza baja, porque el plan fijo no las tiene en
+cuenta. El motor se consulta antes que cualquier proveedor y lleva la cuenta
+de su tasa de aciertos.
+"""
+
+import logging
+import os
+import re
+import shlex
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from providers.provider_config import get_section
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_RULES_FILE = Path("config") / "rules.yaml"
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Pronombres que pueden ir pegados al verbo ("bórralos", "desmóntalo")
+_ENCLITICS = ('', 'lo', 'la', 'los', 'las', 'le', 'les', 'me', 'nos')
+
+# Separadores de partes de una petición ("abre el puerto 22 y muestra mi ip")
+_CLAUSES = re.compile(r'[;,]|\b(y|e|luego|despues|tambien|ademas|and|then)\b')
+
+# Campos de las tareas de una regla que se conservan en el plan
+_PLAN_FIELDS = ('id', 'depends_on', 'critical', 'priority')
+
+
+def _words(text: str) -> List[str]:
+    """
+    Palabras de un texto en minúsculas y sin tildes.
+    """
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return re.findall(r'\w+', ''.join(c for c in decomposed if not unicodedata.combining(c)))
+
+
+def _verbs_in(objective: str, verbs: Iterable[str]) -> Set[str]:
+    """
+    Verbos de la lista que aparecen en la petición (admitiendo pronombres pegados).
+    """
+    found = set()
+    for word in _words(objective):
+        for verb in verbs:
+            if word.startswith(verb) and word[len(verb):] in _ENCLITICS:
+                found.add(verb)
+    return found
+
+
+class _Rule:
+    """
+    Regla compilada: patrones de la intención y plantillas de sus tareas.
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self.intent = data['intent']
+        self.patterns = [re.compile(p, re.IGNORECASE) for p in data.get('patterns') or []]
+        self.params = dict(data.get('params') or {})
+        self.confidence = float(data.get('confidence', 1.0))
+        self.verbs = {w for verb in data.get('verbs') or [] for w in _words(verb)}
+        self.tasks = list(data.get('tasks') or [])
+        if not self.patterns or not self.tasks:
+            raise ValueError(f"La regla '{self.intent}' necesita patrones y tareas")
+
+    def match(self, objective: str, action_verbs: Set[str]) -> Optional[re.Match]:
+        # Otra acción en la petición: el plan de la regla no la cubre
+        if _verbs_in(objective, action_verbs - self.verbs):
+            return None
+        for pattern in self.patterns:
+            found = pattern.search(objective)
+            if found:
+                return found
+        return None
+
+    def params_of(self, found: re.Match) -> Dict[str, str]:
+        params = dict(self.params)
+        params.update({k: v for k, v in found.groupdict().items() if v is not None})
+        return params
+
+    def render(self, params: Dict[str, str]) -> List[Dict[str, Any]]:
+        # En los comandos los parámetros van entrecomillados: vienen del texto
+        # del usuario y no deben poder inyectar otros comandos. '~' se expande
+        # antes porque la shell no lo expande entre comillas
+        quoted = {k: shlex.quote(os.path.expanduser(str(v))) for k, v in params.items()}
+        tasks = []
+        for template in self.tasks:
+            task = dict(template)
+            task['description'] = str(template.get('description', '')).format(**params)
+            task['command'] = str(template['command']).format(**quoted)
+            tasks.append(task)
+        return tasks
+
+
+class RuleEngine:
+    """
+    Resuelve peticiones conocidas con planes declarativos en YAML.
+    """
+
+    def __init__(self, rules: Optional[List[Dict[str, Any]]] = None, enabled: bool = True,
+                 action_verbs: Optional[List[str]] = None,
+                 filler_words: Optional[List[str]] = None, partial_confidence: float = 0.5):
+        """
+        Inicializa el motor de reglas.
+
+        Args:
+            rules: Reglas con el formato de config/rules.yaml
+            enabled: Si es False no se reconoce ninguna petición
+            action_verbs: Verbos de acción; una regla no se aplica si la
+                          petición contiene uno que no está en sus 'verbs'
+            filler_words: Palabras que pueden quedar fuera del patrón sin
+                          cambiar el sentido de la petición ("dame", "mi"...)
+            partial_confidence: Confianza máxima de una regla cuando quedan
+                                otras palabras fuera del patrón
+        """
+        self.enabled = enabled
+        self.rules = [_Rule(rule) for rule in rules or []]
+        self.action_verbs = {w for verb in action_verbs or [] for w in _words(verb)}
+        self.filler_words = {w for word in filler_words or [] for w in _words(word)}
+        self.partial_confidence = partial_confidence
+        self._lock = threading.Lock()
+        self._counters = {'lookups': 0, 'hits': 0, 'misses': 0, 'below_threshold': 0}
+        self._intents: Dict[str, int] = {}
+
+    @classmethod
+    def from_file(cls, path: str, enabled: bool = True) -> 'RuleEngine':
+        """
+        Carga las reglas de un archivo YAML.
+
+        Las rutas relativas se buscan en el directorio actual y, si no
+        existen, junto al proyecto. Un archivo inexistente deja el motor
+        sin reglas.
+
+        Args:
+            path: Ruta del archivo de reglas
+            enabled: Si el motor está activado
+
+        Returns:
+            Instancia de RuleEngine
+        """
+        path = Path(path)
+        if not path.is_absolute() and not path.exists():
+            path = _REPO_ROOT / path
+        if not path.exists():
+            logger.warning(f"No se encontró el archivo de reglas {path}")
+            return cls([], enabled=enabled)
+
+        import yaml
+        with open(path, 'r', encoding='utf-8') as f:
+            data = yaml.safe_load(f) or {}
+        return cls(data.get('rules') or [], enabled=enabled,
+                   action_verbs=data.get('action_verbs'),
+                   filler_words=data.get('filler_words'),
+                   partial_confidence=data.get('partial_confidence', 0.5))
+
+    @classmethod
+    def from_settings(cls) -> 'RuleEngine':
+        """
+        Crea el motor a partir de la sección 'rules' de config/settings.yaml.
+
+        Returns:
+            Instancia de RuleEngine
+        """
+        config = get_section('rules')
+        return cls.from_file(config.get('path', str(_DEFAULT_RULES_FILE)),
+                             enabled=config.get('enabled', True))
+
+    def match(self, objective: str, record: bool = True,
+              min_confidence: float = 0.0) -> Optional[Dict[str, Any]]:
+        """
+        Busca la primera regla que reconoce la petición.
+
+        Args:
+            objective: Petición del usuario en lenguaje natural
+            record: Si se cuenta en las estadísticas de aciertos
+            min_confidence: Confianza mínima; una regla por debajo no se
+                            devuelve y se cuenta aparte (below_threshold)
+
+        Returns:
+            Diccionario con 'intent', 'confidence', 'params' y 'tasks'
+            (descripción, comando y demás campos de cada tarea, con los
+            parámetros ya sustituidos), o None si ninguna regla coincide
+        """
+        result = None
+        # Una petición con varias partes no la cubre el plan de una sola regla
+        if self.enabled and not _CLAUSES.search(' '.join(_words(objective))):
+            for rule in self.rules:
+                found = rule.match(objective, self.action_verbs)
+                if found is not None:
+                    params = rule.params_of(found)
+                    result = {
+                        'intent': rule.intent,
+                        'confidence': self._confidence(rule, objective, found),
+                        'params': params,
+                        'tasks': rule.render(params),
+                    }
+                    break
+
+        below = result is not None and result['confidence'] < min_confidence
+        if record:
+            with self._lock:
+                self._counters['lookups'] += 1
+                if result is None or below:
+                    self._counters['misses'] += 1
+                    self._counters['below_threshold'] += below
+                else:
+                    self._counters['hits'] += 1
+                    self._intents[result['intent']] = self._intents.get(result['intent'], 0) + 1
+        return None if below else result
+
+    def plan(self, objective: str,
+             min_confidence: float = 0.0) -> Optional[List[Dict[str, str]]]:
+        """
+        Devuelve el plan de una petición conocida en el formato de los
+        proveedores (lista de diccionarios con 'tarea' y 'comando', más 'id',
+        'depends_on', 'critical' y 'priority' si la regla los indica).
+
+        Args:
+            objective: Petición del usuario en lenguaje natural
+            min_confidence: Confianza mínima de la regla; por debajo se
+                            recurre al modelo
+
+        Returns:
+            Lista de tareas, o None si hay que recurrir al modelo
+        """
+        result = self.match(objective, min_confidence=min_confidence)
+        if result is None:
+            return None
+        logger.info(f"Petición resuelta por la regla '{result['intent']}' sin llamar al modelo")
+        plan = []
+        for task in result['tasks']:
+            item = {'tarea': task['description'] or f"Ejecutar: {task['command']}",
+                    'comando': task['command']}
+            item.update({k: task[k] for k in _PLAN_FIELDS if k in task})
+            plan.append(item)
+        return plan
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Devuelve las estadísticas del motor.
+
+        Returns:
+            Diccionario con consultas, aciertos, fallos (below_threshold de
+            ellos por no alcanzar la confianza mínima), tasa de aciertos y
+            aciertos por intención
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats['hit_rate'] = stats['hits'] / stats['lookups'] if stats['lookups'] else 0.0
+            stats['intents'] = dict(self._intents)
+            return stats
+
+    def _confidence(self, rule: _Rule, objective: str, found: re.Match) -> float:
+        # Palabras fuera del patrón que no son de relleno: el plan no las cubre
+        rest = objective[:found.start()] + ' ' + objective[found.end():]
+        if any(word not in self.filler_words for word in _words(rest)):
+            return min(rule.confidence, self.partial_confidence)
+        return rule.confidence
+
+
+_default_engine = None
+_default_lock = threading.Lock()
+
+
+def get_default_rule_engine() -> RuleEngine:
+    """
+    Devuelve el motor de reglas compartido por el proceso (según settings.yaml).
+
+    Returns:
+        Instancia de RuleEngine
+    """
+    global _default_engine
+    with _default_lock:
+        if _default_engine is None:
+            _default_engine = RuleEngine.from_settings()
+        return _default_engine
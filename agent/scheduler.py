@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Planificador de tareas con dependencias para el Agente Inteligente.
+
+Las tareas forman un grafo dirigido acíclico a través de Task.depends_on.
+Las que no dependen unas de otras (p. ej. 'lsblk' y 'mount | column -t') se
+ejecutan en paralelo en un pool de hilos acotado, de modo que el tiempo total
+de un plan se acerca al de su camino crítico en lugar de a la suma de todas
+sus tareas.
+"""
+
+import concurrent.futures
+import heapq
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .task import Task, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+
+class DAGScheduler:
+    """
+    Ejecuta tareas respetando sus dependencias y su prioridad.
+
+    Entre las tareas listas para ejecutarse se elige primero la de mayor
+    TaskPriority y, a igualdad, la que encabeza la cadena de dependientes más
+    larga. Si una tarea falla, sus dependientes se cancelan; si además es
+    crítica, se cancela todo lo pendiente y se avisa a las que están en curso.
+    """
+
+    def __init__(self, run_task: Callable[[Task, threading.Event], Dict[str, Any]],
+                 max_workers: int = 4):
+        """
+        Inicializa el planificador.
+
+        Args:
+            run_task: Función (tarea, evento de cancelación) -> diccionario con
+                      al menos 'success' y 'output' (p. ej. Executor.execute_task).
+                      Debe terminar en cuanto se active el evento
+            max_workers: Número máximo de tareas en ejecución a la vez
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers debe ser al menos 1")
+        self.run_task = run_task
+        self.max_workers = max_workers
+
+    def run(self, tasks: List[Task]) -> Dict[str, Any]:
+        """
+        Ejecuta un plan de tareas.
+
+        Actualiza status, result, error, started_at y completed_at de cada tarea.
+
+        Args:
+            tasks: Tareas del plan
+
+        Returns:
+            Diccionario con 'results' (id -> resultado de run_task de las tareas
+            ejecutadas), 'order' (ids por orden de inicio), 'cancelled' (ids de
+            las tareas canceladas), 'critical_failure' (id de la tarea crítica
+            fallida o None) y 'seconds'
+
+        Raises:
+            ValueError: Si una dependencia no existe o hay un ciclo
+        """
+        by_id = {task.id: task for task in tasks}
+        dependents = self._check_graph(tasks, by_id)
+        depth = self._chain_depths(tasks, dependents)
+        position = {task.id: i for i, task in enumerate(tasks)}
+        waiting = {task.id: set(task.depends_on) for task in tasks}
+
+        ready: List = []
+
+        def push(task_id: str) -> None:
+            task = by_id[task_id]
+            heapq.heappush(ready, (-task.priority.value, -depth[task_id], position[task_id], task_id))
+
+        for task in tasks:
+            if not task.depends_on:
+                push(task.id)
+
+        cancel = threading.Event()
+        results: Dict[str, Any] = {}
+        order: List[str] = []
+        cancelled: List[str] = []
+        critical_failure: Optional[str] = None
+        start = time.perf_counter()
+
+        def cancel_task(task_id: str) -> None:
+            task = by_id[task_id]
+            if task.status == TaskStatus.PENDING:
+                task.status = TaskStatus.CANCELLED
+                cancelled.append(task_id)
+                for dependent in dependents[task_id]:
+                    cancel_task(dependent)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers,
+                                                   thread_name_prefix="dag") as pool:
+            running: Dict[concurrent.futures.Future, Task] = {}
+            while ready or running:
+                while ready and len(running) < self.max_workers and not cancel.is_set():
+                    task = by_id[heapq.heappop(ready)[3]]
+                    if task.status != TaskStatus.PENDING:
+                        continue
+                    task.status = TaskStatus.IN_PROGRESS
+                    task.started_at = time.time()
+                    order.append(task.id)
+                    running[pool.submit(self.run_task, task, cancel)] = task
+
+                if not running:
+                    break
+                done, _ = concurrent.futures.wait(running,
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = {'success': False, 'output': None, 'error': str(e)}
+                    results[task.id] = result
+                    task.completed_at = time.time()
+                    task.result = result.get('output')
+                    task.error = result.get('error')
+
+                    if result.get('success'):
+                        task.status = TaskStatus.COMPLETED
+                        for dependent in dependents[task.id]:
+                            waiting[dependent].discard(task.id)
+                            if not waiting[dependent]:
+                                push(dependent)
+                        continue
+
+                    if result.get('cancelled'):
+                        task.status = TaskStatus.CANCELLED
+                        cancelled.append(task.id)
+                    else:
+                        task.status = TaskStatus.FAILED
+                    for dependent in dependents[task.id]:
+                        cancel_task(dependent)
+                    if task.critical and task.status == TaskStatus.FAILED and critical_failure is None:
+                        # Tarea crítica fallida: se detiene el plan
+                        logger.error(f"Tarea crítica fallida: {task.id}")
+                        critical_failure = task.id
+                        cancel.set()
+                        for pending in tasks:
+                            cancel_task(pending.id)
+
+        return {
+            'results': results,
+            'order': order,
+            'cancelled': cancelled,
+            'critical_failure': critical_failure,
+            'seconds': time.perf_counter() - start,
+        }
+
+    @staticmethod
+    def _check_graph(tasks: List[Task], by_id: Dict[str, Task]) -> Dict[str, List[str]]:
+        """
+        Comprueba las dependencias y devuelve los dependientes de cada tarea.
+        """
+        if len(by_id) != len(tasks):
+            raise ValueError("Hay tareas con el mismo id")
+        dependents: Dict[str, List[str]] = {task.id: [] for task in tasks}
+        for task in tasks:
+            for dependency in task.depends_on:
+                if dependency not in by_id:
+                    raise ValueError(f"La tarea '{task.id}' depende de '{dependency}', que no existe")
+                dependents[dependency].append(task.id)
+
+        # Orden topológico (Kahn): si no se visitan todas hay un ciclo
+        pending = {task.id: len(task.depends_on) for task in tasks}
+        queue = [task_id for task_id, count in pending.items() if count == 0]
+        visited = 0
+        while queue:
+            task_id = queue.pop()
+            visited += 1
+            for dependent in dependents[task_id]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    queue.append(dependent)
+        if visited != len(tasks):
+            raise ValueError("Las dependencias de las tareas forman un ciclo")
+        return dependents
+
+    @staticmethod
+    def _chain_depths(tasks: List[Task], dependents: Dict[str, List[str]]) -> Dict[str, int]:
+        """
+        Longitud de la cadena de dependientes más larga que cuelga de cada tarea.
+        """
+        depth: Dict[str, int] = {}
+
+        def visit(task_id: str) -> int:
+            if task_id not in depth:
+                depth[task_id] = 1 + max((visit(d) for d in dependents[task_id]), default=0)
+            return depth[task_id]
+
+        for task in tasks:
+            visit(task.id)
+        return depth
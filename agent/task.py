@@ -6,7 +6,7 @@ Definición de la clase Task y enumeraciones relacionadas.
 """
 
 from enum import Enum, auto
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import uuid
 
 class TaskStatus(Enum):
@@ -37,7 +37,8 @@ class Task:
                 id: Optional[str] = None,
                 priority: TaskPriority = TaskPriority.MEDIUM,
                 critical: bool = False,
-                params: Optional[Dict[str, Any]] = None):
+                params: Optional[Dict[str, Any]] = None,
+                depends_on: Optional[List[str]] = None):
         """
         Inicializa una nueva tarea.
         
@@ -48,6 +49,8 @@ class Task:
             priority: Prioridad de la tarea
             critical: Indica si la tarea es crítica para el objetivo
             params: Parámetros adicionales para la ejecución
+            depends_on: Ids de las tareas que deben completarse antes
+                        (sin dependencias puede ejecutarse en paralelo)
         """
         self.id = id or str(uuid.uuid4())
         self.description = description
@@ -55,6 +58,7 @@ class Task:
         self.priority = priority
         self.critical = critical
         self.params = params or {}
+        self.depends_on = list(depends_on or [])
         self.status = TaskStatus.PENDING
         self.result = None
         self.error = None
@@ -78,7 +82,8 @@ class Task:
             'status': self.status.name,
             'result': self.result,
             'error': self.error,
-            'params': self.params
+            'params': self.params,
+            'depends_on': self.depends_on
         }
     
     @classmethod
@@ -98,7 +103,8 @@ class Task:
             command=data.get('command'),
             priority=TaskPriority[data.get('priority', 'MEDIUM')],
             critical=data.get('critical', False),
-            params=data.get('params', {})
+            params=data.get('params', {}),
+            depends_on=data.get('depends_on')
         )
         
         if 'status' in data:
@@ -126,4 +132,80 @@ class Task:
         Returns:
             Representación oficial como string
         """
-        return f"Task(id='{self.id}', description='{self.description}', status={self.status.name})"
\ No newline at end of file
+        return f"Task(id='{self.id}', description='{self.description}', status={self.status.name})"
+
+
+# Prioridades aceptadas en los planes (respuestas del modelo, reglas...)
+_PRIORITIES = {
+    'LOW': TaskPriority.LOW, 'BAJA': TaskPriority.LOW,
+    'MEDIUM': TaskPriority.MEDIUM, 'MEDIA': TaskPriority.MEDIUM,
+    'HIGH': TaskPriority.HIGH, 'ALTA': TaskPriority.HIGH,
+    'CRITICAL': TaskPriority.CRITICAL, 'CRITICA': TaskPriority.CRITICAL,
+    'CRÍTICA': TaskPriority.CRITICAL,
+}
+
+
+def task_from_item(item: Any, previous: List[Task], chain: bool = False,
+                   aliases: Optional[Dict[str, str]] = None) -> Optional[Task]:
+    """
+    Construye una tarea a partir de un elemento de un plan (array JSON del
+    modelo, plan de una regla o lista de tareas de un proveedor).
+
+    Admite claves en inglés o español y valores poco estrictos
+    ("ALTA", "true" como cadena, un comando suelto como texto). Solo se
+    aceptan dependencias de tareas anteriores, lo que impide los ciclos.
+    Un id repetido se renombra y, si se pasa aliases, las dependencias
+    posteriores a ese id apuntan a la última tarea que lo usó.
+
+    Args:
+        item: Elemento del plan
+        previous: Tareas ya construidas (para evitar ids repetidos)
+        chain: Si un elemento sin 'depends_on' depende de la tarea anterior
+               (los pasos de un plan generado van en orden por defecto)
+        aliases: Id original -> id asignado, compartido por todo el plan
+                 (se actualiza con la tarea construida)
+
+    Returns:
+        Tarea o None si el elemento no contiene nada ejecutable
+    """
+    if isinstance(item, str):
+        item = {'command': item}
+    if not isinstance(item, dict):
+        return None
+
+    command = item.get('command') or item.get('comando')
+    description = item.get('description') or item.get('descripcion') or item.get('tarea')
+    if not command and not description:
+        return None
+
+    priority = _PRIORITIES.get(str(item.get('priority', item.get('prioridad', 'MEDIUM'))).upper(),
+                               TaskPriority.MEDIUM)
+    critical = item.get('critical', item.get('critica', False))
+    if isinstance(critical, str):
+        critical = critical.strip().lower() in ('true', 'si', 'sí', 'yes', '1')
+
+    if aliases is None:
+        aliases = {}
+    original_id = str(item.get('id') or f"task_{len(previous) + 1}")
+    task_id = original_id
+    if any(task.id == task_id for task in previous):
+        task_id = f"{task_id}_{len(previous) + 1}"
+
+    depends_on = item.get('depends_on', item.get('depende_de'))
+    if depends_on is None:
+        depends_on = [previous[-1].id] if chain and previous else []
+    elif isinstance(depends_on, str):
+        depends_on = [depends_on]
+    known = {task.id for task in previous}
+    depends_on = [aliases.get(str(d), str(d)) for d in depends_on]
+    depends_on = [d for d in depends_on if d in known]
+    aliases[original_id] = task_id
+
+    return Task(
+        id=task_id,
+        description=description or f"Ejecutar: {command}",
+        command=command,
+        priority=priority,
+        critical=bool(critical),
+        depends_on=depends_on
+    )
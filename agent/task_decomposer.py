@@ -7,28 +7,95 @@ Este módulo se encarga de descomponer objetivos en tareas específicas
 que pueden ser ejecutadas por el agente.
 """
 
+import concurrent.futures
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
 
-from providers.openai_provider import OpenAIProvider
-from .task import Task, TaskStatus, TaskPriority
+from providers.circuit_breaker import CircuitOpenError
+from providers.plan_cache import get_default_plan_cache
+from providers.plan_parser import IncrementalJSONArrayParser, parse_plan
+from providers.provider_config import get_section
+from providers.router_provider import build_provider
+from .rule_engine import get_default_rule_engine
+from .task import Task, TaskStatus, TaskPriority, task_from_item
 
 logger = logging.getLogger(__name__)
 
+# Confianza de los descomponedores por tipo de objetivo en el modo especulativo
+# (se multiplica por la confianza de la clasificación, objective['confidence'])
+_TYPE_CONFIDENCE = {
+    'SYSTEM_FILE_OPERATION': 0.8,
+    'SYSTEM_MOUNT': 0.7,
+    'SYSTEM_COMMAND': 0.9,
+}
+
+# Ids de las tareas genéricas que se devuelven cuando la IA no da un plan
+_FALLBACK_TASK_IDS = ('fallback_task', 'generic_task')
+
+# Instrucciones de la descomposición con IA (prefijo estático del prompt)
+DECOMPOSE_SYSTEM_PROMPT = """Descompón la petición del usuario en tareas ejecutables en un sistema Linux.
+
+Genera entre 2 y 5 tareas en formato JSON:
+[
+    {
+        "id": "task_id",
+        "description": "descripción de la tarea",
+        "command": "comando a ejecutar",
+        "priority": "HIGH/MEDIUM/LOW",
+        "critical": true/false,
+        "depends_on": ["ids de las tareas que deben terminar antes"]
+    },
+    ...
+]
+
+Las tareas independientes se ejecutan en paralelo: usa "depends_on": [] si
+una tarea no necesita el resultado de ninguna otra.
+
+Solo devuelve el JSON, sin texto adicional. Si la respuesta debe ser un
+objeto JSON, devuelve {"tasks": [...]} con el mismo array.
+"""
+
 class TaskDecomposer:
     """
     Descompone objetivos en tareas específicas utilizando modelos de IA.
     """
     
-    def __init__(self, providers_config: Dict[str, Any]):
+    def __init__(self, providers_config: Dict[str, Any], provider=None, plan_cache=None,
+                 rule_engine=None, speculative: Optional[bool] = None,
+                 confidence_threshold: Optional[float] = None):
         """
         Inicializa el descomponedor de tareas.
         
         Args:
             providers_config: Configuración de los proveedores de IA
+            provider: Proveedor a utilizar (opcional). Por defecto se construye
+                      a partir de la configuración (un proveedor o un router)
+            plan_cache: Caché de planes por similitud (opcional). Por defecto
+                        la compartida configurada en settings.yaml
+            rule_engine: Motor de reglas de la vía rápida (opcional). Por
+                         defecto el compartido configurado en settings.yaml
+            speculative: Si decompose() usa el modo especulativo (ver
+                         decompose_speculative). Por defecto
+                         decomposer.speculative en settings.yaml
+            confidence_threshold: Confianza mínima del plan por reglas para
+                                  no esperar a la IA. Por defecto
+                                  decomposer.confidence_threshold (0.8)
         """
         self.providers_config = providers_config
-        self.provider = OpenAIProvider(api_key=providers_config.get('openai', {}).get('api_key'))
+        self.provider = provider or build_provider(providers_config)
+        self.plan_cache = plan_cache if plan_cache is not None else get_default_plan_cache()
+        self.rule_engine = rule_engine if rule_engine is not None else get_default_rule_engine()
+
+        config = get_section('decomposer')
+        self.speculative = config.get('speculative', False) if speculative is None else speculative
+        self.confidence_threshold = (config.get('confidence_threshold', 0.8)
+                                     if confidence_threshold is None else confidence_threshold)
+        # Estadísticas del modo especulativo y latencia media de la IA (EWMA)
+        self._lock = threading.Lock()
+        self._speculation = {'rules': 0, 'ai': 0, 'latency_saved': 0.0}
+        self._ai_latency: Optional[float] = None
         
     def decompose(self, objective: Dict[str, Any], 
                  context: Optional[Dict[str, Any]] = None) -> List[Task]:
@@ -42,6 +109,9 @@ class TaskDecomposer:
         Returns:
             Lista de tareas
         """
+        if self.speculative:
+            return self.decompose_speculative(objective, context)['tasks']
+
         logger.info(f"Descomponiendo objetivo: {objective['description']}")
         
         # Determinar la estrategia de descomposición según el tipo de objetivo
@@ -54,6 +124,157 @@ class TaskDecomposer:
         else:
             return self._decompose_using_ai(objective, context)
     
+    def decompose_speculative(self, objective: Dict[str, Any],
+                              context: Optional[Dict[str, Any]] = None,
+                              confidence_threshold: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Descompone un objetivo compitiendo los descomponedores por reglas
+        contra la IA.
+
+        La descomposición con IA empieza en segundo plano a la vez que las
+        reglas (motor de reglas y descomponedor del tipo de objetivo). Si el
+        mejor plan por reglas alcanza el umbral de confianza se devuelve al
+        instante y se cancela la llamada a la IA; si no, se espera al plan de
+        la IA (y si la IA falla se usa el plan por reglas aunque no lo alcance).
+
+        Args:
+            objective: Objetivo a descomponer
+            context: Contexto adicional (opcional)
+            confidence_threshold: Umbral de confianza (por defecto el del
+                                  descomponedor)
+
+        Returns:
+            Diccionario con 'tasks', 'winner' ('rules' o 'ai'), 'source'
+            (regla o descomponedor ganador), 'confidence' del plan por reglas
+            (None si no hubo), 'seconds' y 'latency_saved' (segundos ahorrados
+            frente a esperar a la IA; None si aún no se conoce su latencia)
+        """
+        logger.info(f"Descomponiendo objetivo (especulativo): {objective['description']}")
+        if confidence_threshold is None:
+            confidence_threshold = self.confidence_threshold
+        start = time.perf_counter()
+
+        cancel = threading.Event()
+        ai = self._start_ai_decomposition(objective, context, cancel)
+        candidate = self._rule_candidate(objective, context)
+        confidence = candidate['confidence'] if candidate is not None else None
+
+        if candidate is not None and confidence >= confidence_threshold:
+            cancel.set()
+            winner, source, tasks = 'rules', candidate['source'], candidate['tasks']
+        else:
+            tasks = ai.result()
+            winner, source = 'ai', 'ai'
+            if candidate is not None and all(t.id in _FALLBACK_TASK_IDS for t in tasks):
+                # La IA no dio un plan: mejor el de las reglas aunque no llegue al umbral
+                winner, source, tasks = 'rules', candidate['source'], candidate['tasks']
+
+        seconds = time.perf_counter() - start
+        with self._lock:
+            latency_saved = 0.0
+            if winner == 'rules' and not ai.done():
+                latency_saved = (max(0.0, self._ai_latency - seconds)
+                                 if self._ai_latency is not None else None)
+            self._speculation[winner] += 1
+            self._speculation['latency_saved'] += latency_saved or 0.0
+
+        logger.info(f"Especulación ganada por {source} (confianza {confidence}) en {seconds:.3f}s")
+        return {
+            'tasks': tasks,
+            'winner': winner,
+            'source': source,
+            'confidence': confidence,
+            'seconds': seconds,
+            'latency_saved': latency_saved,
+        }
+
+    def speculation_stats(self) -> Dict[str, Any]:
+        """
+        Devuelve las estadísticas del modo especulativo.
+
+        Returns:
+            Diccionario con las victorias de cada vía ('rules', 'ai'), la
+            latencia ahorrada acumulada y la latencia media de la IA
+        """
+        with self._lock:
+            return dict(self._speculation, ai_latency=self._ai_latency)
+
+    def _start_ai_decomposition(self, objective: Dict[str, Any],
+                                context: Optional[Dict[str, Any]],
+                                cancel: threading.Event) -> concurrent.futures.Future:
+        """
+        Lanza la descomposición con IA en un hilo en segundo plano.
+
+        Args:
+            objective: Objetivo a descomponer
+            context: Contexto adicional
+            cancel: Evento que cancela la llamada
+
+        Returns:
+            Future con la lista de tareas de la IA
+        """
+        future = concurrent.futures.Future()
+
+        def run():
+            start = time.perf_counter()
+            try:
+                tasks = list(self._decompose_using_ai_stream(objective, context, use_rules=False,
+                                                             cancel=cancel))
+            except Exception as e:
+                future.set_exception(e)
+                return
+            if not cancel.is_set():
+                self._record_ai_latency(time.perf_counter() - start)
+            future.set_result(tasks)
+
+        # Hilo demonio: una llamada cancelada que aún espera el primer token
+        # no retrasa la salida del programa
+        threading.Thread(target=run, name="speculative-ai", daemon=True).start()
+        return future
+
+    def _record_ai_latency(self, seconds: float) -> None:
+        with self._lock:
+            if self._ai_latency is None:
+                self._ai_latency = seconds
+            else:
+                self._ai_latency = 0.8 * self._ai_latency + 0.2 * seconds
+
+    def _rule_candidate(self, objective: Dict[str, Any],
+                        context: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Calcula el mejor plan por reglas y su confianza.
+
+        Args:
+            objective: Objetivo a descomponer
+            context: Contexto adicional
+
+        Returns:
+            Diccionario con 'tasks', 'confidence' y 'source', o None si ni el
+            motor de reglas ni el tipo del objetivo dan un plan
+        """
+        candidates = []
+        match = self.rule_engine.match(objective['description'])
+        if match is not None:
+            candidates.append({'tasks': self._tasks_from_rule(match),
+                               'confidence': match['confidence'],
+                               'source': f"rule:{match['intent']}"})
+
+        typed = {
+            'SYSTEM_FILE_OPERATION': self._decompose_file_operation,
+            'SYSTEM_MOUNT': self._decompose_mount_operation,
+            'SYSTEM_COMMAND': self._decompose_command_operation,
+        }.get(objective['type'])
+        if typed is not None:
+            tasks = typed(objective, context)
+            confidence = _TYPE_CONFIDENCE[objective['type']] * objective.get('confidence', 1.0)
+            if len(tasks) < 2:
+                # Solo la validación: no se reconoció la operación concreta
+                confidence *= 0.5
+            candidates.append({'tasks': tasks, 'confidence': confidence,
+                               'source': objective['type']})
+
+        return max(candidates, key=lambda c: c['confidence'], default=None)
+
     def _decompose_file_operation(self, objective: Dict[str, Any], 
                                 context: Optional[Dict[str, Any]] = None) -> List[Task]:
         """
@@ -93,13 +314,15 @@ class TaskDecomposer:
             tasks.append(Task(
                 id='list_hidden_files',
                 description=f"Listar archivos ocultos en '{directory}'",
-                command=f"ls -la {directory} | grep '^\\.'"
+                command=f"ls -la {directory} | grep '^\\.'",
+                depends_on=['validate_directory']
             ))
         elif 'listar' in description or 'mostrar' in description:
             tasks.append(Task(
                 id='list_files',
                 description=f"Listar archivos en '{directory}'",
-                command=f"ls -la {directory}"
+                command=f"ls -la {directory}",
+                depends_on=['validate_directory']
             ))
         
         return tasks
@@ -161,10 +384,33 @@ class TaskDecomposer:
             Task(
                 id='execute_command',
                 description=f"Ejecutar: {command}",
-                command=command
+                command=command,
+                depends_on=['validate_command']
             )
         ]
     
+    def decompose_stream(self, objective: Dict[str, Any],
+                         context: Optional[Dict[str, Any]] = None) -> Iterator[Task]:
+        """
+        Descompone un objetivo devolviendo cada tarea en cuanto está disponible.
+
+        Con la estrategia de IA las tareas se construyen a medida que el modelo
+        genera los elementos del array JSON, de modo que su ejecución puede
+        empezar antes de que termine la respuesta.
+
+        Args:
+            objective: Objetivo a descomponer
+            context: Contexto adicional (opcional)
+
+        Returns:
+            Generador de tareas
+        """
+        if objective['type'] in ('SYSTEM_FILE_OPERATION', 'SYSTEM_MOUNT', 'SYSTEM_COMMAND'):
+            yield from self.decompose(objective, context)
+        else:
+            logger.info(f"Descomponiendo objetivo: {objective['description']}")
+            yield from self._decompose_using_ai_stream(objective, context)
+
     def _decompose_using_ai(self, objective: Dict[str, Any], 
                           context: Optional[Dict[str, Any]] = None) -> List[Task]:
         """
@@ -177,44 +423,149 @@ class TaskDecomposer:
         Returns:
             Lista de tareas generadas por IA
         """
-        prompt = f"""
-        Descompón la siguiente petición en tareas ejecutables en un sistema Linux:
-        "{objective['description']}"
-        
-        Genera entre 2 y 5 tareas en formato JSON:
-        [
-            {{
-                "id": "task_id",
-                "description": "descripción de la tarea",
-                "command": "comando a ejecutar",
-                "priority": "HIGH/MEDIUM/LOW",
-                "critical": true/false
-            }},
-            ...
-        ]
-        
-        Solo devuelve el JSON, sin texto adicional.
+        return list(self._decompose_using_ai_stream(objective, context))
+
+    def _decompose_using_ai_stream(self, objective: Dict[str, Any],
+                                   context: Optional[Dict[str, Any]] = None,
+                                   use_rules: bool = True,
+                                   cancel: Optional[threading.Event] = None) -> Iterator[Task]:
+        """
+        Descompone un objetivo general usando IA en modo JSON y streaming.
+
+        Args:
+            objective: Objetivo general
+            context: Contexto adicional
+            use_rules: Si se consulta antes el motor de reglas
+            cancel: Evento (opcional) que detiene la generación y cierra la
+                    conexión con el proveedor en cuanto se activa
+
+        Returns:
+            Generador de tareas generadas por IA
         """
+        # Vía rápida: las peticiones conocidas no necesitan al modelo
+        tasks = self._decompose_using_rules(objective) if use_rules else None
+        if tasks is not None:
+            yield from tasks
+            return
+
+        # Reutilizar el plan de un objetivo parecido ya descompuesto
+        hit = self.plan_cache.lookup(objective['description'], namespace='tasks')
+        if hit is not None:
+            logger.info(f"Plan reutilizado de '{hit['objective']}' "
+                        f"(similitud {hit['similarity']:.2f})")
+            yield from (Task.from_dict(data) for data in hit['plan'])
+            return
+
+        # Solo la petición es dinámica; las instrucciones van como prefijo
+        # estático para que la API las sirva desde su caché de prompts
+        prompt = f"Petición: \"{objective['description']}\""
         
-        # Llamar a la API para descomponer la tarea
+        # Llamar a la API en modo JSON: cada elemento del array se convierte
+        # en tarea en cuanto el modelo lo termina de generar
+        parser = IncrementalJSONArrayParser()
+        tasks = []
+        aliases = {}
+        stream = self.provider.stream_text(prompt, system=DECOMPOSE_SYSTEM_PROMPT,
+                                           max_tokens=500, json_mode=True)
         try:
-            response = self.provider.generate_text(prompt, max_tokens=500)
-            # Aquí parsearíamos el JSON de la respuesta y crearíamos las tareas
-            # Por simplicidad, devolvemos una tarea genérica
-            return [
-                Task(
-                    id='generic_task',
-                    description=objective['description'],
-                    command=f"echo 'Procesando: {objective['description']}'"
-                )
-            ]
+            for chunk in stream:
+                if cancel is not None and cancel.is_set():
+                    # Plan parcial descartado: no se guarda en la caché
+                    logger.info("Descomposición con IA cancelada")
+                    return
+                for item in parser.feed(chunk):
+                    task = task_from_item(item, tasks, chain=True, aliases=aliases)
+                    if task is not None:
+                        tasks.append(task)
+                        yield task
+            for item in parser.close():
+                task = task_from_item(item, tasks, chain=True, aliases=aliases)
+                if task is not None:
+                    tasks.append(task)
+                    yield task
         except Exception as e:
-            logger.error(f"Error al descomponer usando IA: {e}")
-            # Fallback a tarea genérica
-            return [
-                Task(
+            if isinstance(e, CircuitOpenError):
+                # Proveedor degradado: se responde al instante sin esperar a la API
+                logger.warning(f"IA no disponible, se usa la tarea genérica: {e}")
+            else:
+                logger.error(f"Error al descomponer usando IA: {e}")
+            if not tasks:
+                # Fallback a tarea genérica
+                yield Task(
                     id='fallback_task',
                     description=f"Procesar: {objective['description']}",
                     command=f"echo 'Procesando: {objective['description']}'"
                 )
-            ]
\ No newline at end of file
+            return
+        finally:
+            # Cerrar el stream libera la conexión aunque no se haya consumido entero
+            stream.close()
+
+        if parser.repaired or parser.dropped:
+            logger.warning(f"Respuesta JSON con {parser.repaired} elementos reparados "
+                           f"y {parser.dropped} descartados")
+
+        if not tasks:
+            # El modelo no devolvió JSON: se aprovechan los comandos numerados
+            for item in parse_plan(parser.text):
+                if 'comando' in item:
+                    task = task_from_item({'command': item['comando']}, tasks, chain=True,
+                                          aliases=aliases)
+                    tasks.append(task)
+                    yield task
+
+        if tasks:
+            self._remember_plan(objective, tasks)
+        else:
+            yield Task(
+                id='generic_task',
+                description=objective['description'],
+                command=f"echo 'Procesando: {objective['description']}'"
+            )
+
+    def _decompose_using_rules(self, objective: Dict[str, Any]) -> Optional[List[Task]]:
+        """
+        Descompone un objetivo con el motor de reglas (config/rules.yaml).
+
+        Args:
+            objective: Objetivo a descomponer
+
+        Returns:
+            Lista de tareas, o None si ninguna regla reconoce el objetivo con
+            al menos confidence_threshold
+        """
+        match = self.rule_engine.match(objective['description'],
+                                       min_confidence=self.confidence_threshold)
+        if match is None:
+            return None
+        logger.info(f"Objetivo resuelto por la regla '{match['intent']}'")
+        return self._tasks_from_rule(match)
+
+    def _tasks_from_rule(self, match: Dict[str, Any]) -> List[Task]:
+        """
+        Construye las tareas del plan de una regla (ver RuleEngine.match).
+        """
+        tasks = []
+        aliases = {}
+        for item in match['tasks']:
+            tasks.append(task_from_item(item, tasks, aliases=aliases))
+        return tasks
+
+    def _remember_plan(self, objective: Dict[str, Any], tasks: List[Task]) -> None:
+        """
+        Guarda las tareas generadas en la caché de planes.
+
+        Args:
+            objective: Objetivo descompuesto
+            tasks: Tareas generadas para el objetivo
+        """
+        plan = [{
+            'id': task.id,
+            'description': task.description,
+            'command': task.command,
+            'priority': task.priority.name,
+            'critical': task.critical,
+            'params': task.params,
+            'depends_on': task.depends_on,
+        } for task in tasks]
+        self.plan_cache.store(objective['description'], plan, namespace='tasks')
@@ -54,18 +54,11 @@ class TaskProcessor:
         # Paso 2: Descomponer en tareas
         tasks = self.task_decomposer.decompose(objective, context)
         
-        # Paso 3: Ejecutar tareas
-        results = {}
-        for task in tasks:
-            result = self.executor.execute_task(task)
-            task.status = TaskStatus.COMPLETED if result.get('success') else TaskStatus.FAILED
-            task.result = result.get('output')
-            results[task.id] = task.result
-            
-            # Si una tarea falla y es crítica, detenemos la ejecución
-            if task.status == TaskStatus.FAILED and task.critical:
-                logger.error(f"Tarea crítica fallida: {task.id}")
-                break
+        # Paso 3: Ejecutar tareas; las independientes en paralelo. Si una
+        # tarea crítica falla se cancelan las pendientes y las que están en curso
+        execution = self.executor.execute_tasks(tasks)
+        results = {task_id: result.get('output')
+                   for task_id, result in execution['results'].items()}
         
         # Paso 4: Integrar resultados
         final_result = self._integrate_results(objective, tasks, results)
@@ -74,7 +67,8 @@ class TaskProcessor:
             'objective': objective,
             'tasks': tasks,
             'task_results': results,
-            'final_result': final_result
+            'final_result': final_result,
+            'execution': execution
         }
     
     def _analyze_request(self, request: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
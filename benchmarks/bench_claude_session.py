@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark: coste por llamada de ClaudeProvider con y sin sesión persistente.
+
+Levanta el servidor simulado (providers.mock_server) y compara
+una petición requests.post() sin sesión (nueva conexión TCP en cada llamada)
+con la sesión con keep-alive de ClaudeProvider.
+
+Uso:
+    python benchmarks/bench_claude_session.py [--calls 500]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from providers.claude_provider import ClaudeProvider
+from providers.mock_server import MockLLMServer
+from providers.rate_limiter import RateLimiter
+from providers.response_cache import ResponseCache
+
+def bench(label, fn, calls):
+    fn()  # calentamiento
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    elapsed = time.perf_counter() - start
+    per_call_ms = elapsed / calls * 1000
+    print(f"{label:<28} {calls:>6} llamadas  {elapsed:8.3f}s  {per_call_ms:8.3f} ms/llamada")
+    return per_call_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+
+    server = MockLLMServer().start()
+    base_url = server.base_url
+
+    # Sin caché ni límite de cuota: se mide solo el coste HTTP
+    provider = ClaudeProvider(api_key="bench", base_url=base_url,
+                              cache=ResponseCache(path=None, enabled=False),
+                              rate_limiter=RateLimiter())
+    payload = provider._payload("info sistema", provider.default_model, 150, 0.7)
+
+    def without_session():
+        headers = {
+            "x-api-key": provider.api_key,
+            "anthropic-version": "2023-06-01",
+            "content-type": "application/json"
+        }
+        response = requests.post(f"{base_url}/messages", headers=headers, json=payload)
+        response.raise_for_status()
+        return response.json()["content"][0]["text"]
+
+    def with_session():
+        return provider.generate_text("info sistema", use_cache=False)
+
+    baseline = bench("requests.post (sin sesión)", without_session, args.calls)
+    pooled = bench("ClaudeProvider (sesión)", with_session, args.calls)
+    print(f"\nAhorro por llamada: {baseline - pooled:.3f} ms ({(1 - pooled / baseline) * 100:.1f}%)")
+
+    provider.close()
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
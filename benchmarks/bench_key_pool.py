@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark: rendimiento de ClaudeProvider con 1, 2 y 4 claves de API.
+
+Levanta el servidor simulado (providers.mock_server) con un límite de
+peticiones por segundo para cada clave, como la cuota real de las API, y
+lanza las mismas peticiones concurrentes con pools de distinto tamaño.
+
+Uso:
+    python benchmarks/bench_key_pool.py [--calls 120] [--key-rps 10] [--threads 8]
+"""
+
+import argparse
+import concurrent.futures
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from providers.circuit_breaker import CircuitBreaker
+from providers.claude_provider import ClaudeProvider
+from providers.mock_server import MockLLMServer
+from providers.plan_cache import PlanCache
+from providers.rate_limiter import RateLimiter
+from providers.response_cache import ResponseCache
+from providers.retry import RetryPolicy
+
+
+def bench(server, keys, calls, threads):
+    # Sin caché ni limitador local: la cuota la impone el servidor por clave
+    provider = ClaudeProvider(api_keys=[f"bench-key-{i}" for i in range(keys)],
+                              base_url=server.base_url,
+                              cache=ResponseCache(path=None, enabled=False),
+                              rate_limiter=RateLimiter(), plan_cache=PlanCache(enabled=False),
+                              retry_policy=RetryPolicy(max_retries=10, base_delay=0.1),
+                              circuit_breaker=CircuitBreaker("bench", enabled=False))
+    throttled = server.counters["throttled"]
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda i: provider.generate_text(f"info sistema {i}"), range(calls)))
+    elapsed = time.perf_counter() - start
+
+    print(f"{keys} clave(s)  {calls:>5} llamadas  {elapsed:7.2f}s  "
+          f"{calls / elapsed:7.1f} llamadas/s  429: {server.counters['throttled'] - throttled}")
+    provider.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=120)
+    parser.add_argument("--key-rps", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    server = MockLLMServer(key_requests_per_second=args.key_rps).start()
+    for keys in (1, 2, 4):
+        bench(server, keys, args.calls, args.threads)
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark: tiempo de búsqueda de PlanCache según el número de objetivos guardados.
+
+Llena la caché con objetivos sintéticos (verbo + palabras aleatorias + ruta)
+y mide la latencia de búsqueda de aciertos (paráfrasis de un objetivo
+guardado) y fallos (objetivos nuevos) a distintos tamaños.
+
+Uso:
+    python benchmarks/bench_plan_cache.py [--entries 1000000] [--lookups 2000]
+"""
+
+import argparse
+import os
+import random
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from providers.plan_cache import PlanCache
+
+VERBS = ["listar", "muestra", "borra", "crea", "copia", "busca", "comprime", "monta", "revisa"]
+PLAN = [{"tarea": "Ejecutar: ls -la /tmp", "comando": "ls -la /tmp"}]
+
+
+def make_vocabulary(rng, size=20000):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(size)]
+
+
+def make_objective(rng, vocabulary):
+    words = " ".join(rng.choice(vocabulary) for _ in range(3))
+    return f"{rng.choice(VERBS)} los {words} en /srv/{rng.choice(vocabulary)}"
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def measure(cache, queries):
+    samples = []
+    hits = 0
+    for query in queries:
+        start = time.perf_counter()
+        hit = cache.lookup(query)
+        samples.append((time.perf_counter() - start) * 1e6)
+        hits += hit is not None
+    return percentile(samples, 0.5), percentile(samples, 0.95), hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = make_vocabulary(rng)
+    cache = PlanCache(max_entries=args.entries)
+
+    checkpoints = [n for n in (1000, 10000, 100000, 1000000) if n < args.entries] + [args.entries]
+    stored = []
+    print(f"{'objetivos':>10}  {'inserción':>10}  {'acierto p50/p95 (µs)':>22}  "
+          f"{'fallo p50/p95 (µs)':>20}  {'aciertos':>8}  {'RSS (MB)':>8}")
+
+    start = time.perf_counter()
+    for checkpoint in checkpoints:
+        while len(cache) < checkpoint:
+            objective = make_objective(rng, vocabulary)
+            cache.store(objective, PLAN)
+            if len(stored) < args.lookups:
+                stored.append(objective)
+        build = time.perf_counter() - start
+
+        # Paráfrasis: mismo contenido con otro verbo equivalente, artículo y ruta
+        paraphrases = [q.replace(" los ", " las ").replace("/srv/", "/home/") for q in stored]
+        misses = [make_objective(rng, vocabulary) for _ in range(len(stored))]
+        hit_p50, hit_p95, hits = measure(cache, paraphrases)
+        miss_p50, miss_p95, _ = measure(cache, misses)
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{checkpoint:>10}  {build:>9.1f}s  {hit_p50:>10.1f} / {hit_p95:<9.1f}  "
+              f"{miss_p50:>9.1f} / {miss_p95:<8.1f}  {hits:>8}  {rss:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
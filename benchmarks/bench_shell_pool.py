@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark: comandos por segundo con execute_command frente al pool de shells.
+
+Ejecuta un plan de comandos pequeños ('echo', 'uname', 'pwd'), primero
+lanzando un /bin/sh por comando (execute_command) y después con shells
+persistentes (utils.shell_pool.ShellPool), en serie y con varios hilos.
+
+Uso:
+    python benchmarks/bench_shell_pool.py [--commands 500] [--threads 4] [--pool-size 4]
+"""
+
+import argparse
+import concurrent.futures
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.shell_pool import ShellPool
+from utils.system_handlers import execute_command
+
+PLAN = ["echo hola", "uname -s", "pwd", "ls -d /etc"]
+
+
+def bench(name, run, commands, threads):
+    plan = [PLAN[i % len(PLAN)] for i in range(commands)]
+    start = time.perf_counter()
+    if threads == 1:
+        results = [run(command) for command in plan]
+    else:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as pool:
+            results = list(pool.map(run, plan))
+    elapsed = time.perf_counter() - start
+
+    failed = sum(not r['success'] for r in results)
+    print(f"{name:<28} {threads} hilo(s)  {commands:>5} comandos  {elapsed:7.2f}s  "
+          f"{commands / elapsed:8.1f} comandos/s  fallos: {failed}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--commands", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--max-commands", type=int, default=100)
+    args = parser.parse_args()
+
+    with ShellPool(size=args.pool_size, max_commands=args.max_commands) as shell_pool:
+        for threads in sorted({1, args.threads}):
+            spawn = bench("execute_command (spawn)", execute_command, args.commands, threads)
+            pooled = bench("ShellPool", shell_pool.execute, args.commands, threads)
+            print(f"  -> {spawn / pooled:.1f}x más rápido con el pool")
+        print(f"pool: {shell_pool.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,43 @@
 import os
-import yaml
 from pathlib import Path
 
-def load_settings(config_file="config/settings.yaml"):
+DEFAULT_SETTINGS_FILE = os.path.join("config", "settings.yaml")
+_PACKAGE_SETTINGS_FILE = Path(__file__).resolve().parent / "settings.yaml"
+
+def find_settings_file():
+    """
+    Busca el archivo de configuración: primero la variable de entorno
+    AGENT_SETTINGS, luego config/settings.yaml relativo al directorio actual
+    y por último el que está junto a este módulo.
+    Devuelve None si no existe ninguno.
+    """
+    for candidate in (os.getenv("AGENT_SETTINGS"), DEFAULT_SETTINGS_FILE, _PACKAGE_SETTINGS_FILE):
+        if candidate and os.path.exists(candidate):
+            return Path(candidate)
+    return None
+
+def load_settings(config_file=None, create_default=True):
     """
     Carga la configuración desde un archivo YAML.
-    Si el archivo no existe, crea una configuración por defecto.
+    Sin config_file se usa el que encuentre find_settings_file().
+    Si el archivo no existe, crea una configuración por defecto
+    (o devuelve un diccionario vacío si create_default es False).
     """
-    config_path = Path(config_file)
+    if config_file is None:
+        config_path = find_settings_file() or Path(DEFAULT_SETTINGS_FILE)
+    else:
+        config_path = Path(config_file)
     
     if not config_path.exists():
+        if not create_default:
+            return {}
         # Crear configuración por defecto
         create_default_settings(config_path)
     
+    # yaml se importa aquí para no cargarlo al importar los proveedores
+    import yaml
     with open(config_path, 'r') as file:
-        return yaml.safe_load(file)
+        return yaml.safe_load(file) or {}
 
 def create_default_settings(config_path):
     """
@@ -39,5 +62,6 @@ def create_default_settings(config_path):
     os.makedirs(config_path.parent, exist_ok=True)
     
     # Escribir configuración por defecto
+    import yaml
     with open(config_path, 'w') as file:
         yaml.dump(default_settings, file, default_flow_style=False)
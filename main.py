@@ -3,14 +3,25 @@
 import os
 import sys
 from agent.executor import Executor
+from agent.rule_engine import get_default_rule_engine
 from utils.logger import get_logger
-from providers.openai_provider import OpenAIProvider
+from providers.key_pool import configured_api_keys
+from providers.provider_config import get_section, load_environment
+from providers.router_provider import build_provider
+from providers.warmup import start_warmup
 
 def load_settings():
-    return {"openai_api_key": os.getenv("OPENAI_API_KEY")}
+    load_environment()
+    return {
+        # Una o varias claves por proveedor (OPENAI_API_KEYS, api_keys en settings.yaml...)
+        "openai_api_keys": configured_api_keys("openai"),
+        "claude_api_keys": configured_api_keys("claude"),
+    }
 
 def build_context():
-    return {"archivos": os.listdir(".")}
+    # Orden estable: el proveedor empaqueta el contexto a su presupuesto de
+    # tokens y un prompt idéntico se puede servir desde la caché
+    return {"archivos": sorted(os.listdir("."))}
 
 def print_modes():
     print("🤖 Asistente Inteligente - Modos disponibles:")
@@ -54,21 +65,27 @@ def main():
     
     # Cargar configuración
     settings = load_settings()
-    api_key = settings.get("openai_api_key")
 
-    if not api_key:
-        logger.error("❌ No se encontró la clave de API de OpenAI.")
-        print("❌ Se requiere una clave de API de OpenAI para continuar.")
-        print("Por favor, configura la variable de entorno OPENAI_API_KEY.")
+    if not settings.get("openai_api_keys") and not settings.get("claude_api_keys"):
+        logger.error("❌ No se encontró ninguna clave de API.")
+        print("❌ Se requiere una clave de API de OpenAI o Claude para continuar.")
+        print("Por favor, configura la variable de entorno OPENAI_API_KEY o CLAUDE_API_KEY.")
         return
     
-    # Inicializar proveedor
+    # Inicializar proveedor (un proveedor o un router si hay varias claves)
     try:
-        provider = OpenAIProvider(api_key)
+        provider = build_provider({
+            "openai": {"api_keys": settings.get("openai_api_keys")},
+            "claude": {"api_keys": settings.get("claude_api_keys")},
+        })
     except Exception as e:
         logger.error(f"Error al inicializar el proveedor: {e}")
         print(f"❌ Error al inicializar: {e}")
         return
+
+    # Mientras el usuario escribe se abren las conexiones y se precargan los
+    # modelos, para que la primera petición no pague el arranque en frío
+    start_warmup(provider)
     
     # Obtener modo y petición
     mode = get_user_mode()
@@ -80,10 +97,31 @@ def main():
     # Obtener contexto
     contexto = build_context()
     
-    # Generar tareas
+    # Generar tareas: las peticiones conocidas se resuelven con reglas sin
+    # llamar al modelo (milisegundos en lugar de segundos)
+    rules = get_default_rule_engine()
+    umbral = get_section("decomposer").get("confidence_threshold", 0.8)
+    plan = rules.plan(objetivo, min_confidence=umbral)
+    logger.info(f"Tasa de aciertos de las reglas: {rules.stats()['hit_rate']:.0%}")
     try:
+        if mode == "auto":
+            # En modo automático cada comando se ejecuta en cuanto se genera
+            if plan is not None:
+                # El plan de una regla ya está completo: se ejecuta respetando
+                # sus dependencias (las tareas independientes en paralelo)
+                print("🚀 Ejecutando tareas...\n")
+                Executor(plan).execute(mode="auto")
+                print(f"\n✅ {len(plan)} tareas procesadas.")
+                return
+            print("🧠 Generando y ejecutando tareas en streaming...\n")
+            executor = Executor()
+            tareas = executor.execute_stream(provider.generar_tareas_stream(objetivo, contexto),
+                                             mode="auto")
+            print(f"\n✅ {len(tareas)} tareas procesadas.")
+            return
+
         print("🧠 Generando tareas...\n")
-        tareas = provider.generar_tareas(objetivo, contexto)
+        tareas = plan if plan is not None else provider.generar_tareas(objetivo, contexto)
         
         # Mostrar tareas generadas
         print("📋 Tareas generadas:")
@@ -104,10 +142,6 @@ def main():
                 executor.execute(mode="interactive")
             else:
                 print("\nℹ️ Ejecución cancelada por el usuario.")
-        
-        elif mode == "auto":
-            print("\n🚀 Ejecutando tareas automáticamente...\n")
-            executor.execute(mode="auto")
             
     except Exception as e:
         logger.error(f"Error al procesar la petición: {e}")
@@ -1,7 +1,30 @@
-# Inicialización del paquete 
-from .openai_provider import OpenAIProvider
-from .claude_provider import ClaudeProvider
-from .fake_provider import FakeProvider
+# Inicialización del paquete
+# Las clases de proveedores se cargan bajo demanda (ver registry.py), de modo
+# que "import providers" no importa el SDK de OpenAI ni requests.
+import importlib
+
+from .registry import available_providers, create_provider, get_provider_class, register_provider
+
+_LAZY_ATTRIBUTES = {
+    "OpenAIProvider": ".openai_provider",
+    "ClaudeProvider": ".claude_provider",
+    "FakeProvider": ".fake_provider",
+    "FakeLLMProvider": ".fake_provider",
+    "RouterProvider": ".router_provider",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES) + [
+    "available_providers", "create_provider", "get_provider_class", "register_provider",
+]
 
 # Definir versión
 __version__ = '0.1.0'
+
+
+def __getattr__(name):
+    module_path = _LAZY_ATTRIBUTES.get(name)
+    if module_path is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_path, __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,77 @@
+"""
+async_utils.py
+
+Utilidades para combinar la API asíncrona de los proveedores con código síncrono.
+"""
+import asyncio
+import threading
+import weakref
+
+
+def run_sync(coro):
+    """
+    Ejecuta una corrutina desde código síncrono y devuelve su resultado.
+
+    Si no hay un event loop en marcha en el hilo actual se usa asyncio.run().
+    Si ya lo hay (p. ej. dentro de Jupyter) la corrutina se ejecuta en un hilo
+    auxiliar con su propio loop para no bloquear ni reentrar el actual.
+
+    :param coro: Corrutina a ejecutar.
+    :return: Resultado de la corrutina.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    result = {}
+
+    def runner():
+        try:
+            result["value"] = asyncio.run(coro)
+        except BaseException as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=runner, daemon=True)
+    thread.start()
+    thread.join()
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
+
+
+class LoopLocal:
+    """
+    Mantiene una instancia de un recurso por event loop.
+
+    Los clientes HTTP asíncronos quedan ligados al loop en el que abren sus
+    conexiones; este contenedor crea uno nuevo cuando cambia el loop (por
+    ejemplo, entre llamadas sucesivas a run_sync).
+    """
+
+    def __init__(self, factory):
+        """
+        :param factory: Función sin argumentos que crea el recurso.
+        """
+        self._factory = factory
+        self._instances = weakref.WeakKeyDictionary()
+
+    def get(self):
+        """
+        Devuelve el recurso asociado al loop en ejecución, creándolo si hace falta.
+
+        :return: Recurso asociado al loop actual.
+        """
+        loop = asyncio.get_running_loop()
+        instance = self._instances.get(loop)
+        if instance is None:
+            instance = self._factory()
+            self._instances[loop] = instance
+        return instance
+
+    def pop(self):
+        """
+        Retira y devuelve el recurso del loop en ejecución (o None).
+        """
+        loop = asyncio.get_running_loop()
+        return self._instances.pop(loop, None)
@@ -1,39 +1,542 @@
 # providers/base_provider.py
+import asyncio
+import functools
+import threading
+import time
 from abc import ABC, abstractmethod
 
+from .circuit_breaker import get_circuit_breaker
+from .context_packer import ContextPacker, get_context_budget
+from .plan_cache import get_default_plan_cache
+from .plan_parser import IncrementalPlanParser, parse_plan
+from .prompt_templates import PromptTemplates
+from .provider_config import get_section
+from .rate_limiter import estimate_request_tokens, get_rate_limiter
+from .response_cache import get_default_cache, make_cache_key
+from .retry import ProviderHTTPError, RetryPolicy
+from .singleflight import SingleFlight
+
 class ProviderBase(ABC):
     """
     Clase base abstracta para los proveedores de IA.
     Cualquier proveedor debe implementar estos métodos.
     """
-    
-    @abstractmethod
-    def generate_text(self, prompt, **kwargs):
+
+    default_model = None
+    provider_name = None
+    # Pool de claves de API (ver key_pool); solo en los proveedores con API real
+    key_pool = None
+
+    def __init__(self, cache=None, rate_limiter=None, retry_policy=None, plan_cache=None,
+                 circuit_breaker=None):
+        """
+        Inicializa los componentes comunes a todos los proveedores.
+
+        :param cache: Caché de respuestas a utilizar. Si no se indica se usa la
+                      caché compartida configurada en settings.yaml.
+        :param rate_limiter: Limitador de cuota. Por defecto el compartido por
+                             todas las instancias del mismo proveedor.
+        :param retry_policy: Política de reintentos. Por defecto la configurada
+                             en settings.yaml para el proveedor.
+        :param plan_cache: Caché de planes por similitud de objetivos. Por
+                           defecto la compartida configurada en settings.yaml.
+        :param circuit_breaker: Cortacircuitos. Por defecto el compartido por
+                                todas las instancias del mismo proveedor.
+        """
+        name = self.provider_name or type(self).__name__.lower()
+        self.response_cache = cache if cache is not None else get_default_cache()
+        self.rate_limiter = rate_limiter or get_rate_limiter(name)
+        self.retry_policy = retry_policy or RetryPolicy.from_settings(name)
+        self.plan_cache = plan_cache if plan_cache is not None else get_default_plan_cache()
+        self.circuit_breaker = circuit_breaker or get_circuit_breaker(name)
+        # Peticiones idénticas concurrentes comparten una sola llamada a la API
+        self.single_flight = SingleFlight()
+        # Consumo de tokens informado por la API (incluida la caché de prompts)
+        self._usage_lock = threading.Lock()
+        self._usage = {
+            "responses": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cached_tokens": 0,
+            "cache_write_tokens": 0,
+            "streams": 0,
+            "first_token_seconds": 0.0,
+        }
+        # Lista de modelos con caché TTL (ver _cached_models)
+        self._models_lock = threading.Lock()
+        self._models = None
+        self._models_expires = 0.0
+
+    @property
+    def cache_namespace(self):
+        """
+        Espacio de nombres de las claves de caché de este proveedor.
+        """
+        return type(self).__name__
+
+    def generate_text(self, prompt, model=None, max_tokens=150, temperature=0.7,
+                      use_cache=True, **kwargs):
         """
         Genera texto a partir de un prompt.
-        
+
+        Las respuestas se guardan en la caché de respuestas; una petición
+        idéntica (prompt, modelo, max_tokens, temperatura y demás parámetros)
+        se responde desde la caché sin llamar a la API. Si ya hay una petición
+        idéntica en curso en otro hilo, se espera a ella en lugar de repetirla.
+        Con el circuito del proveedor abierto falla al instante con
+        CircuitOpenError.
+
+        :param prompt: Prompt para generar texto.
+        :param model: Modelo a utilizar (por defecto el del proveedor).
+        :param max_tokens: Máximo de tokens a generar.
+        :param temperature: Temperatura de muestreo.
+        :param use_cache: Si es False se ignora la caché en esta llamada.
+        :param kwargs: Parámetros adicionales específicos del proveedor. Todos
+                       aceptan system: instrucciones estáticas que se envían
+                       como prefijo cacheable por la API.
+        :return: Texto generado.
+        """
+        model = model or self.default_model
+        cache, key = self._cache_lookup_key(prompt, model, max_tokens, temperature,
+                                            use_cache, kwargs)
+        if key is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
+        def call():
+            text = self._call_with_retry(prompt, model, max_tokens, temperature, kwargs)
+            if key is not None:
+                cache.set(key, text)
+            return text
+
+        return self.single_flight.do(self._flight_key(prompt, model, max_tokens, temperature,
+                                                      kwargs), call)
+
+    async def agenerate_text(self, prompt, model=None, max_tokens=150, temperature=0.7,
+                             use_cache=True, **kwargs):
+        """
+        Versión asíncrona de generate_text.
+
+        Comparte la caché de respuestas con la versión síncrona, de modo que
+        ambas API pueden mezclarse en el mismo proceso.
+
         :param prompt: Prompt para generar texto.
+        :param model: Modelo a utilizar (por defecto el del proveedor).
+        :param max_tokens: Máximo de tokens a generar.
+        :param temperature: Temperatura de muestreo.
+        :param use_cache: Si es False se ignora la caché en esta llamada.
+        :param kwargs: Parámetros adicionales específicos del proveedor.
+        :return: Texto generado.
+        """
+        model = model or self.default_model
+        cache, key = self._cache_lookup_key(prompt, model, max_tokens, temperature,
+                                            use_cache, kwargs)
+        if key is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
+        async def call():
+            text = await self._acall_with_retry(prompt, model, max_tokens, temperature, kwargs)
+            if key is not None:
+                cache.set(key, text)
+            return text
+
+        return await self.single_flight.ado(self._flight_key(prompt, model, max_tokens,
+                                                             temperature, kwargs), call)
+
+    def stream_text(self, prompt, model=None, max_tokens=150, temperature=0.7,
+                    use_cache=True, **kwargs):
+        """
+        Genera texto en streaming, devolviendo fragmentos a medida que llegan.
+
+        Un acierto de caché se devuelve como un único fragmento. La respuesta
+        completa se guarda en la caché solo si el stream termina correctamente.
+
+        :param prompt: Prompt para generar texto.
+        :param model: Modelo a utilizar (por defecto el del proveedor).
+        :param max_tokens: Máximo de tokens a generar.
+        :param temperature: Temperatura de muestreo.
+        :param use_cache: Si es False se ignora la caché en esta llamada.
+        :param kwargs: Parámetros adicionales específicos del proveedor.
+        :return: Generador de fragmentos de texto.
+        """
+        model = model or self.default_model
+        cache, key = self._cache_lookup_key(prompt, model, max_tokens, temperature,
+                                            use_cache, kwargs)
+        if key is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        partes = []
+        tokens = estimate_request_tokens(prompt, max_tokens)
+        attempt = 0
+        while True:
+            try:
+                with self.circuit_breaker.track() as call:
+                    self.rate_limiter.acquire(tokens)
+                    call.begin()
+                    for chunk in self._stream_text(prompt, model=model, max_tokens=max_tokens,
+                                                   temperature=temperature, **kwargs):
+                        if call.latency is None:
+                            call.first_chunk()
+                            self._record_first_token(call.latency)
+                        partes.append(chunk)
+                        yield chunk
+                break
+            except Exception as e:
+                # Solo se reintenta si todavía no se ha entregado ningún fragmento
+                delay = None if partes else self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+                self.rate_limiter.record_backoff(delay)
+                time.sleep(delay)
+                attempt += 1
+
+        if key is not None:
+            cache.set(key, "".join(partes).strip())
+
+    def _call_with_retry(self, prompt, model, max_tokens, temperature, params):
+        """
+        Llama a _generate_text respetando la cuota y reintentando errores transitorios.
+
+        Cada intento pasa por el cortacircuitos; si se abre entre reintentos,
+        CircuitOpenError no es reintentable y corta la espera.
+        """
+        tokens = estimate_request_tokens(prompt, max_tokens)
+        attempt = 0
+        while True:
+            try:
+                with self.circuit_breaker.track() as call:
+                    self.rate_limiter.acquire(tokens)
+                    call.begin()
+                    return self._generate_text(prompt, model=model, max_tokens=max_tokens,
+                                               temperature=temperature, **params)
+            except Exception as e:
+                delay = self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+                self.rate_limiter.record_backoff(delay)
+                time.sleep(delay)
+                attempt += 1
+
+    async def _acall_with_retry(self, prompt, model, max_tokens, temperature, params):
+        """
+        Versión asíncrona de _call_with_retry.
+        """
+        tokens = estimate_request_tokens(prompt, max_tokens)
+        attempt = 0
+        while True:
+            try:
+                with self.circuit_breaker.track() as call:
+                    await self.rate_limiter.aacquire(tokens)
+                    call.begin()
+                    return await self._agenerate_text(prompt, model=model, max_tokens=max_tokens,
+                                                      temperature=temperature, **params)
+            except Exception as e:
+                delay = self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+                self.rate_limiter.record_backoff(delay)
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def _retry_delay(self, attempt, error):
+        """
+        Espera antes de reintentar según la política de reintentos.
+
+        Un 429 limita solo a la clave que lo recibió (que queda aparcada en el
+        pool): si otra clave tiene cupo se reintenta con ella sin esperar.
+
+        :return: Segundos a esperar, o None si no se debe reintentar.
+        """
+        delay = self.retry_policy.next_delay(attempt, error)
+        if (delay and self.key_pool is not None and isinstance(error, ProviderHTTPError)
+                and error.status_code == 429 and self.key_pool.available()):
+            return 0.0
+        return delay
+
+    def _cache_lookup_key(self, prompt, model, max_tokens, temperature, use_cache, params):
+        """
+        Devuelve la caché a usar y la clave de la petición (o None, None).
+        """
+        cache = self.response_cache if use_cache else None
+        if cache is None:
+            return None, None
+        key = make_cache_key(self.cache_namespace, prompt, model, max_tokens,
+                             temperature, **params)
+        return cache, key
+
+    def _flight_key(self, prompt, model, max_tokens, temperature, params):
+        """
+        Clave de agrupación de peticiones concurrentes (prompt normalizado).
+        """
+        prompt = prompt.replace("\r\n", "\n").strip()
+        return make_cache_key(self.cache_namespace, prompt, model, max_tokens,
+                              temperature, **params)
+
+    def coalescing_stats(self):
+        """
+        Contadores de la agrupación de peticiones concurrentes.
+
+        :return: Diccionario con 'leaders' (llamadas reales), 'coalesced'
+                 (llamadas que reutilizaron una en curso) y 'errors'.
+        """
+        return dict(self.single_flight.stats)
+
+    def usage_stats(self):
+        """
+        Tokens consumidos según las respuestas de la API.
+
+        'cached_tokens' son los tokens de entrada leídos de la caché de prompts
+        (más baratos y rápidos) y 'cache_write_tokens' los escritos en ella.
+
+        :return: Diccionario con los contadores, 'cached_ratio' (fracción de la
+                 entrada servida desde caché) y 'avg_first_token_seconds'
+                 (latencia media hasta el primer fragmento en streaming).
+        """
+        with self._usage_lock:
+            stats = dict(self._usage)
+        stats["cached_ratio"] = (stats["cached_tokens"] / stats["input_tokens"]
+                                 if stats["input_tokens"] else 0.0)
+        stats["avg_first_token_seconds"] = (stats["first_token_seconds"] / stats["streams"]
+                                            if stats["streams"] else None)
+        return stats
+
+    def _record_usage(self, input_tokens=0, output_tokens=0, cached_tokens=0,
+                      cache_write_tokens=0):
+        """
+        Acumula el consumo de tokens de una respuesta.
+
+        :param input_tokens: Tokens de entrada totales (incluidos los de caché).
+        :param output_tokens: Tokens generados.
+        :param cached_tokens: Tokens de entrada leídos de la caché de prompts.
+        :param cache_write_tokens: Tokens de entrada escritos en la caché.
+        """
+        with self._usage_lock:
+            self._usage["responses"] += 1
+            self._usage["input_tokens"] += input_tokens or 0
+            self._usage["output_tokens"] += output_tokens or 0
+            self._usage["cached_tokens"] += cached_tokens or 0
+            self._usage["cache_write_tokens"] += cache_write_tokens or 0
+
+    def _record_first_token(self, seconds):
+        with self._usage_lock:
+            self._usage["streams"] += 1
+            self._usage["first_token_seconds"] += seconds
+
+    def circuit_stats(self):
+        """
+        Estado y métricas del cortacircuitos del proveedor.
+
+        :return: Diccionario de CircuitBreaker.stats().
+        """
+        return self.circuit_breaker.stats()
+
+    @abstractmethod
+    def _generate_text(self, prompt, model, max_tokens, temperature, **kwargs):
+        """
+        Realiza la llamada real al modelo. Lo implementa cada proveedor.
+
+        :param prompt: Prompt para generar texto.
+        :param model: Modelo a utilizar.
+        :param max_tokens: Máximo de tokens a generar.
+        :param temperature: Temperatura de muestreo.
         :param kwargs: Parámetros adicionales específicos del proveedor.
         :return: Texto generado.
         """
         pass
-    
+
+    async def _agenerate_text(self, prompt, model, max_tokens, temperature, **kwargs):
+        """
+        Llamada asíncrona al modelo.
+
+        La implementación por defecto ejecuta _generate_text en el pool de hilos
+        del loop; los proveedores con cliente asíncrono nativo la sobrescriben.
+        """
+        loop = asyncio.get_running_loop()
+        call = functools.partial(self._generate_text, prompt, model=model,
+                                 max_tokens=max_tokens, temperature=temperature, **kwargs)
+        return await loop.run_in_executor(None, call)
+
+    def _stream_text(self, prompt, model, max_tokens, temperature, **kwargs):
+        """
+        Llamada al modelo en modo streaming.
+
+        La implementación por defecto devuelve la respuesta completa como un
+        único fragmento; los proveedores con streaming nativo la sobrescriben.
+        """
+        yield self._generate_text(prompt, model=model, max_tokens=max_tokens,
+                                  temperature=temperature, **kwargs)
+
+    def warm_up(self):
+        """
+        Prepara el proveedor antes de la primera petición: importa el SDK,
+        abre la conexión del pool (DNS + TCP + TLS) y precarga la lista de
+        modelos. Se ejecuta en segundo plano (ver providers/warmup.py).
+
+        La implementación por defecto solo precarga los modelos.
+
+        :return: Diccionario con 'provider' y 'models' (número de modelos).
+        """
+        return {"provider": self.provider_name, "models": len(self.list_models())}
+
+    def _cached_models(self, fetch):
+        """
+        Devuelve la lista de modelos desde la caché o la obtiene con fetch().
+
+        La lista cambia muy rara vez, así que se guarda warmup.models_ttl_seconds
+        segundos (600 por defecto).
+
+        :param fetch: Función que consulta la lista a la API.
+        :return: Lista de modelos.
+        """
+        with self._models_lock:
+            if self._models is not None and time.monotonic() < self._models_expires:
+                return list(self._models)
+        models = fetch()
+        ttl = get_section("warmup").get("models_ttl_seconds", 600)
+        with self._models_lock:
+            self._models = list(models)
+            self._models_expires = time.monotonic() + ttl
+        return list(models)
+
     @abstractmethod
     def list_models(self):
         """
         Lista los modelos disponibles para este proveedor.
-        
+
         :return: Lista de modelos disponibles.
         """
         pass
-    
-    @abstractmethod
+
     def generar_tareas(self, objetivo, contexto):
         """
         Genera una lista de tareas basadas en un objetivo y un contexto.
-        
+
+        :param objetivo: Descripción del objetivo.
+        :param contexto: Información de contexto.
+        :return: Lista de tareas generadas.
+        """
+        # Reutilizar el plan de un objetivo parecido si lo hay
+        tareas = self._cached_plan(objetivo)
+        if tareas is not None:
+            return tareas
+
+        # Instrucciones estáticas como system (cacheable) y objetivo como mensaje
+        partes = self._crear_prompt_partes(objetivo, contexto)
+        try:
+            response = self.generate_text(partes["prompt"], system=partes["system"], max_tokens=300)
+            return self._remember_plan(objetivo, parse_plan(response))
+        except Exception as e:
+            raise RuntimeError(f"Error al generar tareas: {e}")
+
+    async def agenerar_tareas(self, objetivo, contexto):
+        """
+        Versión asíncrona de generar_tareas.
+
         :param objetivo: Descripción del objetivo.
         :param contexto: Información de contexto.
         :return: Lista de tareas generadas.
         """
-        pass
\ No newline at end of file
+        tareas = self._cached_plan(objetivo)
+        if tareas is not None:
+            return tareas
+        partes = self._crear_prompt_partes(objetivo, contexto)
+        try:
+            response = await self.agenerate_text(partes["prompt"], system=partes["system"],
+                                                 max_tokens=300)
+            return self._remember_plan(objetivo, parse_plan(response))
+        except Exception as e:
+            raise RuntimeError(f"Error al generar tareas: {e}")
+
+    def generar_tareas_stream(self, objetivo, contexto):
+        """
+        Genera las tareas en streaming: cada comando numerado se devuelve en
+        cuanto su línea está completa, sin esperar al resto de la respuesta.
+
+        :param objetivo: Descripción del objetivo.
+        :param contexto: Información de contexto.
+        :return: Generador de tareas.
+        """
+        tareas = self._cached_plan(objetivo)
+        if tareas is not None:
+            yield from tareas
+            return
+
+        partes = self._crear_prompt_partes(objetivo, contexto)
+        parser = IncrementalPlanParser()
+        tareas = []
+        try:
+            for chunk in self.stream_text(partes["prompt"], system=partes["system"],
+                                          max_tokens=300):
+                for tarea in parser.feed(chunk):
+                    tareas.append(tarea)
+                    yield tarea
+        except Exception as e:
+            raise RuntimeError(f"Error al generar tareas: {e}")
+
+        for tarea in parser.close():
+            tareas.append(tarea)
+            yield tarea
+        self._remember_plan(objetivo, tareas)
+
+    def _cached_plan(self, objetivo):
+        """
+        Busca en la caché de planes uno guardado para un objetivo parecido.
+
+        :param objetivo: Descripción del objetivo.
+        :return: Lista de tareas con los parámetros del objetivo, o None.
+        """
+        hit = self.plan_cache.lookup(objetivo)
+        return hit["plan"] if hit else None
+
+    def _remember_plan(self, objetivo, tareas):
+        """
+        Guarda el plan generado en la caché de planes.
+
+        :param objetivo: Descripción del objetivo.
+        :param tareas: Lista de tareas generadas.
+        :return: La misma lista de tareas.
+        """
+        self.plan_cache.store(objetivo, tareas)
+        return tareas
+
+    def _crear_prompt_partes(self, objetivo, contexto):
+        """
+        Crea el prompt para generar tareas dividido en prefijo estático
+        ('system', siempre el mismo y cacheable por la API) y sufijo dinámico
+        ('prompt'). Los proveedores pueden especializarlo.
+
+        :param objetivo: Descripción del objetivo.
+        :param contexto: Información de contexto.
+        :return: Diccionario con 'system' y 'prompt'.
+        """
+        return PromptTemplates.task_generation_parts(objetivo, self.pack_context(contexto, objetivo))
+
+    def _crear_prompt_especializado(self, objetivo, contexto):
+        """
+        Crea el prompt para generar tareas como un único texto.
+
+        :param objetivo: Descripción del objetivo.
+        :param contexto: Información de contexto.
+        :return: Prompt para el modelo.
+        """
+        partes = self._crear_prompt_partes(objetivo, contexto)
+        return f"{partes['system']}\n{partes['prompt']}\n"
+
+    def pack_context(self, contexto, objetivo="", model=None):
+        """
+        Reduce el contexto al presupuesto de tokens del proveedor y modelo
+        (ver providers/context_packer.py).
+
+        :param contexto: Información de contexto.
+        :param objetivo: Objetivo del usuario, para ordenar por relevancia.
+        :param model: Modelo a utilizar (por defecto el del proveedor).
+        :return: Texto del contexto empaquetado.
+        """
+        budget = get_context_budget(self.provider_name, model or self.default_model)
+        return ContextPacker(budget_tokens=budget).pack(contexto, objetivo)["text"]
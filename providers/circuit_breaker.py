@@ -0,0 +1,357 @@
+"""
+circuit_breaker.py
+
+Cortacircuitos por proveedor.
+
+Mientras un proveedor está degradado cada petición espera al timeout del
+cliente antes de fallar, acumulando hilos bloqueados. El cortacircuitos
+vigila la tasa de errores y de llamadas lentas en una ventana móvil y, si
+supera el umbral, se abre: las peticiones fallan al instante con
+CircuitOpenError. Pasado open_seconds deja pasar unas pocas sondas
+(semiabierto); si responden bien se cierra y si alguna falla vuelve a abrirse.
+
+Cada proveedor tiene un único cortacircuitos por proceso (ver
+get_circuit_breaker), igual que el limitador de cuota.
+"""
+import threading
+import time
+from collections import deque
+
+from .provider_config import get_provider_settings
+from .retry import ProviderHTTPError
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Petición rechazada sin llamar a la API porque el circuito está abierto.
+    """
+
+    def __init__(self, name, retry_after=None):
+        """
+        :param name: Nombre del proveedor.
+        :param retry_after: Segundos hasta la próxima sonda (None si no se sabe).
+        """
+        super().__init__(f"Circuito abierto para '{name}': el proveedor no está disponible")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Cortacircuitos con ventana móvil de resultados y sondas en semiabierto.
+    """
+
+    def __init__(self, name="provider", window_size=20, min_calls=5, failure_rate=0.5,
+                 slow_call_seconds=None, slow_call_rate=0.8, open_seconds=30.0,
+                 half_open_max_calls=1, enabled=True, clock=time.monotonic):
+        """
+        :param name: Nombre del proveedor (para los mensajes y las métricas).
+        :param window_size: Número de llamadas recientes que se tienen en cuenta.
+        :param min_calls: Llamadas mínimas en la ventana antes de poder abrir.
+        :param failure_rate: Fracción de errores (0-1) que abre el circuito.
+        :param slow_call_seconds: Latencia a partir de la cual una llamada es
+                                  lenta (None = no se vigila la latencia).
+        :param slow_call_rate: Fracción de llamadas lentas (0-1) que abre el circuito.
+        :param open_seconds: Tiempo que permanece abierto antes de sondear.
+        :param half_open_max_calls: Sondas simultáneas en semiabierto; si todas
+                                    responden bien el circuito se cierra.
+        :param enabled: Si es False nunca se abre (solo cuenta).
+        :param clock: Reloj monotónico (inyectable en las pruebas).
+        """
+        self.name = name
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.enabled = enabled
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._window = deque(maxlen=window_size)
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._transitions = deque(maxlen=50)
+        self._counters = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "slow_calls": 0,
+            "rejected": 0,
+            "probes": 0,
+            "opened": 0,
+            "half_opened": 0,
+            "closed": 0,
+        }
+
+    @classmethod
+    def from_settings(cls, provider_name):
+        """
+        Crea el cortacircuitos a partir de providers.<nombre>.circuit_breaker
+        en settings.yaml.
+
+        :param provider_name: Nombre del proveedor.
+        :return: Instancia de CircuitBreaker.
+        """
+        config = get_provider_settings(provider_name).get("circuit_breaker") or {}
+        return cls(
+            name=provider_name,
+            window_size=config.get("window_size", 20),
+            min_calls=config.get("min_calls", 5),
+            failure_rate=config.get("failure_rate", 0.5),
+            slow_call_seconds=config.get("slow_call_seconds"),
+            slow_call_rate=config.get("slow_call_rate", 0.8),
+            open_seconds=config.get("open_seconds", 30.0),
+            half_open_max_calls=config.get("half_open_max_calls", 1),
+            enabled=config.get("enabled", True),
+        )
+
+    @property
+    def state(self):
+        """
+        Estado actual: 'closed', 'open' o 'half_open'.
+        """
+        with self._lock:
+            self._refresh()
+            return self._state
+
+    def allows_request(self):
+        """
+        Indica, sin reservar nada, si una petición se enviaría ahora.
+
+        :return: True si el circuito está cerrado o admite otra sonda.
+        """
+        with self._lock:
+            self._refresh()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN:
+                return self._probes_in_flight < self.half_open_max_calls
+            return False
+
+    def before_call(self):
+        """
+        Reserva el paso de una petición o la rechaza.
+
+        :raises CircuitOpenError: Si el circuito está abierto o ya hay tantas
+                                  sondas en curso como se permiten.
+        """
+        with self._lock:
+            self._refresh()
+            if self._state == CLOSED:
+                return
+            if self._state == HALF_OPEN and self._probes_in_flight < self.half_open_max_calls:
+                self._probes_in_flight += 1
+                self._counters["probes"] += 1
+                return
+            self._counters["rejected"] += 1
+            retry_after = None
+            if self._state == OPEN:
+                retry_after = max(0.0, self._opened_at + self.open_seconds - self._clock())
+            raise CircuitOpenError(self.name, retry_after)
+
+    def record_success(self, latency=None):
+        """
+        Registra una llamada correcta.
+
+        :param latency: Segundos que tardó la llamada (o el primer fragmento).
+        """
+        slow = (self.slow_call_seconds is not None and latency is not None
+                and latency >= self.slow_call_seconds)
+        self._record(True, slow)
+
+    def record_failure(self, error=None, latency=None):
+        """
+        Registra una llamada fallida.
+
+        Los errores del cliente (4xx no reintentables, p. ej. una petición mal
+        formada) no indican que el proveedor esté degradado y no cuentan como fallo.
+
+        :param error: Excepción producida.
+        :param latency: Segundos que tardó la llamada.
+        """
+        if (isinstance(error, ProviderHTTPError) and error.status_code is not None
+                and not error.retryable):
+            self._record(True, False)
+            return
+        self._record(False, False)
+
+    def release(self):
+        """
+        Libera una petición que terminó sin resultado (p. ej. cancelada).
+        """
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes_in_flight:
+                self._probes_in_flight -= 1
+
+    def track(self):
+        """
+        Context manager que envuelve una llamada: reserva el paso al entrar y
+        registra el resultado y la latencia al salir.
+
+        :return: Objeto _CallTracker.
+        """
+        return _CallTracker(self)
+
+    def stats(self):
+        """
+        Devuelve el estado, las tasas de la ventana y los contadores.
+
+        :return: Diccionario con 'state', 'failure_rate', 'slow_call_rate',
+                 los contadores y las últimas transiciones.
+        """
+        with self._lock:
+            self._refresh()
+            stats = dict(self._counters)
+            total = len(self._window)
+            stats["state"] = self._state
+            stats["window_calls"] = total
+            stats["failure_rate"] = (sum(1 for ok, _ in self._window if not ok) / total) if total else 0.0
+            stats["slow_call_rate"] = (sum(1 for _, slow in self._window if slow) / total) if total else 0.0
+            stats["transitions"] = list(self._transitions)
+            return stats
+
+    def reset(self):
+        """
+        Cierra el circuito y vacía la ventana.
+        """
+        with self._lock:
+            self._window.clear()
+            self._transition(CLOSED)
+
+    # ------------------------------------------------------------------ #
+    # Utilidades internas (con el lock tomado)
+    # ------------------------------------------------------------------ #
+    def _record(self, ok, slow):
+        with self._lock:
+            self._counters["calls"] += 1
+            self._counters["successes" if ok else "failures"] += 1
+            if slow:
+                self._counters["slow_calls"] += 1
+
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if not ok or slow:
+                    self._trip()
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_max_calls:
+                        self._window.clear()
+                        self._transition(CLOSED)
+                return
+
+            self._window.append((ok, slow))
+            if self._state == CLOSED and self.enabled and self._should_trip():
+                self._trip()
+
+    def _should_trip(self):
+        total = len(self._window)
+        if total < self.min_calls:
+            return False
+        failures = sum(1 for ok, _ in self._window if not ok)
+        if failures / total >= self.failure_rate:
+            return True
+        if self.slow_call_seconds is not None:
+            slow = sum(1 for _, slow in self._window if slow)
+            return slow / total >= self.slow_call_rate
+        return False
+
+    def _trip(self):
+        self._opened_at = self._clock()
+        self._transition(OPEN)
+
+    def _refresh(self):
+        if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+
+    def _transition(self, state):
+        if state == self._state:
+            return
+        self._transitions.append((time.time(), self._state, state))
+        self._state = state
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._counters[{OPEN: "opened", HALF_OPEN: "half_opened", CLOSED: "closed"}[state]] += 1
+
+
+class _CallTracker:
+    """
+    Context manager devuelto por CircuitBreaker.track().
+    """
+
+    def __init__(self, breaker):
+        self.breaker = breaker
+        self.latency = None
+        self._start = None
+
+    def begin(self):
+        """
+        Marca el envío real de la petición, tras esperar a la cuota, para que
+        esa espera no cuente como latencia del proveedor.
+        """
+        self._start = time.monotonic()
+
+    def first_chunk(self):
+        """
+        Marca la llegada del primer fragmento de un stream: su latencia es la
+        que se compara con slow_call_seconds.
+        """
+        if self.latency is None:
+            self.latency = time.monotonic() - self._start
+
+    def __enter__(self):
+        self.breaker.before_call()
+        self._start = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        latency = self.latency if self.latency is not None else time.monotonic() - self._start
+        if exc_type is None:
+            self.breaker.record_success(latency)
+        elif issubclass(exc_type, Exception):
+            self.breaker.record_failure(exc, latency)
+        elif self.latency is not None:
+            # Stream abandonado por quien lo consume tras recibir texto
+            self.breaker.record_success(latency)
+        else:
+            # Cancelación (GeneratorExit, CancelledError...): sin resultado
+            self.breaker.release()
+        return False
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(provider_name):
+    """
+    Devuelve el cortacircuitos compartido de un proveedor, creándolo si no existe.
+
+    :param provider_name: Nombre del proveedor ('openai', 'claude', ...).
+    :return: Instancia de CircuitBreaker.
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(provider_name)
+        if breaker is None:
+            breaker = CircuitBreaker.from_settings(provider_name)
+            _breakers[provider_name] = breaker
+        return breaker
+
+
+def circuit_breaker_stats():
+    """
+    Métricas de todos los cortacircuitos compartidos del proceso.
+
+    :return: Diccionario nombre del proveedor -> stats().
+    """
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {name: breaker.stats() for name, breaker in breakers.items()}
@@ -1,93 +1,247 @@
 # providers/claude_provider.py
-import os
+import json
 import requests
+import requests.adapters
+from .async_utils import LoopLocal
 from .base_provider import ProviderBase
-from .prompt_templates import PromptTemplates
+from .key_pool import KeyPool, configured_api_keys
+from .provider_config import load_environment
+from .retry import ProviderHTTPError, parse_retry_after
 
 class ClaudeProvider(ProviderBase):
-    def __init__(self, api_key=None, base_url="https://api.anthropic.com/v1"):
-        self.api_key = api_key or os.getenv("CLAUDE_API_KEY")
-        if not self.api_key:
+    provider_name = "claude"
+
+    def __init__(self, api_key=None, base_url="https://api.anthropic.com/v1", cache=None,
+                 max_connections=100, pool_size=10, connect_timeout=5.0, read_timeout=60.0,
+                 rate_limiter=None, retry_policy=None, plan_cache=None,
+                 circuit_breaker=None, api_keys=None):
+        super().__init__(cache=cache, rate_limiter=rate_limiter, retry_policy=retry_policy,
+                         plan_cache=plan_cache, circuit_breaker=circuit_breaker)
+        load_environment()
+        # Una o varias claves: con varias, cada petición usa la que elija el pool
+        keys = list(api_keys or []) or ([api_key] if api_key else configured_api_keys(self.provider_name))
+        if not keys:
             raise ValueError("API key must be provided")
+        self.key_pool = KeyPool.from_settings(self.provider_name, keys)
+        self.api_key = self.key_pool.keys[0]
         self.base_url = base_url
         self.default_model = "claude-3-haiku-20240307"
+        self.timeout = (connect_timeout, read_timeout)
+
+        # Cabeceras fijas: se construyen una sola vez por instancia
+        self.headers = {
+            "x-api-key": self.api_key,
+            "anthropic-version": "2023-06-01",
+            "content-type": "application/json"
+        }
+
+        # Sesión con keep-alive: las llamadas consecutivas reutilizan conexiones
+        self.session = self._create_session(pool_size)
 
-    def generate_text(self, prompt, model=None, max_tokens=150, temperature=0.7, **kwargs):
+        # Cliente HTTP asíncrono con pool de conexiones (uno por event loop)
+        factory = self._create_async_client_factory(max_connections, self.timeout)
+        self._async_clients = LoopLocal(factory) if factory else None
+
+    def _generate_text(self, prompt, model, max_tokens, temperature, json_mode=False,
+                       system=None, **kwargs):
         try:
-            model = model or self.default_model
-            headers = {
-                "x-api-key": self.api_key,
-                "anthropic-version": "2023-06-01",
-                "content-type": "application/json"
-            }
-            
-            data = {
-                "model": model,
-                "messages": [{"role": "user", "content": prompt}],
-                "max_tokens": max_tokens,
-                "temperature": temperature
-            }
-            
-            response = requests.post(f"{self.base_url}/messages", headers=headers, json=data)
-            response.raise_for_status()
+            # Las cabeceras de la respuesta actualizan la cuota restante de la clave
+            with self.key_pool.acquire() as lease:
+                response = self.session.post(f"{self.base_url}/messages",
+                                             headers={"x-api-key": lease.key},
+                                             json=self._payload(prompt, model, max_tokens,
+                                                                temperature, json_mode, system),
+                                             timeout=self.timeout)
+                lease.headers = response.headers
+                self._raise_for_status(response)
             
-            return response.json()["content"][0]["text"]
+            data = response.json()
+            self._record_response_usage(data.get("usage"))
+            return self._prefill(json_mode) + data["content"][0]["text"]
+        except ProviderHTTPError:
+            raise
+        except requests.exceptions.RequestException as e:
+            raise ProviderHTTPError(f"Failed to generate text: {e}")
+        except Exception as e:
+            raise RuntimeError(f"Failed to generate text: {e}")
+
+    async def _agenerate_text(self, prompt, model, max_tokens, temperature, json_mode=False,
+                              system=None, **kwargs):
+        if self._async_clients is None:
+            # Sin httpx: se delega en la implementación síncrona en un hilo
+            return await super()._agenerate_text(prompt, model, max_tokens, temperature,
+                                                 json_mode=json_mode, system=system, **kwargs)
+
+        import httpx
+        try:
+            client = self._async_clients.get()
+            with await self.key_pool.aacquire() as lease:
+                response = await client.post(f"{self.base_url}/messages",
+                                             headers=dict(self.headers, **{"x-api-key": lease.key}),
+                                             json=self._payload(prompt, model, max_tokens,
+                                                                temperature, json_mode, system))
+                lease.headers = response.headers
+                self._raise_for_status(response)
+
+            data = response.json()
+            self._record_response_usage(data.get("usage"))
+            return self._prefill(json_mode) + data["content"][0]["text"]
+        except ProviderHTTPError:
+            raise
+        except httpx.TransportError as e:
+            raise ProviderHTTPError(f"Failed to generate text: {e}")
         except Exception as e:
             raise RuntimeError(f"Failed to generate text: {e}")
 
+    def _stream_text(self, prompt, model, max_tokens, temperature, json_mode=False,
+                     system=None, **kwargs):
+        try:
+            payload = self._payload(prompt, model, max_tokens, temperature, json_mode, system)
+            payload["stream"] = True
+            # La clave queda ocupada mientras dura el stream
+            with self.key_pool.acquire() as lease, \
+                    self.session.post(f"{self.base_url}/messages", json=payload,
+                                      headers={"x-api-key": lease.key},
+                                      timeout=self.timeout, stream=True) as response:
+                lease.headers = response.headers
+                self._raise_for_status(response)
+                if json_mode:
+                    yield self._prefill(json_mode)
+                usage = {}
+                for text in self._iter_sse_text(response.iter_lines(decode_unicode=True), usage):
+                    yield text
+                self._record_response_usage(usage)
+        except ProviderHTTPError:
+            raise
+        except requests.exceptions.RequestException as e:
+            raise ProviderHTTPError(f"Failed to generate text: {e}")
+        except Exception as e:
+            raise RuntimeError(f"Failed to generate text: {e}")
+
+    @staticmethod
+    def _raise_for_status(response):
+        """
+        Lanza ProviderHTTPError si la respuesta HTTP indica un error.
+
+        :param response: Respuesta de requests o httpx.
+        """
+        if response.status_code < 400:
+            return
+        retry_after = parse_retry_after(response.headers.get("retry-after"))
+        raise ProviderHTTPError(
+            f"Failed to generate text: HTTP {response.status_code}: {response.text[:200]}",
+            status_code=response.status_code,
+            retry_after=retry_after,
+            headers=response.headers,
+        )
+
+    @staticmethod
+    def _iter_sse_text(lines, usage=None):
+        """
+        Extrae los fragmentos de texto de un stream SSE de la API de mensajes.
+
+        :param lines: Iterable de líneas del stream.
+        :param usage: Diccionario (opcional) que se rellena con el consumo
+                      informado en message_start y message_delta.
+        :return: Generador de fragmentos de texto.
+        """
+        for line in lines:
+            if not line or not line.startswith("data:"):
+                continue
+            event = json.loads(line[len("data:"):].strip())
+            if usage is not None and event.get("type") in ("message_start", "message_delta"):
+                usage.update(event.get("usage") or event.get("message", {}).get("usage") or {})
+            if event.get("type") == "content_block_delta":
+                delta = event.get("delta", {})
+                if delta.get("type") == "text_delta":
+                    yield delta.get("text", "")
+            elif event.get("type") == "error":
+                raise RuntimeError(event.get("error", {}).get("message", "stream error"))
+
+    def _payload(self, prompt, model, max_tokens, temperature, json_mode=False, system=None):
+        messages = [{"role": "user", "content": prompt}]
+        if json_mode:
+            # Claude no tiene modo JSON: se rellena el inicio de la respuesta
+            # para que continúe directamente el array
+            messages.append({"role": "assistant", "content": self._prefill(json_mode)})
+        payload = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        if system:
+            # Prefijo estático marcado como cacheable: las peticiones siguientes
+            # leen de la caché en lugar de procesarlo de nuevo
+            payload["system"] = [{"type": "text", "text": system,
+                                  "cache_control": {"type": "ephemeral"}}]
+        return payload
+
+    def _record_response_usage(self, usage):
+        """
+        Acumula el consumo de una respuesta. input_tokens de Anthropic no
+        incluye los tokens leídos de la caché ni los escritos en ella.
+        """
+        if not usage:
+            return
+        cached = usage.get("cache_read_input_tokens") or 0
+        written = usage.get("cache_creation_input_tokens") or 0
+        self._record_usage(input_tokens=(usage.get("input_tokens") or 0) + cached + written,
+                           output_tokens=usage.get("output_tokens") or 0,
+                           cached_tokens=cached, cache_write_tokens=written)
+
+    @staticmethod
+    def _prefill(json_mode):
+        return "[" if json_mode else ""
+
+    def _create_session(self, pool_size):
+        """
+        Crea la sesión HTTP del proveedor con un pool de conexiones persistentes.
+
+        :param pool_size: Número máximo de conexiones mantenidas por host.
+        :return: requests.Session configurada.
+        """
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(self.headers)
+        return session
+
+    def close(self):
+        """
+        Cierra la sesión HTTP y libera las conexiones del pool.
+        """
+        self.session.close()
+
+    @staticmethod
+    def _create_async_client_factory(max_connections, timeout):
+        """
+        Devuelve una fábrica de clientes httpx.AsyncClient con pool de conexiones,
+        o None si httpx no está instalado.
+        """
+        try:
+            import httpx
+        except ImportError:
+            return None
+
+        connect_timeout, read_timeout = timeout
+        limits = httpx.Limits(max_connections=max_connections,
+                              max_keepalive_connections=max_connections)
+        timeouts = httpx.Timeout(read_timeout, connect=connect_timeout)
+        return lambda: httpx.AsyncClient(limits=limits, timeout=timeouts)
+
     def list_models(self):
         # Claude API might not support listing models directly
         # Return hardcoded list of known models
         return ["claude-3-opus-20240229", "claude-3-sonnet-20240229", "claude-3-haiku-20240307"]
 
-    def generar_tareas(self, objetivo, contexto):
+    def warm_up(self):
         """
-        Genera una lista de tareas basadas en un objetivo y un contexto utilizando Claude API.
-
-        :param objetivo: Descripción del objetivo.
-        :param contexto: Información de contexto.
-        :return: Lista de tareas generadas.
+        Abre la conexión del pool de la sesión (DNS + TCP + TLS) con una
+        petición ligera; el estado de la respuesta es indiferente.
         """
-        # Usar el mismo método que en OpenAIProvider para crear prompt especializado
-        prompt = self._crear_prompt_especializado(objetivo, contexto)
-        
-        try:
-            response = self.generate_text(prompt, max_tokens=300)
-            
-            # Procesar la respuesta (mismo código que en OpenAIProvider)
-            comandos = []
-            for linea in response.strip().split('\n'):
-                if '.' in linea[:3]:
-                    comando = linea.split('.', 1)[1].strip()
-                    comandos.append({"tarea": f"Ejecutar: {comando}", "comando": comando})
-            
-            if not comandos:
-                tareas = [{"tarea": tarea.strip()} for tarea in response.split("\n") if tarea.strip()]
-                return tareas
-                
-            return comandos
-        except Exception as e:
-            raise RuntimeError(f"Error al generar tareas: {e}")
-    
-    # Reutilizamos la lógica de crear prompts especializados
-    def _crear_prompt_especializado(self, objetivo, contexto):
-        # La misma implementación que en OpenAIProvider
-        # (Podríamos extraer esto a una clase auxiliar para evitar duplicación)
-        objetivo_lower = objetivo.lower()
-        
-        if any(kw in objetivo_lower for kw in ['info sistema', 'información sistema']):
-            return (
-                "Actúa como un experto en sistemas Linux. "
-                "Necesito comandos para mostrar información completa del sistema. "
-                "Genera comandos bash que muestren: información del host, CPU, memoria RAM, "
-                "uso de disco y versión del sistema operativo. "
-                "Usa comandos como hostnamectl, lscpu, free, df, etc. "
-                "Preferiblemente en un solo comando con && para encadenarlos. "
-                "Lista solo los comandos sin explicaciones adicionales:\n\n"
-                "1. [comando]\n"
-            )
-        
-        # ...resto de la lógica igual que en OpenAIProvider...
-        
-        # Prompt por defecto
-        return PromptTemplates.task_generation_prompt(objetivo, contexto)
\ No newline at end of file
+        # Sin stream el cuerpo se lee entero y la conexión vuelve al pool
+        response = self.session.get(f"{self.base_url}/models", timeout=self.timeout)
+        return {"provider": self.provider_name, "models": len(self.list_models()),
+                "status": response.status_code}
@@ -0,0 +1,224 @@
+# providers/context_packer.py
+"""
+Empaquetado del contexto de los prompts dentro de un presupuesto de tokens.
+
+El contexto (p. ej. el listado del directorio actual) puede ser enorme; aquí se
+estima su tamaño sin llamar a ninguna API, se deduplican y ordenan sus
+elementos por relevancia respecto al objetivo y se recorta o resume lo que no
+cabe en el presupuesto configurado para el proveedor y el modelo.
+"""
+import os
+import re
+import threading
+from collections import Counter
+
+from .provider_config import get_provider_settings, get_section
+
+DEFAULT_BUDGET_TOKENS = 600
+DEFAULT_MAX_ITEM_TOKENS = 32
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_WORD_RE = re.compile(r"\w{3,}")
+
+
+def estimate_tokens(text):
+    """
+    Estimación barata y sin red del número de tokens de un texto.
+
+    Cada palabra cuenta como un token más uno por cada 4 caracteres adicionales,
+    y cada signo de puntuación como un token; se aproxima bien a los
+    tokenizadores BPE para texto y nombres de archivo.
+
+    :param text: Texto a medir.
+    :return: Número estimado de tokens.
+    """
+    if not text:
+        return 0
+    return sum(1 + (len(piece) - 1) // 4 for piece in _TOKEN_RE.findall(str(text)))
+
+
+def get_context_budget(provider_name=None, model=None):
+    """
+    Devuelve el presupuesto de tokens de contexto para un proveedor y modelo.
+
+    Se busca en providers.<nombre>.context.models.<modelo>, después en
+    providers.<nombre>.context.budget_tokens y por último en la sección
+    context de settings.yaml.
+
+    :param provider_name: Nombre del proveedor ('openai', 'claude', ...).
+    :param model: Modelo concreto.
+    :return: Presupuesto en tokens.
+    """
+    budget = get_section("context").get("budget_tokens", DEFAULT_BUDGET_TOKENS)
+    if provider_name:
+        config = get_provider_settings(provider_name).get("context") or {}
+        budget = config.get("budget_tokens", budget)
+        if model:
+            budget = (config.get("models") or {}).get(model, budget)
+    return budget
+
+
+class ContextPacker:
+    """
+    Reduce un contexto a un texto que cabe en un presupuesto de tokens.
+    """
+
+    def __init__(self, budget_tokens=None, max_item_tokens=None):
+        """
+        :param budget_tokens: Tokens máximos del contexto empaquetado.
+        :param max_item_tokens: Tokens máximos de cada elemento de una lista.
+        """
+        settings = get_section("context")
+        self.budget_tokens = budget_tokens if budget_tokens is not None else \
+            settings.get("budget_tokens", DEFAULT_BUDGET_TOKENS)
+        self.max_item_tokens = max_item_tokens if max_item_tokens is not None else \
+            settings.get("max_item_tokens", DEFAULT_MAX_ITEM_TOKENS)
+
+    def pack(self, contexto, objetivo=""):
+        """
+        Empaqueta el contexto.
+
+        :param contexto: Diccionario {sección: valor}, lista o texto.
+        :param objetivo: Objetivo del usuario, usado para ordenar por relevancia.
+        :return: Diccionario con 'text', 'tokens', 'original_tokens',
+                 'tokens_saved', 'items_total' e 'items_included'.
+        """
+        if contexto is None or contexto == "" or contexto == {}:
+            return self._result("", 0, 0, 0)
+        if not isinstance(contexto, dict):
+            contexto = {"contexto": contexto}
+
+        terms = {t.lower() for t in _WORD_RE.findall(objetivo or "")}
+        remaining = self.budget_tokens
+        original_tokens = 0
+        items_total = items_included = 0
+        secciones = []
+
+        for key, value in contexto.items():
+            header = f"{key}:"
+            remaining -= estimate_tokens(header)
+            if isinstance(value, (list, tuple, set, frozenset)):
+                items = _dedupe(str(v) for v in value)
+                items_total += len(items)
+                original_tokens += estimate_tokens(header) + sum(estimate_tokens(i) + 1 for i in items)
+                body, used, included = self._pack_items(items, terms, remaining)
+                items_included += included
+            else:
+                text = str(value)
+                items_total += 1
+                original_tokens += estimate_tokens(header) + estimate_tokens(text)
+                body, used = _truncate(text, max(remaining, 0))
+                items_included += 1 if body else 0
+            remaining -= used
+            secciones.append(f"{header} {body}" if body else header)
+            if remaining <= 0:
+                break
+
+        text = "\n".join(secciones)
+        return self._result(text, original_tokens, items_total, items_included)
+
+    def _pack_items(self, items, terms, budget):
+        ranked = sorted(enumerate(items), key=lambda pair: (-_relevance(pair[1], terms),
+                                                            pair[1].startswith("."), pair[0]))
+        included = []
+        used = 0
+        # Se reserva sitio para el resumen de lo que no quepa
+        reserve = 40 if len(items) > 1 else 0
+        for position, (_, item) in enumerate(ranked):
+            item, cost = _truncate(item, self.max_item_tokens)
+            cost += 1  # separador
+            if used + cost > budget - (reserve if position < len(ranked) - 1 else 0):
+                break
+            included.append(item)
+            used += cost
+
+        omitted = [item for _, item in ranked[len(included):]]
+        body = ", ".join(included)
+        if omitted:
+            summary = _summarize(omitted)
+            body = f"{body}, {summary}" if body else summary
+            used += estimate_tokens(summary)
+        return body, used, len(included)
+
+    def _result(self, text, original_tokens, items_total, items_included):
+        tokens = estimate_tokens(text)
+        original_tokens = max(original_tokens, tokens)
+        result = {
+            "text": text,
+            "tokens": tokens,
+            "original_tokens": original_tokens,
+            "tokens_saved": original_tokens - tokens,
+            "items_total": items_total,
+            "items_included": items_included,
+        }
+        _record(result)
+        return result
+
+
+def _dedupe(items):
+    seen = set()
+    unique = []
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            unique.append(item)
+    return unique
+
+
+def _relevance(item, terms):
+    if not terms:
+        return 0
+    lower = item.lower()
+    return sum(1 for term in terms if term in lower)
+
+
+def _truncate(text, max_tokens):
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text, tokens
+    if max_tokens <= 1:
+        return "", 0
+    # Recorte proporcional (la estimación es aproximada) con marca final
+    cut = max(1, len(text) * (max_tokens - 1) // tokens)
+    text = text[:cut].rstrip() + "…"
+    return text, estimate_tokens(text)
+
+
+def _summarize(items):
+    extensions = Counter(os.path.splitext(item)[1] or "(sin ext.)" for item in items)
+    detalle = ", ".join(f"{ext}: {n}" for ext, n in extensions.most_common(5))
+    return f"… y {len(items)} más ({detalle})"
+
+
+# ---------------------------------------------------------------------- #
+# Métricas globales
+# ---------------------------------------------------------------------- #
+_stats_lock = threading.Lock()
+_stats = {"packs": 0, "original_tokens": 0, "packed_tokens": 0, "tokens_saved": 0}
+
+
+def _record(result):
+    with _stats_lock:
+        _stats["packs"] += 1
+        _stats["original_tokens"] += result["original_tokens"]
+        _stats["packed_tokens"] += result["tokens"]
+        _stats["tokens_saved"] += result["tokens_saved"]
+
+
+def packing_stats():
+    """
+    Devuelve las métricas acumuladas del proceso.
+
+    :return: Diccionario con 'packs', 'original_tokens', 'packed_tokens' y 'tokens_saved'.
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_packing_stats():
+    """
+    Pone a cero las métricas acumuladas.
+    """
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0
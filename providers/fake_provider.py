@@ -1,5 +1,17 @@
+import asyncio
+import hashlib
 import random
+import re
 import string
+import threading
+import time
+
+from .base_provider import ProviderBase
+from .circuit_breaker import CircuitBreaker
+from .plan_cache import PlanCache
+from .rate_limiter import RateLimiter
+from .response_cache import ResponseCache
+from .retry import ProviderHTTPError, RetryPolicy
 
 class FakeProvider:
     @staticmethod
@@ -34,4 +46,163 @@ class FakeProvider:
         """Generate a random company name."""
         adjectives = ['Global', 'Dynamic', 'Innovative', 'Creative', 'Efficient']
         nouns = ['Solutions', 'Systems', 'Concepts', 'Designs', 'Technologies']
-        return f"{random.choice(adjectives)} {random.choice(nouns)}"
\ No newline at end of file
+        return f"{random.choice(adjectives)} {random.choice(nouns)}"
+
+class FakeLLMProvider(ProviderBase):
+    """
+    Proveedor de IA simulado y determinista para pruebas de carga y CI.
+
+    Responde con planes predefinidos (guion o patrones) sin llamar a ninguna API,
+    con latencia configurable, inyección de errores y streaming por tokens.
+    """
+
+    provider_name = "fake"
+    default_model = "fake-llm"
+
+    # Planes por defecto para las intenciones más habituales
+    DEFAULT_PATTERNS = [
+        (r"info(rmación)? (del )?sistema", "1. hostnamectl && lscpu && free -h && df -h"),
+        (r"archivos ocultos", "1. ls -la | grep '^\\.'"),
+        (r"mont(ar|aje)|partici[oó]n|disco", "1. lsblk\n2. mount | column -t"),
+        (r"memoria", "1. free -h"),
+    ]
+
+    def __init__(self, script=None, patterns=None, latency=0.0, error_rate=0.0,
+                 error_status=429, retry_after=None, failures=None, token_delay=0.0, seed=0,
+                 models=None, cache=None, rate_limiter=None, retry_policy=None, plan_cache=None,
+                 circuit_breaker=None):
+        """
+        Inicializa el proveedor simulado.
+
+        :param script: Lista de respuestas que se devuelven en orden (cíclico).
+                       Tiene prioridad sobre los patrones.
+        :param patterns: Lista de (regex, respuesta) evaluadas sobre el prompt.
+                         Por defecto DEFAULT_PATTERNS.
+        :param latency: Latencia por petición: número fijo de segundos o dict con
+                        'distribution' ('constant', 'uniform', 'normal',
+                        'lognormal', 'exponential') y sus parámetros.
+        :param error_rate: Probabilidad (0-1) de que una petición falle.
+        :param error_status: Código HTTP de los errores inyectados.
+        :param retry_after: Valor Retry-After de los errores inyectados.
+        :param failures: Lista de excepciones que se lanzan, en orden, en las
+                         primeras llamadas (antes de aplicar error_rate).
+        :param token_delay: Espera entre tokens en modo streaming.
+        :param seed: Semilla para que latencias y errores sean reproducibles.
+        :param models: Lista de modelos que devuelve list_models.
+        :param cache: Caché de respuestas (por defecto desactivada).
+        :param rate_limiter: Limitador (por defecto sin límites).
+        :param retry_policy: Política de reintentos (por defecto sin reintentos).
+        :param plan_cache: Caché de planes (por defecto desactivada).
+        :param circuit_breaker: Cortacircuitos (por defecto uno propio que
+                                solo cuenta, sin llegar a abrirse).
+        """
+        super().__init__(cache=cache or ResponseCache(path=None, enabled=False),
+                         rate_limiter=rate_limiter or RateLimiter(),
+                         retry_policy=retry_policy or RetryPolicy(max_retries=0),
+                         plan_cache=plan_cache if plan_cache is not None else PlanCache(enabled=False),
+                         circuit_breaker=circuit_breaker or CircuitBreaker("fake", enabled=False))
+        self.script = list(script) if script else None
+        self.patterns = [(re.compile(p, re.IGNORECASE), r)
+                         for p, r in (patterns if patterns is not None else self.DEFAULT_PATTERNS)]
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.failures = list(failures or [])
+        self.token_delay = token_delay
+        self.models = models or [self.default_model]
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._script_position = 0
+        self.calls = 0
+        self.errors = 0
+        self.cancelled = 0
+
+    def _generate_text(self, prompt, model, max_tokens, temperature, **kwargs):
+        delay, error, response = self._plan_call(prompt)
+        time.sleep(delay)
+        if error is not None:
+            raise error
+        return response
+
+    async def _agenerate_text(self, prompt, model, max_tokens, temperature, **kwargs):
+        delay, error, response = self._plan_call(prompt)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            # Petición perdedora de un hedging o abandonada por el llamante
+            with self._lock:
+                self.cancelled += 1
+            raise
+        if error is not None:
+            raise error
+        return response
+
+    def _stream_text(self, prompt, model, max_tokens, temperature, **kwargs):
+        # La latencia simula el tiempo hasta el primer token
+        delay, error, response = self._plan_call(prompt)
+        time.sleep(delay)
+        if error is not None:
+            raise error
+        for token in re.findall(r"\S+\s*|\s+", response):
+            yield token
+            if self.token_delay:
+                time.sleep(self.token_delay)
+
+    def list_models(self):
+        return list(self.models)
+
+    def _plan_call(self, prompt):
+        """
+        Decide de forma reproducible la latencia, el error y la respuesta de una llamada.
+        """
+        with self._lock:
+            self.calls += 1
+            delay = self._sample_latency()
+            error = None
+            if self.failures:
+                self.errors += 1
+                error = self.failures.pop(0)
+            elif self.error_rate and self._random.random() < self.error_rate:
+                self.errors += 1
+                error = ProviderHTTPError(
+                    f"Failed to generate text: HTTP {self.error_status} (simulado)",
+                    status_code=self.error_status, retry_after=self.retry_after)
+            response = self._response_for(prompt)
+        return delay, error, response
+
+    def _response_for(self, prompt):
+        if self.script:
+            response = self.script[self._script_position % len(self.script)]
+            self._script_position += 1
+            return response
+
+        for pattern, response in self.patterns:
+            if pattern.search(prompt):
+                return response
+
+        # Respuesta determinista derivada del prompt
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        return f"1. echo 'plan {digest}'"
+
+    def _sample_latency(self):
+        spec = self.latency
+        if not isinstance(spec, dict):
+            return float(spec or 0.0)
+
+        distribution = spec.get("distribution", "constant")
+        rnd = self._random
+        if distribution == "constant":
+            value = spec.get("value", 0.0)
+        elif distribution == "uniform":
+            value = rnd.uniform(spec.get("low", 0.0), spec.get("high", 0.0))
+        elif distribution == "normal":
+            value = rnd.gauss(spec.get("mean", 0.0), spec.get("stddev", 0.0))
+        elif distribution == "lognormal":
+            value = rnd.lognormvariate(spec.get("mu", 0.0), spec.get("sigma", 0.0)) * spec.get("scale", 1.0)
+        elif distribution == "exponential":
+            value = rnd.expovariate(1.0 / spec.get("mean", 1.0))
+        else:
+            raise ValueError(f"Distribución de latencia desconocida: {distribution}")
+        return max(0.0, value)
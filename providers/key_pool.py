@@ -0,0 +1,352 @@
+"""
+key_pool.py
+
+Pool de claves de API de un proveedor.
+
+La cuota de las API es por clave: con una sola clave el rendimiento total
+queda limitado por su límite de peticiones y tokens por minuto. El pool
+reparte las peticiones entre varias claves (la menos cargada o por turnos),
+sigue la cuota restante de cada una con las cabeceras de las respuestas y
+aparca durante un tiempo la clave que recibe un 429 o agota su cuota.
+
+Las claves se configuran en la variable de entorno <PROVEEDOR>_API_KEYS
+(separadas por comas) o en providers.<nombre>.api_keys de settings.yaml.
+"""
+import asyncio
+import email.utils
+import itertools
+import os
+import re
+import threading
+import time
+
+from .provider_config import get_provider_settings
+from .retry import ProviderHTTPError
+
+STRATEGIES = ("least_loaded", "round_robin")
+
+# Variable de entorno de la clave de cada proveedor
+API_KEY_ENV = {
+    "openai": "OPENAI_API_KEY",
+    "claude": "CLAUDE_API_KEY",
+}
+
+# Cabeceras de cuota restante y de reinicio (OpenAI y Anthropic)
+_REMAINING_REQUESTS = ("x-ratelimit-remaining-requests", "anthropic-ratelimit-requests-remaining")
+_REMAINING_TOKENS = ("x-ratelimit-remaining-tokens", "anthropic-ratelimit-tokens-remaining")
+_RESET_REQUESTS = ("x-ratelimit-reset-requests", "anthropic-ratelimit-requests-reset")
+_RESET_TOKENS = ("x-ratelimit-reset-tokens", "anthropic-ratelimit-tokens-reset")
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def configured_api_keys(provider_name):
+    """
+    Devuelve las claves configuradas para un proveedor.
+
+    Se usa, por orden, la variable <VARIABLE>S (p. ej. OPENAI_API_KEYS, varias
+    claves separadas por comas), providers.<nombre>.api_keys en settings.yaml
+    y por último la variable con una sola clave (p. ej. OPENAI_API_KEY).
+
+    :param provider_name: Nombre del proveedor ('openai', 'claude', ...).
+    :return: Lista de claves sin duplicados (posiblemente vacía).
+    """
+    env_var = API_KEY_ENV.get(provider_name)
+    if env_var is None:
+        return []
+    keys = [k.strip() for k in (os.getenv(env_var + "S") or "").split(",")]
+    keys += list(get_provider_settings(provider_name).get("api_keys") or [])
+    if not any(keys):
+        keys = [os.getenv(env_var)]
+    return list(dict.fromkeys(k for k in keys if k))
+
+
+def parse_reset(value):
+    """
+    Interpreta una cabecera de reinicio de cuota.
+
+    Admite duraciones de OpenAI ('1s', '6m0s', '20ms'), segundos y fechas
+    RFC 3339 de Anthropic ('2024-05-01T12:00:30Z').
+
+    :param value: Valor de la cabecera.
+    :return: Segundos hasta el reinicio, o None si no se reconoce.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    parts = _DURATION_RE.findall(value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        from datetime import datetime
+        fecha = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            fecha = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    return max(0.0, fecha.timestamp() - time.time())
+
+
+def mask_key(key):
+    """
+    Versión abreviada de una clave para métricas y logs.
+    """
+    return f"{key[:3]}…{key[-4:]}" if len(key) > 8 else "…"
+
+
+def _header(headers, names):
+    if headers is None:
+        return None
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            return value
+    return None
+
+
+class _KeyState:
+    __slots__ = ("key", "in_flight", "remaining_requests", "remaining_tokens",
+                 "parked_until", "requests", "throttled")
+
+    def __init__(self, key):
+        self.key = key
+        self.in_flight = 0
+        self.remaining_requests = None
+        self.remaining_tokens = None
+        self.parked_until = 0.0
+        self.requests = 0
+        self.throttled = 0
+
+
+class KeyPool:
+    """
+    Reparte las peticiones entre varias claves de API de un proveedor.
+    """
+
+    def __init__(self, keys, strategy="least_loaded", park_seconds=1.0,
+                 invalid_park_seconds=300.0):
+        """
+        :param keys: Claves de API (al menos una).
+        :param strategy: 'least_loaded' (menos peticiones en curso y más cuota
+                         restante) o 'round_robin' (por turnos).
+        :param park_seconds: Tiempo que se aparca una clave tras un 429 sin
+                             Retry-After ni cabecera de reinicio.
+        :param invalid_park_seconds: Tiempo que se aparca una clave rechazada
+                                     (401/403).
+        """
+        keys = list(dict.fromkeys(k for k in keys if k))
+        if not keys:
+            raise ValueError("Se necesita al menos una clave de API")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Estrategia desconocida: {strategy}")
+        self.strategy = strategy
+        self.park_seconds = park_seconds
+        self.invalid_park_seconds = invalid_park_seconds
+        self._states = [_KeyState(k) for k in keys]
+        self._turns = itertools.cycle(range(len(keys)))
+        self._lock = threading.Lock()
+        self._counters = {"leases": 0, "parked": 0, "waits": 0, "wait_seconds": 0.0}
+
+    @classmethod
+    def from_settings(cls, provider_name, keys):
+        """
+        Crea el pool con providers.<nombre>.key_pool de settings.yaml.
+
+        :param provider_name: Nombre del proveedor.
+        :param keys: Claves de API.
+        :return: Instancia de KeyPool.
+        """
+        config = get_provider_settings(provider_name).get("key_pool") or {}
+        return cls(
+            keys,
+            strategy=config.get("strategy", "least_loaded"),
+            park_seconds=config.get("park_seconds", 1.0),
+            invalid_park_seconds=config.get("invalid_park_seconds", 300.0),
+        )
+
+    @property
+    def keys(self):
+        """
+        Claves del pool, en el orden configurado.
+        """
+        return [state.key for state in self._states]
+
+    def __len__(self):
+        return len(self._states)
+
+    def available(self):
+        """
+        Número de claves que no están aparcadas.
+        """
+        with self._lock:
+            now = time.monotonic()
+            return sum(1 for s in self._states if s.parked_until <= now)
+
+    def reserve(self):
+        """
+        Elige la clave para una petición y la marca como en uso.
+
+        :return: Tupla (lease, espera) con el préstamo de la clave y los
+                 segundos que hay que esperar si todas están aparcadas.
+        """
+        with self._lock:
+            now = time.monotonic()
+            available = [s for s in self._states if s.parked_until <= now]
+            if not available:
+                # Todas aparcadas: la que antes vuelva a estar disponible
+                state = min(self._states, key=lambda s: s.parked_until)
+                delay = state.parked_until - now
+                self._counters["waits"] += 1
+                self._counters["wait_seconds"] += delay
+            elif self.strategy == "round_robin":
+                state = self._next_turn(available)
+                delay = 0.0
+            else:
+                state = min(available, key=self._load)
+                delay = 0.0
+            state.in_flight += 1
+            state.requests += 1
+            self._counters["leases"] += 1
+            return _KeyLease(self, state), delay
+
+    def acquire(self):
+        """
+        Reserva una clave esperando (bloqueando el hilo) si están todas aparcadas.
+
+        :return: _KeyLease (context manager) con el atributo key.
+        """
+        lease, delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return lease
+
+    async def aacquire(self):
+        """
+        Versión asíncrona de acquire.
+
+        :return: _KeyLease (context manager) con el atributo key.
+        """
+        lease, delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return lease
+
+    def stats(self):
+        """
+        Devuelve los contadores del pool y el estado de cada clave.
+
+        :return: Diccionario con los contadores y 'keys' (lista por clave con
+                 la clave abreviada, peticiones en curso, cuota restante y
+                 segundos que le quedan aparcada).
+        """
+        with self._lock:
+            now = time.monotonic()
+            stats = dict(self._counters)
+            stats["strategy"] = self.strategy
+            stats["keys"] = [{
+                "key": mask_key(s.key),
+                "in_flight": s.in_flight,
+                "requests": s.requests,
+                "throttled": s.throttled,
+                "remaining_requests": s.remaining_requests,
+                "remaining_tokens": s.remaining_tokens,
+                "parked_seconds": max(0.0, s.parked_until - now),
+            } for s in self._states]
+            return stats
+
+    # ------------------------------------------------------------------ #
+    # Utilidades internas
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def _load(state):
+        # Menos peticiones en curso primero; a igualdad, más cuota restante
+        remaining = state.remaining_requests if state.remaining_requests is not None else float("inf")
+        return state.in_flight, -remaining
+
+    def _next_turn(self, available):
+        while True:
+            state = self._states[next(self._turns)]
+            if state in available:
+                return state
+
+    def _release(self, state, headers=None, error=None):
+        with self._lock:
+            state.in_flight = max(0, state.in_flight - 1)
+            now = time.monotonic()
+
+            remaining = _header(headers, _REMAINING_REQUESTS)
+            if remaining is not None:
+                state.remaining_requests = _to_int(remaining)
+            remaining = _header(headers, _REMAINING_TOKENS)
+            if remaining is not None:
+                state.remaining_tokens = _to_int(remaining)
+
+            park = None
+            if isinstance(error, ProviderHTTPError) and error.status_code == 429:
+                state.throttled += 1
+                park = error.retry_after
+                if park is None:
+                    park = parse_reset(_header(headers, _RESET_REQUESTS))
+                if park is None:
+                    park = self.park_seconds
+            elif isinstance(error, ProviderHTTPError) and error.status_code in (401, 403):
+                park = self.invalid_park_seconds
+            elif state.remaining_requests == 0 or state.remaining_tokens == 0:
+                # Cuota agotada: la clave no se usa hasta que se reinicie
+                names = _RESET_REQUESTS if state.remaining_requests == 0 else _RESET_TOKENS
+                park = parse_reset(_header(headers, names))
+
+            if park:
+                state.parked_until = max(state.parked_until, now + park)
+                self._counters["parked"] += 1
+
+
+def _to_int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class _KeyLease:
+    """
+    Préstamo de una clave del pool (context manager).
+
+    Al salir del bloque se devuelve la clave; si se asignan las cabeceras de
+    la respuesta a headers se actualiza su cuota restante, y si el bloque
+    termina con un error 429 la clave queda aparcada.
+    """
+
+    def __init__(self, pool, state):
+        self.key = state.key
+        self.headers = None
+        self._pool = pool
+        self._state = state
+        self._released = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release(error=exc if isinstance(exc, Exception) else None)
+        return False
+
+    def release(self, error=None):
+        """
+        Devuelve la clave al pool (solo la primera vez).
+
+        :param error: Excepción de la petición, si falló.
+        """
+        if self._released:
+            return
+        self._released = True
+        headers = self.headers
+        if headers is None:
+            headers = getattr(error, "headers", None)
+        self._pool._release(self._state, headers, error)
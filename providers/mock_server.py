@@ -0,0 +1,457 @@
+# providers/mock_server.py
+"""
+Servidor HTTP local que imita las API de Anthropic y OpenAI.
+
+Habla el mismo protocolo que https://api.anthropic.com/v1/messages y que el
+endpoint de chat completions de OpenAI (incluido el streaming SSE), de modo
+que ClaudeProvider(base_url=...) y OpenAIProvider(base_url=...) pueden
+apuntarse a él para pruebas de carga sin conexión.
+
+Uso:
+    python -m providers.mock_server --port 8080 --latency 0.2 --error-rate 0.05
+"""
+import argparse
+import datetime
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .fake_provider import FakeLLMProvider
+
+
+class MockLLMServer:
+    """
+    Servidor simulado con latencia, límite de peticiones, errores 429 y streaming.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, tokens_per_second=None,
+                 max_requests_per_second=None, error_rate=0.0, error_status=429,
+                 retry_after=1, responder=None, models=None, seed=0,
+                 key_requests_per_second=None):
+        """
+        :param host: Dirección en la que escuchar.
+        :param port: Puerto (0 = uno libre elegido por el sistema).
+        :param latency: Segundos de espera antes de responder (o del primer token).
+        :param tokens_per_second: Ritmo de los tokens en streaming (None = sin límite).
+        :param max_requests_per_second: Límite de peticiones; el exceso recibe un 429.
+        :param error_rate: Probabilidad (0-1) de responder con error_status.
+        :param error_status: Código HTTP de los errores inyectados.
+        :param retry_after: Valor de la cabecera Retry-After en los 429.
+        :param responder: Función prompt -> texto. Por defecto FakeLLMProvider.
+        :param models: Modelos devueltos por GET /v1/models.
+        :param seed: Semilla de la inyección de errores.
+        :param key_requests_per_second: Límite de peticiones por clave de API (como
+                                        la cuota real); las respuestas llevan las
+                                        cabeceras de cuota restante de OpenAI y
+                                        Anthropic.
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.max_requests_per_second = max_requests_per_second
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.key_requests_per_second = key_requests_per_second
+        self.models = models or ["gpt-3.5-turbo", "claude-3-haiku-20240307"]
+        if responder is None:
+            responder = FakeLLMProvider().generate_text
+        self.responder = responder
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        # Ventana de un segundo por clave: clave -> [inicio, peticiones]
+        self._key_windows = {}
+        self._server = None
+        self._thread = None
+        # Prefijos ya vistos, para simular la caché de prompts de las API
+        self._prompt_cache = set()
+        self.counters = {"requests": 0, "throttled": 0, "errors": 0, "streams": 0,
+                         "connections": 0}
+
+    # ------------------------------------------------------------------ #
+    # Ciclo de vida
+    # ------------------------------------------------------------------ #
+    def start(self):
+        """
+        Arranca el servidor en un hilo en segundo plano.
+
+        :return: La propia instancia (para encadenar).
+        """
+        server = self
+
+        class Handler(_MockHandler):
+            mock = server
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Detiene el servidor.
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def base_url(self):
+        """
+        URL base para ClaudeProvider(base_url=...) y OpenAIProvider(base_url=...).
+        """
+        return f"http://{self.host}:{self.port}/v1"
+
+    # ------------------------------------------------------------------ #
+    # Decisiones por petición
+    # ------------------------------------------------------------------ #
+    def admit(self, key=None):
+        """
+        Decide si la petición se atiende o recibe un error.
+
+        :param key: Clave de API de la petición.
+        :return: Tupla (estado, cabeceras): estado es None si se atiende o el
+                 código de error a devolver; cabeceras, las de cuota de la clave.
+        """
+        with self._lock:
+            self.counters["requests"] += 1
+            headers = {}
+            if self.key_requests_per_second:
+                headers = self._admit_key(key)
+                if headers is None:
+                    self.counters["throttled"] += 1
+                    headers = self._key_quota_headers(key)
+                    # Retry-After: hasta que se renueve la ventana de la clave
+                    reset = self._key_windows[key][0] + 1.0 - time.monotonic()
+                    headers["retry-after"] = f"{max(0.0, reset):.3f}"
+                    return 429, headers
+            if self.max_requests_per_second:
+                now = time.monotonic()
+                if now - self._window_start >= 1.0:
+                    self._window_start = now
+                    self._window_count = 0
+                self._window_count += 1
+                if self._window_count > self.max_requests_per_second:
+                    self.counters["throttled"] += 1
+                    return 429, headers
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.counters["errors"] += 1
+                return self.error_status, headers
+        return None, headers
+
+    def _admit_key(self, key):
+        now = time.monotonic()
+        window = self._key_windows.setdefault(key, [now, 0])
+        if now - window[0] >= 1.0:
+            window[0], window[1] = now, 0
+        if window[1] >= self.key_requests_per_second:
+            return None
+        window[1] += 1
+        return self._key_quota_headers(key)
+
+    def _key_quota_headers(self, key):
+        start, count = self._key_windows[key]
+        reset = max(0.0, start + 1.0 - time.monotonic())
+        remaining = str(max(0, self.key_requests_per_second - count))
+        reset_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=reset)
+        return {
+            "x-ratelimit-limit-requests": str(self.key_requests_per_second),
+            "x-ratelimit-remaining-requests": remaining,
+            "x-ratelimit-reset-requests": f"{reset * 1000:.0f}ms",
+            "anthropic-ratelimit-requests-limit": str(self.key_requests_per_second),
+            "anthropic-ratelimit-requests-remaining": remaining,
+            "anthropic-ratelimit-requests-reset": reset_at.isoformat(),
+        }
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    mock = None
+    # Cabeceras de cuota de la petición en curso (ver MockLLMServer.admit)
+    quota_headers = {}
+
+    def setup(self):
+        super().setup()
+        with self.mock._lock:
+            self.mock.counters["connections"] += 1
+        # Sin Nagle: cabeceras y cuerpo se envían en escrituras separadas
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    # ------------------------------------------------------------------ #
+    # Rutas
+    # ------------------------------------------------------------------ #
+    def do_GET(self):
+        self.quota_headers = {}
+        if self.path.rstrip("/").endswith("/models"):
+            data = [{"id": m, "object": "model", "created": 0, "owned_by": "mock"}
+                    for m in self.mock.models]
+            self._send_json(200, {"object": "list", "data": data})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        self.quota_headers = {}
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.path.endswith("/messages"):
+            handler = self._anthropic
+        elif self.path.endswith("/chat/completions"):
+            handler = self._openai
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        key = self.headers.get("x-api-key")
+        if key is None:
+            key = self.headers.get("Authorization", "").removeprefix("Bearer ")
+        status, self.quota_headers = self.mock.admit(key)
+        if status is not None:
+            self._send_error_status(status)
+            return
+
+        if self.mock.latency:
+            time.sleep(self.mock.latency)
+        handler(body)
+
+    # ------------------------------------------------------------------ #
+    # Anthropic /v1/messages
+    # ------------------------------------------------------------------ #
+    def _anthropic(self, body):
+        prompt = _prompt_from_messages(body.get("messages", []))
+        text = self.mock.responder(prompt)
+        model = body.get("model", "claude-mock")
+        usage = {"input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4}
+        self._add_anthropic_cache_usage(usage, body.get("system"))
+        message_id = f"msg_{uuid.uuid4().hex[:24]}"
+
+        if not body.get("stream"):
+            self._send_json(200, {
+                "id": message_id,
+                "type": "message",
+                "role": "assistant",
+                "model": model,
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": "end_turn",
+                "usage": usage,
+            })
+            return
+
+        self._start_sse()
+        self._sse({"type": "message_start", "message": {
+            "id": message_id, "type": "message", "role": "assistant", "model": model,
+            "content": [], "usage": dict(usage, output_tokens=0)}},
+            event="message_start")
+        self._sse({"type": "content_block_start", "index": 0,
+                   "content_block": {"type": "text", "text": ""}}, event="content_block_start")
+        for token in self._tokens(text):
+            self._sse({"type": "content_block_delta", "index": 0,
+                       "delta": {"type": "text_delta", "text": token}}, event="content_block_delta")
+        self._sse({"type": "content_block_stop", "index": 0}, event="content_block_stop")
+        self._sse({"type": "message_delta", "delta": {"stop_reason": "end_turn"},
+                   "usage": {"output_tokens": usage["output_tokens"]}}, event="message_delta")
+        self._sse({"type": "message_stop"}, event="message_stop")
+        self._end_sse()
+
+    # ------------------------------------------------------------------ #
+    # OpenAI /v1/chat/completions
+    # ------------------------------------------------------------------ #
+    def _openai(self, body):
+        messages = body.get("messages", [])
+        prompt = _prompt_from_messages(messages)
+        text = self.mock.responder(prompt)
+        model = body.get("model", "gpt-mock")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        # Caché automática de OpenAI: se simula con los mensajes de sistema
+        system = "".join(m.get("content", "") for m in messages if m.get("role") == "system")
+        prompt_tokens = (len(prompt) + len(system)) // 4
+        completion_tokens = len(text) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": self._cached_tokens(system)},
+        }
+
+        if not body.get("stream"):
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+            return
+
+        def chunk(delta, finish_reason=None):
+            return {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+
+        self._start_sse()
+        self._sse(chunk({"role": "assistant", "content": ""}))
+        for token in self._tokens(text):
+            self._sse(chunk({"content": token}))
+        self._sse(chunk({}, finish_reason="stop"))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            self._sse({"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                       "model": model, "choices": [], "usage": usage})
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._end_sse()
+
+    # ------------------------------------------------------------------ #
+    # Caché de prompts simulada
+    # ------------------------------------------------------------------ #
+    def _add_anthropic_cache_usage(self, usage, system):
+        if isinstance(system, str):
+            system = [{"type": "text", "text": system}]
+        for block in system or []:
+            text = block.get("text", "")
+            if not block.get("cache_control"):
+                usage["input_tokens"] += len(text) // 4
+                continue
+            # Solo los bloques marcados con cache_control pasan por la caché
+            cached = self._cached_tokens(text)
+            key = "cache_read_input_tokens" if cached else "cache_creation_input_tokens"
+            usage[key] = usage.get(key, 0) + (cached or len(text) // 4)
+
+    def _cached_tokens(self, prefix):
+        # La primera vez se escribe en la caché (0 tokens leídos); después se lee
+        if not prefix:
+            return 0
+        with self.mock._lock:
+            if prefix in self.mock._prompt_cache:
+                return len(prefix) // 4
+            self.mock._prompt_cache.add(prefix)
+        return 0
+
+    # ------------------------------------------------------------------ #
+    # Utilidades HTTP
+    # ------------------------------------------------------------------ #
+    def _tokens(self, text):
+        delay = 1.0 / self.mock.tokens_per_second if self.mock.tokens_per_second else 0.0
+        for token in _split_tokens(text):
+            if delay:
+                time.sleep(delay)
+            yield token
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in dict(self.quota_headers, **(headers or {})).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error_status(self, status):
+        headers = {}
+        if (status == 429 and self.mock.retry_after is not None
+                and "retry-after" not in self.quota_headers):
+            headers["retry-after"] = str(self.mock.retry_after)
+        error_type = "rate_limit_error" if status == 429 else "api_error"
+        self._send_json(status, {"type": "error",
+                                 "error": {"type": error_type, "message": "mock error"}},
+                        headers=headers)
+
+    def _start_sse(self):
+        with self.mock._lock:
+            self.mock.counters["streams"] += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        for name, value in self.quota_headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def _sse(self, payload, event=None):
+        data = f"data: {json.dumps(payload)}\n\n"
+        if event:
+            data = f"event: {event}\n" + data
+        self._write_chunk(data.encode("utf-8"))
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_sse(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+def _prompt_from_messages(messages):
+    # El responder recibe solo la conversación, no las instrucciones de sistema
+    partes = []
+    for message in messages:
+        if message.get("role") == "system":
+            continue
+        content = message.get("content", "")
+        if isinstance(content, list):
+            content = "".join(block.get("text", "") for block in content if isinstance(block, dict))
+        partes.append(content)
+    return "\n".join(partes)
+
+
+def _split_tokens(text):
+    # Trozos de ~4 caracteres, similar al tamaño medio de un token
+    return [text[i:i + 4] for i in range(0, len(text), 4)] or [""]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que imita las API de Anthropic y OpenAI.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="Segundos antes de responder")
+    parser.add_argument("--tokens-per-second", type=float, default=None, help="Ritmo del streaming")
+    parser.add_argument("--max-rps", type=int, default=None, help="Peticiones por segundo antes de devolver 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probabilidad de error inyectado")
+    parser.add_argument("--error-status", type=int, default=429)
+    parser.add_argument("--retry-after", type=float, default=1)
+    parser.add_argument("--key-rps", type=int, default=None, help="Peticiones por segundo por clave de API")
+    args = parser.parse_args()
+
+    server = MockLLMServer(host=args.host, port=args.port, latency=args.latency,
+                           tokens_per_second=args.tokens_per_second,
+                           max_requests_per_second=args.max_rps, error_rate=args.error_rate,
+                           error_status=args.error_status, retry_after=args.retry_after,
+                           key_requests_per_second=args.key_rps)
+    server.start()
+    print(f"Servidor simulado escuchando en {server.base_url} (Ctrl-C para salir)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,158 +1,289 @@
 # providers/openai_provider.py
 import os
-import datetime
-from openai import OpenAI
-from dotenv import load_dotenv
+import json
+import time
+import uuid
+from .async_utils import LoopLocal
 from .base_provider import ProviderBase
-from .prompt_templates import PromptTemplates
+from .key_pool import KeyPool, configured_api_keys
+from .provider_config import get_provider_settings, load_environment
+from .retry import ProviderHTTPError, parse_retry_after
+from utils.jsonl_writer import get_jsonl_writer
 
-# Asegurarse de que el directorio logs existe
-os.makedirs("logs", exist_ok=True)
-
-# Cargar variables de entorno desde el archivo .env
-load_dotenv()
+REQUEST_LOG = os.path.join("logs", "openai_requests.jsonl")
+RESPONSE_LOG = os.path.join("logs", "openai_responses.jsonl")
+LOG_LEVELS = ("off", "file", "console")
 
 class OpenAIProvider(ProviderBase):
-    def __init__(self, api_key=None):
-        # Obtener clave API desde entorno si no se proporciona
-        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
+    provider_name = "openai"
+
+    def __init__(self, api_key=None, cache=None, rate_limiter=None, retry_policy=None,
+                 base_url=None, log_level=None, plan_cache=None,
+                 circuit_breaker=None, api_keys=None):
+        super().__init__(cache=cache, rate_limiter=rate_limiter, retry_policy=retry_policy,
+                         plan_cache=plan_cache, circuit_breaker=circuit_breaker)
+        # Cargar variables de entorno desde el archivo .env
+        load_environment()
+        # Obtener las claves desde el entorno o settings.yaml si no se proporcionan;
+        # con varias, cada petición usa la que elija el pool
+        keys = list(api_keys or []) or ([api_key] if api_key else configured_api_keys(self.provider_name))
+        if not keys:
             raise ValueError("❌ No se encontró la clave de API de OpenAI.")
-        self.client = OpenAI(api_key=self.api_key)
+        self.key_pool = KeyPool.from_settings(self.provider_name, keys)
+        self.api_key = self.key_pool.keys[0]
+        # base_url permite apuntar a un servidor compatible (p. ej. providers.mock_server)
+        self.base_url = base_url
+        # El SDK de OpenAI se importa al crear el primer cliente, no al importar el módulo
+        self._client = None
+        self._async_clients = LoopLocal(self._create_async_client)
         self.default_model = "gpt-3.5-turbo"
 
-    def generate_text(self, prompt, model=None, max_tokens=150, temperature=0.7, **kwargs):
+        # Registro de peticiones/respuestas: 'off', 'file' (JSONL en segundo
+        # plano) o 'console' (JSONL y volcado por pantalla)
+        self.log_level = log_level or get_provider_settings(self.provider_name).get("log_level", "file")
+        if self.log_level not in LOG_LEVELS:
+            raise ValueError(f"Nivel de log desconocido: {self.log_level}")
+        self._request_log = get_jsonl_writer(REQUEST_LOG)
+        self._response_log = get_jsonl_writer(RESPONSE_LOG)
+
+    @property
+    def client(self):
+        """
+        Cliente síncrono del SDK, creado en el primer uso.
+        """
+        if self._client is None:
+            from openai import OpenAI
+            # Los reintentos los gestiona ProviderBase (RetryPolicy), no el SDK
+            self._client = OpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+        return self._client
+
+    def _create_async_client(self):
+        from openai import AsyncOpenAI
+        return AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+
+    def _generate_text(self, prompt, model, max_tokens, temperature, json_mode=False,
+                       system=None, **kwargs):
+        request_id = None
         try:
-            model = model or self.default_model
-
-            # Crear el objeto de petición (request) para poder imprimirlo
-            request_data = {
-                "model": model,
-                "messages": [{"role": "user", "content": prompt}],
-                "max_tokens": max_tokens,
-                "temperature": temperature
-            }
-
-            # Guardar en logs la petición completa
-            import json
-            with open("logs/openai_requests.log", "a") as f:
-                f.write(f"\n\n--- NUEVA PETICIÓN: {datetime.datetime.now()} ---\n")
-                f.write(json.dumps(request_data, indent=2))
-                f.write("\n\n")
-
-            # También imprimir en la consola
-            print("\n=== PETICIÓN A OPENAI ===")
-            print(json.dumps(request_data, indent=2))
-
-            # Realizar la petición a la API
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=max_tokens,
-                temperature=temperature
-            )
-
-            # Guardar también la respuesta en logs
-            with open("logs/openai_responses.log", "a") as f:
-                f.write(f"\n\n--- RESPUESTA: {datetime.datetime.now()} ---\n")
-                f.write(str(response))
-                f.write("\n\n")
-
-            # Imprimir la respuesta en la consola
-            print("\n=== RESPUESTA DE OPENAI ===")
-            print(response)
+            request_data = self._build_request(prompt, model, max_tokens, temperature, json_mode,
+                                               system)
+            request_id = self._log_request(request_data)
+
+            # Realizar la petición a la API con la clave elegida por el pool;
+            # las cabeceras de la respuesta actualizan su cuota restante
+            with self.key_pool.acquire() as lease:
+                try:
+                    raw = self.client.chat.completions.with_raw_response.create(
+                        **request_data, extra_headers=self._auth_headers(lease.key))
+                except Exception as e:
+                    # Un 429 aparca la clave (con las cabeceras de la respuesta)
+                    lease.release(error=self._as_provider_error(e))
+                    raise
+                lease.headers = raw.headers
+            response = raw.parse()
+
+            self._record_response_usage(response.usage)
+            self._log_response(request_id, response)
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            self._log_error(request_id, e)
+            raise self._as_provider_error(e)
+
+    async def _agenerate_text(self, prompt, model, max_tokens, temperature, json_mode=False,
+                              system=None, **kwargs):
+        request_id = None
+        try:
+            request_data = self._build_request(prompt, model, max_tokens, temperature, json_mode,
+                                               system)
+            request_id = self._log_request(request_data)
+
+            # Cliente asíncrono ligado al event loop actual
+            client = self._async_clients.get()
+            with await self.key_pool.aacquire() as lease:
+                try:
+                    raw = await client.chat.completions.with_raw_response.create(
+                        **request_data, extra_headers=self._auth_headers(lease.key))
+                except Exception as e:
+                    # Un 429 aparca la clave (con las cabeceras de la respuesta)
+                    lease.release(error=self._as_provider_error(e))
+                    raise
+                lease.headers = raw.headers
+            response = raw.parse()
 
+            self._record_response_usage(response.usage)
+            self._log_response(request_id, response)
             return response.choices[0].message.content.strip()
         except Exception as e:
-            print(f"\n=== ERROR EN PETICIÓN A OPENAI ===")
-            print(f"Error: {e}")
-            raise RuntimeError(f"Failed to generate text: {e}")
+            self._log_error(request_id, e)
+            raise self._as_provider_error(e)
+
+    def _stream_text(self, prompt, model, max_tokens, temperature, json_mode=False,
+                     system=None, **kwargs):
+        request_id = None
+        try:
+            request_data = self._build_request(prompt, model, max_tokens, temperature, json_mode,
+                                               system)
+            request_id = self._log_request(request_data)
+
+            partes = []
+            # La clave queda ocupada mientras dura el stream
+            with self.key_pool.acquire() as lease:
+                try:
+                    # include_usage: el último fragmento trae el consumo (y los tokens cacheados)
+                    raw = self.client.chat.completions.with_raw_response.create(
+                        **request_data, stream=True, stream_options={"include_usage": True},
+                        extra_headers=self._auth_headers(lease.key))
+                except Exception as e:
+                    # Un 429 aparca la clave (con las cabeceras de la respuesta)
+                    lease.release(error=self._as_provider_error(e))
+                    raise
+                lease.headers = raw.headers
+                for chunk in raw.parse():
+                    if getattr(chunk, "usage", None):
+                        self._record_response_usage(chunk.usage)
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        partes.append(delta)
+                        yield delta
+
+            self._log_response(request_id, "".join(partes))
+        except Exception as e:
+            self._log_error(request_id, e)
+            raise self._as_provider_error(e)
+
+    @staticmethod
+    def _auth_headers(key):
+        """
+        Cabecera de autenticación de una petición con la clave indicada.
+        """
+        return {"Authorization": f"Bearer {key}"}
+
+    @staticmethod
+    def _as_provider_error(e):
+        """
+        Convierte una excepción del SDK en el error que entiende la política de reintentos.
+        """
+        import openai
+
+        message = f"Failed to generate text: {e}"
+        if isinstance(e, openai.APIStatusError):
+            retry_after = parse_retry_after(e.response.headers.get("retry-after"))
+            return ProviderHTTPError(message, status_code=e.status_code, retry_after=retry_after,
+                                     headers=e.response.headers)
+        if isinstance(e, openai.APIConnectionError):
+            return ProviderHTTPError(message)
+        return RuntimeError(message)
+
+    def _build_request(self, prompt, model, max_tokens, temperature, json_mode=False,
+                       system=None):
+        # Crear el objeto de petición (request) para poder imprimirlo
+        messages = [{"role": "user", "content": prompt}]
+        if system:
+            # OpenAI cachea automáticamente el prefijo común de los prompts:
+            # el texto estático va primero para que sea idéntico entre peticiones
+            messages.insert(0, {"role": "system", "content": system})
+        request_data = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        if json_mode:
+            # Modo JSON: la respuesta es siempre un objeto JSON válido
+            request_data["response_format"] = {"type": "json_object"}
+        return request_data
+
+    def _record_response_usage(self, usage):
+        """
+        Acumula el consumo de una respuesta, incluidos los tokens servidos
+        desde la caché de prompts (prompt_tokens_details.cached_tokens).
+        """
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        self._record_usage(input_tokens=usage.prompt_tokens,
+                           output_tokens=usage.completion_tokens,
+                           cached_tokens=getattr(details, "cached_tokens", 0) if details else 0)
+
+    def _log_request(self, request_data):
+        """
+        Registra la petición sin bloquear: solo se encola un diccionario; la
+        serialización y la escritura ocurren en el hilo del escritor JSONL.
+
+        :return: Identificador para correlacionar la respuesta.
+        """
+        if self.log_level == "off":
+            return None
+
+        request_id = uuid.uuid4().hex
+        self._request_log.write({"ts": time.time(), "request_id": request_id,
+                                 "request": request_data})
+
+        if self.log_level == "console":
+            print("\n=== PETICIÓN A OPENAI ===")
+            print(json.dumps(request_data, ensure_ascii=False, separators=(",", ":")))
+        return request_id
+
+    def _log_response(self, request_id, response):
+        """
+        Registra la respuesta (objeto del SDK o texto completo en streaming).
+        """
+        if self.log_level == "off":
+            return
+
+        ts = time.time()
+        self._response_log.write(lambda: self._response_record(request_id, ts, response))
+
+        if self.log_level == "console":
+            print("\n=== RESPUESTA DE OPENAI ===")
+            print(json.dumps(self._response_record(request_id, ts, response),
+                             ensure_ascii=False, separators=(",", ":"), default=str))
+
+    def _log_error(self, request_id, error):
+        """
+        Registra una petición fallida; solo se muestra por consola con
+        log_level "console".
+        """
+        if self.log_level == "off":
+            return
+
+        self._response_log.write({"ts": time.time(), "request_id": request_id,
+                                  "error": str(error)})
+
+        if self.log_level == "console":
+            print("\n=== ERROR EN PETICIÓN A OPENAI ===")
+            print(f"Error: {error}")
+
+    @staticmethod
+    def _response_record(request_id, ts, response):
+        if isinstance(response, str):
+            return {"ts": ts, "request_id": request_id, "content": response}
+        usage = response.usage.model_dump() if getattr(response, "usage", None) else None
+        return {
+            "ts": ts,
+            "request_id": request_id,
+            "id": response.id,
+            "model": response.model,
+            "content": response.choices[0].message.content if response.choices else None,
+            "usage": usage,
+        }
 
     def list_models(self):
+        return self._cached_models(self._fetch_models)
+
+    def _fetch_models(self):
         try:
             models = self.client.models.list()
             return [model.id for model in models.data]
         except Exception as e:
             raise RuntimeError(f"Failed to list models: {e}")
 
-    def generar_tareas(self, objetivo, contexto):
+    def warm_up(self):
         """
-        Genera una lista de tareas basadas en un objetivo y un contexto utilizando OpenAI API.
-
-        :param objetivo: Descripción del objetivo.
-        :param contexto: Información de contexto.
-        :return: Lista de tareas generadas.
+        Importa el SDK, crea el cliente y precarga la lista de modelos: la
+        petición a /models deja abierta en el pool del cliente la conexión
+        que reutilizará la primera llamada real.
         """
-        # Generar un prompt especializado basado en el objetivo
-        prompt = self._crear_prompt_especializado(objetivo, contexto)
-        
-        # Generar la respuesta usando la API
-        try:
-            response = self.generate_text(prompt, max_tokens=300)
-            
-            # Procesar la respuesta para extraer comandos
-            comandos = []
-            for linea in response.strip().split('\n'):
-                # Eliminar numeración y espacios
-                if '.' in linea[:3]:  # Detectar líneas como "1. comando"
-                    comando = linea.split('.', 1)[1].strip()
-                    comandos.append({"tarea": f"Ejecutar: {comando}", "comando": comando})
-            
-            # Si no se encontraron comandos, crear tareas genéricas
-            if not comandos:
-                tareas = [{"tarea": tarea.strip()} for tarea in response.split("\n") if tarea.strip()]
-                return tareas
-                
-            return comandos
-        except Exception as e:
-            raise RuntimeError(f"Error al generar tareas: {e}")
-    
-    def _crear_prompt_especializado(self, objetivo, contexto):
-        """
-        Crea un prompt especializado basado en el tipo de objetivo.
-        
-        :param objetivo: Descripción del objetivo.
-        :param contexto: Información de contexto.
-        :return: Prompt especializado para el modelo.
-        """
-        # Detectar el tipo de objetivo
-        objetivo_lower = objetivo.lower()
-        
-        # Prompt para información del sistema
-        if any(kw in objetivo_lower for kw in ['info sistema', 'información sistema']):
-            return (
-                "Actúa como un experto en sistemas Linux. "
-                "Necesito comandos para mostrar información completa del sistema. "
-                "Genera comandos bash que muestren: información del host, CPU, memoria RAM, "
-                "uso de disco y versión del sistema operativo. "
-                "Usa comandos como hostnamectl, lscpu, free, df, etc. "
-                "Preferiblemente en un solo comando con && para encadenarlos. "
-                "Lista solo los comandos sin explicaciones adicionales:\n\n"
-                "1. [comando]\n"
-            )
-        
-        # Prompt para abrir aplicaciones
-        elif any(word in objetivo_lower for word in ['abre', 'abrir', 'ejecuta', 'ejecutar']):
-            return (
-                "Actúa como un experto en sistemas Linux. "
-                f"Necesito comandos para abrir o ejecutar aplicaciones basado en esta solicitud: '{objetivo}'. "
-                "Genera comandos que funcionen para la mayoría de distribuciones Linux. "
-                "Si es un navegador, considera alternativas como sensible-browser. "
-                "Lista solo los comandos sin explicaciones adicionales:\n\n"
-                "1. [comando]\n"
-            )
-        
-        # Prompt para operaciones de archivos
-        elif any(word in objetivo_lower for word in ['archivo', 'carpeta', 'directorio', 'crear']):
-            return (
-                "Actúa como un experto en sistemas Linux. "
-                f"Necesito comandos para realizar operaciones con archivos o directorios para: '{objetivo}'. "
-                "Genera comandos bash que realicen la operación solicitada de manera segura. "
-                "Verifica la existencia de archivos/directorios cuando sea necesario. "
-                "Añade confirmación del resultado cuando sea posible. "
-                "Lista solo los comandos sin explicaciones adicionales:\n\n"
-                "1. [comando]\n"
-            )
-        
-        # Prompt por defecto para otras solicitudes
-        return PromptTemplates.task_generation_prompt(objetivo, contexto)
\ No newline at end of file
+        return {"provider": self.provider_name, "models": len(self.list_models())}
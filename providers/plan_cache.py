@@ -0,0 +1,598 @@
+"""
+plan_cache.py
+
+Caché de planes por similitud de objetivos.
+
+La caché de respuestas solo acierta con prompts idénticos; aquí se indexan los
+objetivos ya descompuestos con MinHash/LSH sobre n-gramas de caracteres, de
+modo que "listar archivos ocultos en /tmp" y "muestra los archivos ocultos de
+/var/log" reutilizan el mismo plan. Los parámetros del objetivo (rutas,
+archivos, números, cadenas entre comillas, URL) se sustituyen por huecos que
+se vuelven a rellenar con los valores del nuevo objetivo.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import struct
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from .provider_config import get_section, resolve_cache_path
+
+NUM_PERM = 64
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+NGRAM = 3
+
+_SIGNATURE = struct.Struct(f"<{NUM_PERM}H")
+_BAND_BYTES = ROWS * 2
+
+_SLOT_RE = re.compile(r"""
+      (?P<str>"[^"]*"|'[^']*')
+    | (?P<url>\b[a-z][a-z0-9+.-]*://\S+)
+    | (?P<path>(?:~|\.{1,2})?/[^\s,;:'"]*)
+    | (?P<file>\b[\w-]+(?:\.[\w-]+)*\.[a-z0-9]{1,10}\b)
+    | (?P<num>\b\d+(?:\.\d+)?(?=[a-z]*\b))
+""", re.VERBOSE | re.IGNORECASE)
+
+_STOPWORDS = frozenset(
+    "a al con de del el en es la las lo los me mi mis o para por que se su sus "
+    "un una unas unos y the of in on to at for from my".split())
+
+# Verbos equivalentes: el verbo canónico también protege contra reutilizar un
+# plan de otra acción ("borrar" frente a "listar") con texto parecido
+_ACTIONS = {}
+for _canonico, _sinonimos in {
+    "listar": "lista listar listame muestra mostrar muestrame ensena ensenar ver dame "
+              "cuales list show ls",
+    "borrar": "borra borrar elimina eliminar quita quitar remove delete rm",
+    "crear": "crea crear genera generar create make mkdir touch",
+    "copiar": "copia copiar duplica duplicar copy cp",
+    "mover": "mueve mover renombra renombrar move rename mv",
+    "buscar": "busca buscar encuentra encontrar localiza localizar find search grep",
+    "abrir": "abre abrir lanza lanzar ejecuta ejecutar open run launch",
+    "comprimir": "comprime comprimir empaqueta empaquetar compress zip tar",
+    "descomprimir": "descomprime descomprimir extrae extraer unzip extract",
+    "montar": "monta montar mount",
+    "desmontar": "desmonta desmontar umount unmount",
+    "instalar": "instala instalar install",
+    "desinstalar": "desinstala desinstalar uninstall",
+    "contar": "cuenta contar count",
+    "comprobar": "comprueba comprobar verifica verificar revisa revisar check",
+    "formatear": "formatea formatear format mkfs",
+    "matar": "mata matar termina terminar kill pkill killall",
+    "apagar": "apaga apagar shutdown poweroff halt",
+    "reiniciar": "reinicia reiniciar reboot restart",
+}.items():
+    for _sinonimo in _sinonimos.split():
+        _ACTIONS[_sinonimo] = _canonico
+_CANONICAL_ACTIONS = frozenset(_ACTIONS.values())
+
+# Acciones que modifican el sistema: su plan solo se reutiliza si la plantilla
+# del objetivo coincide exactamente (un parecido no basta para repetir un borrado)
+_DESTRUCTIVE_ACTIONS = frozenset(
+    "borrar mover copiar desinstalar instalar montar desmontar descomprimir formatear "
+    "matar apagar reiniciar".split())
+
+# Negaciones y excepciones: cambian el sentido del objetivo aunque el texto se
+# parezca mucho ("borrar archivos no temporales"), así que deben coincidir
+_QUALIFIERS = frozenset(
+    "no ni sin excepto salvo menos nunca tampoco solo solamente not except without "
+    "only never".split())
+
+# Unidades de tamaño y de tiempo: quedan en la plantilla junto al número
+# ("100 MB" -> "numslot mb") y deben coincidir, porque cambian el plan
+# (find -size +100M frente a +100k) aunque el texto apenas varíe
+_UNITS = frozenset(
+    "b byte bytes k kb kib kilobyte kilobytes m mb mib megabyte megabytes g gb gib "
+    "gigabyte gigabytes t tb tib terabyte terabytes ms s seg segs segundo segundos "
+    "second seconds min mins minuto minutos minute minutes h hora horas hour hours d "
+    "dia dias day days semana semanas week weeks mes meses month months ano anos "
+    "year years".split())
+
+# Delimitadores de una palabra de la shell alrededor de un hueco
+_TOKEN_BEFORE = r"(?<![^\s'\"=(])"
+_TOKEN_AFTER = r"(?![^\s'\"|;&)<>])"
+_PLACEHOLDER_RE = re.compile("\x00\\d+\x00")
+
+
+def strip_accents(text):
+    """
+    Elimina tildes y diacríticos ("límite" -> "limite").
+
+    :param text: Texto original.
+    :return: Texto sin diacríticos.
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def extract_slots(objective):
+    """
+    Separa los parámetros de un objetivo de su forma general.
+
+    :param objective: Objetivo en lenguaje natural.
+    :return: Tupla (plantilla normalizada, tipos de los huecos, valores).
+    """
+    kinds = []
+    values = []
+
+    def replace(match):
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "str":
+            value = value[1:-1]
+        kinds.append(kind)
+        values.append(value)
+        return f" {kind}slot "
+
+    template = _SLOT_RE.sub(replace, objective)
+    words = re.findall(r"\w+", strip_accents(template).lower())
+    words = [_ACTIONS.get(w, w) for w in words if w not in _STOPWORDS]
+    return " ".join(words), tuple(kinds), values
+
+
+def minhash_signature(text):
+    """
+    Firma MinHash de los n-gramas de caracteres de un texto.
+
+    Cada n-grama se resume con dos BLAKE2b de 64 bytes (con distinta sal) que
+    proporcionan las NUM_PERM funciones hash de 16 bits.
+
+    :param text: Texto normalizado.
+    :return: Firma empaquetada en bytes.
+    """
+    padded = f" {text} "
+    shingles = {padded[i:i + NGRAM] for i in range(max(1, len(padded) - NGRAM + 1))}
+    rows = [_shingle_hashes(shingle) for shingle in shingles]
+    return _SIGNATURE.pack(*map(min, *rows)) if len(rows) > 1 else _SIGNATURE.pack(*rows[0])
+
+
+# Los n-gramas se repiten mucho entre objetivos: sus hashes se reutilizan
+_SHINGLE_CACHE_SIZE = 65536
+_shingle_cache = {}
+
+
+def _shingle_hashes(shingle):
+    row = _shingle_cache.get(shingle)
+    if row is None:
+        data = shingle.encode("utf-8")
+        row = _SIGNATURE.unpack(hashlib.blake2b(data, digest_size=64).digest()
+                                + hashlib.blake2b(data, digest_size=64, salt=b"1").digest())
+        if len(_shingle_cache) >= _SHINGLE_CACHE_SIZE:
+            _shingle_cache.clear()
+        _shingle_cache[shingle] = row
+    return row
+
+
+def signature_similarity(a, b):
+    """
+    Estimación de la similitud de Jaccard a partir de dos firmas.
+    """
+    return sum(x == y for x, y in zip(_SIGNATURE.unpack(a), _SIGNATURE.unpack(b))) / NUM_PERM
+
+
+def _action_of(template):
+    for word in template.split():
+        if word in _CANONICAL_ACTIONS:
+            return word
+    return template.split(" ", 1)[0] if template else ""
+
+
+def _qualifiers(template):
+    return frozenset(w for w in template.split() if w in _QUALIFIERS)
+
+
+def _units(template):
+    return [w for w in template.split() if w in _UNITS]
+
+
+def _bind(value, slots):
+    if isinstance(value, str):
+        for i, slot in enumerate(slots):
+            value = value.replace(f"\x00{i}\x00", slot)
+        return value
+    if isinstance(value, dict):
+        return {k: _bind(v, slots) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_bind(v, slots) for v in value]
+    return value
+
+
+def _unbind(value, slots):
+    """
+    Sustituye los valores de los huecos por marcadores, solo como palabras
+    completas de la shell ('5' en "tail -n 5", no en "cut -c1-50").
+    """
+    if isinstance(value, str):
+        # Los valores más largos primero para no romper uno que contiene a otro
+        for i, slot in sorted(enumerate(slots), key=lambda pair: -len(pair[1])):
+            if slot:
+                pattern = _TOKEN_BEFORE + re.escape(slot) + _TOKEN_AFTER
+                value = re.sub(pattern, lambda _: f"\x00{i}\x00", value)
+        return value
+    if isinstance(value, dict):
+        return {k: _unbind(v, slots) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_unbind(v, slots) for v in value]
+    return value
+
+
+def _strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for v in value.values():
+            yield from _strings(v)
+    elif isinstance(value, list):
+        for v in value:
+            yield from _strings(v)
+
+
+def _slots_are_exact(plan, slots):
+    """
+    True si ningún valor de un hueco aparece en el plan fuera de su propia
+    palabra (p. ej. '5' dentro de "-c1-50"); si aparece, el plan solo vale
+    para esos mismos valores.
+    """
+    texts = [_PLACEHOLDER_RE.sub(" ", text) for text in _strings(plan)]
+    return not any(slot and slot in text for slot in slots for text in texts)
+
+
+class _Entry:
+    __slots__ = ("key", "namespace", "objective", "template", "signature", "kinds", "values",
+                 "action", "plan", "exact_slots")
+
+    def __init__(self, key, namespace, objective, template, signature, kinds, values, action,
+                 plan):
+        self.key = key
+        self.namespace = namespace
+        self.objective = objective
+        self.template = template
+        self.signature = signature
+        self.kinds = kinds
+        self.values = values
+        self.action = action
+        self.plan = plan
+        self.exact_slots = _slots_are_exact(plan, values)
+
+    @classmethod
+    def create(cls, key, namespace, objective, plan):
+        template, kinds, values = extract_slots(objective)
+        return cls(key, namespace, objective, template, minhash_signature(template), kinds,
+                   values, _action_of(template), plan)
+
+
+class PlanCache:
+    """
+    Índice LSH de objetivos ya descompuestos con sus planes parametrizados.
+    """
+
+    def __init__(self, threshold=0.85, max_entries=5000, path=None, enabled=True):
+        """
+        Inicializa la caché.
+
+        :param threshold: Similitud mínima (0-1) para reutilizar un plan.
+        :param max_entries: Número máximo de objetivos; se expulsa el menos usado.
+        :param path: Archivo SQLite donde persistir los planes (None = solo memoria);
+                     las rutas relativas se toman dentro del directorio de caché
+                     del usuario (ver provider_config.user_cache_dir).
+        :param enabled: Si es False la caché nunca devuelve ni guarda nada.
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.path = resolve_cache_path(path)
+        self.enabled = enabled and max_entries > 0
+
+        self._entries = OrderedDict()
+        self._by_template = {}
+        self._bands = [dict() for _ in range(BANDS)]
+        self._next_id = 0
+        self._lock = threading.RLock()
+        self._conn = None
+        self._loaded = path is None
+        # Claves con acierto cuyo used_at aún no se ha escrito en disco
+        self._touched = {}
+        self._touched_at = time.monotonic()
+        self._counters = {"lookups": 0, "hits": 0, "misses": 0, "rejected": 0,
+                          "stores": 0, "evictions": 0}
+
+    @classmethod
+    def from_settings(cls):
+        """
+        Crea una caché a partir de la sección 'plan_cache' de config/settings.yaml.
+
+        :return: Instancia de PlanCache.
+        """
+        config = get_section("plan_cache")
+        return cls(
+            threshold=config.get("threshold", 0.85),
+            max_entries=config.get("max_entries", 5000),
+            path=config.get("path", "plans.sqlite3"),
+            enabled=config.get("enabled", True),
+        )
+
+    # ------------------------------------------------------------------ #
+    # API pública
+    # ------------------------------------------------------------------ #
+    def lookup(self, objective, namespace="tareas"):
+        """
+        Busca un plan guardado para un objetivo parecido.
+
+        :param objective: Objetivo en lenguaje natural.
+        :param namespace: Formato del plan ('tareas' para los proveedores,
+                          'tasks' para TaskDecomposer).
+        :return: Diccionario con 'plan' (huecos ya rellenados), 'similarity' y
+                 'objective' (el objetivo original del plan), o None.
+        """
+        if not self.enabled:
+            return None
+
+        template, kinds, values = extract_slots(objective)
+        signature = minhash_signature(template)
+        action = _action_of(template)
+
+        with self._lock:
+            self._ensure_loaded()
+            self._counters["lookups"] += 1
+            best, best_similarity = None, 0.0
+            for entry_id in self._candidates(signature):
+                entry = self._entries[entry_id]
+                if entry.namespace != namespace:
+                    continue
+                similarity = signature_similarity(signature, entry.signature)
+                if similarity > best_similarity:
+                    best, best_similarity = entry_id, similarity
+
+            if best is None or best_similarity < self.threshold:
+                self._counters["misses"] += 1
+                return None
+
+            entry = self._entries[best]
+            if not self._compatible(entry, template, action, kinds, values):
+                self._counters["rejected"] += 1
+                self._counters["misses"] += 1
+                return None
+
+            self._entries.move_to_end(best)
+            self._touch(entry.key)
+            self._counters["hits"] += 1
+            plan = entry.plan
+            source = entry.objective
+
+        return {"plan": _bind(plan, values), "similarity": best_similarity, "objective": source}
+
+    def store(self, objective, plan, namespace="tareas"):
+        """
+        Guarda el plan de un objetivo.
+
+        :param objective: Objetivo en lenguaje natural.
+        :param plan: Lista de tareas (diccionarios serializables en JSON).
+        :param namespace: Formato del plan (ver lookup).
+        """
+        if not self.enabled or not plan:
+            return
+
+        template, kinds, values = extract_slots(objective)
+        entry = _Entry(json.dumps([namespace, template, kinds]), namespace, objective, template,
+                       minhash_signature(template), kinds, values, _action_of(template),
+                       _unbind(plan, values))
+        with self._lock:
+            self._ensure_loaded()
+            self._insert(entry)
+            self._counters["stores"] += 1
+            self._disk_put(entry)
+
+    def clear(self):
+        """
+        Elimina todos los planes de memoria y disco.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._by_template.clear()
+            for band in self._bands:
+                band.clear()
+            conn = self._connection()
+            if conn is not None:
+                with conn:
+                    conn.execute("DELETE FROM plans")
+
+    def stats(self):
+        """
+        Devuelve contadores de uso de la caché.
+
+        :return: Diccionario con búsquedas, aciertos, fallos, descartes,
+                 inserciones, expulsiones y número de entradas.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+            lookups = stats["lookups"]
+            stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def close(self):
+        """
+        Cierra la conexión con el archivo SQLite.
+        """
+        with self._lock:
+            self._flush_touched()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ------------------------------------------------------------------ #
+    # Índice en memoria
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def _compatible(entry, template, action, kinds, values):
+        """
+        Decide si el plan de una entrada parecida vale para el nuevo objetivo.
+        """
+        # La acción y los tipos de los huecos deben coincidir
+        if entry.action != action or entry.kinds != kinds:
+            return False
+        # Negaciones, excepciones y unidades no se pueden ignorar
+        if _qualifiers(entry.template) != _qualifiers(template) or \
+                _units(entry.template) != _units(template):
+            return False
+        # Las acciones que modifican el sistema exigen la misma plantilla
+        if action in _DESTRUCTIVE_ACTIONS and entry.template != template:
+            return False
+        # Si un valor aparece fuera de su palabra, solo sirven los mismos valores
+        return entry.exact_slots or list(entry.values) == list(values)
+
+    def _candidates(self, signature):
+        seen = set()
+        for band, index in zip(range(BANDS), self._bands):
+            bucket = index.get(signature[band * _BAND_BYTES:(band + 1) * _BAND_BYTES])
+            if bucket is None:
+                continue
+            if isinstance(bucket, int):
+                seen.add(bucket)
+            else:
+                seen.update(bucket)
+        return seen
+
+    def _insert(self, entry):
+        # Un objetivo con la misma plantilla sustituye al anterior
+        old_id = self._by_template.get(entry.key)
+        if old_id is not None:
+            self._remove(old_id)
+
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = entry
+        self._by_template[entry.key] = entry_id
+        for band, index in enumerate(self._bands):
+            key = entry.signature[band * _BAND_BYTES:(band + 1) * _BAND_BYTES]
+            bucket = index.get(key)
+            # La mayoría de cubos tiene un solo objetivo: se guarda el id sin lista
+            if bucket is None:
+                index[key] = entry_id
+            elif isinstance(bucket, int):
+                index[key] = [bucket, entry_id]
+            else:
+                bucket.append(entry_id)
+
+        while len(self._entries) > self.max_entries:
+            oldest_id = next(iter(self._entries))
+            oldest = self._entries[oldest_id]
+            self._remove(oldest_id)
+            self._counters["evictions"] += 1
+            self._disk_delete(oldest.key)
+
+    def _remove(self, entry_id):
+        entry = self._entries.pop(entry_id)
+        for band, index in enumerate(self._bands):
+            key = entry.signature[band * _BAND_BYTES:(band + 1) * _BAND_BYTES]
+            bucket = index.get(key)
+            if bucket == entry_id:
+                del index[key]
+            elif isinstance(bucket, list):
+                bucket.remove(entry_id)
+                if len(bucket) == 1:
+                    index[key] = bucket[0]
+        if self._by_template.get(entry.key) == entry_id:
+            del self._by_template[entry.key]
+
+    # ------------------------------------------------------------------ #
+    # Persistencia en SQLite
+    # ------------------------------------------------------------------ #
+    def _connection(self):
+        if self.path is None:
+            return None
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS plans ("
+                "template TEXT PRIMARY KEY, objective TEXT NOT NULL, "
+                "plan TEXT NOT NULL, used_at REAL NOT NULL)"
+            )
+        return self._conn
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            conn = self._connection()
+            rows = conn.execute(
+                "SELECT template, objective, plan FROM plans ORDER BY used_at DESC LIMIT ?",
+                (self.max_entries,)).fetchall()
+        except sqlite3.Error:
+            return
+        for key, objective, plan in reversed(rows):
+            self._insert(_Entry.create(key, json.loads(key)[0], objective, json.loads(plan)))
+
+    def _touch(self, key):
+        """
+        Anota un acierto para actualizar su used_at en disco (por lotes).
+        """
+        if self.path is None:
+            return
+        self._touched[key] = time.time()
+        if len(self._touched) >= 32 or time.monotonic() - self._touched_at > 5:
+            self._flush_touched()
+
+    def _flush_touched(self):
+        touched, self._touched = self._touched, {}
+        self._touched_at = time.monotonic()
+        if not touched:
+            return
+        conn = self._connection()
+        try:
+            with conn:
+                conn.executemany("UPDATE plans SET used_at = ? WHERE template = ?",
+                                 [(used_at, key) for key, used_at in touched.items()])
+        except sqlite3.Error:
+            pass
+
+    def _disk_put(self, entry):
+        conn = self._connection()
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO plans VALUES (?, ?, ?, ?)",
+                             (entry.key, entry.objective,
+                              json.dumps(entry.plan, ensure_ascii=False), time.time()))
+        except sqlite3.Error:
+            pass
+
+    def _disk_delete(self, key):
+        conn = self._connection()
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.execute("DELETE FROM plans WHERE template = ?", (key,))
+        except sqlite3.Error:
+            pass
+
+
+_default_plan_cache = None
+_default_lock = threading.Lock()
+
+
+def get_default_plan_cache():
+    """
+    Devuelve la caché de planes compartida por el proceso (según settings.yaml).
+
+    :return: Instancia de PlanCache.
+    """
+    global _default_plan_cache
+    with _default_lock:
+        if _default_plan_cache is None:
+            _default_plan_cache = PlanCache.from_settings()
+        return _default_plan_cache
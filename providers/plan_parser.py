@@ -0,0 +1,305 @@
+"""
+plan_parser.py
+
+Conversión de las respuestas de los modelos en listas de tareas.
+
+Incluye un parser incremental que emite cada comando numerado en cuanto su
+línea está completa, de modo que las tareas pueden empezar a ejecutarse
+mientras el modelo sigue generando el resto del plan, y un parser incremental
+de arrays JSON para las respuestas en modo estructurado.
+"""
+import json
+import re
+
+
+def parse_line(linea):
+    """
+    Interpreta una línea del plan.
+
+    :param linea: Línea de texto generada por el modelo.
+    :return: Tarea con comando si la línea está numerada ("1. comando"), o None.
+    """
+    # Detectar líneas como "1. comando"
+    if '.' in linea[:3]:
+        comando = linea.split('.', 1)[1].strip()
+        return {"tarea": f"Ejecutar: {comando}", "comando": comando}
+    return None
+
+
+def parse_plan(response):
+    """
+    Convierte la respuesta completa del modelo en una lista de tareas.
+
+    Las líneas numeradas se convierten en tareas con comando; si no hay
+    ninguna, cada línea no vacía se convierte en una tarea genérica.
+
+    :param response: Texto devuelto por el modelo.
+    :return: Lista de tareas.
+    """
+    parser = IncrementalPlanParser()
+    tareas = parser.feed(response)
+    tareas.extend(parser.close())
+    return tareas
+
+
+class IncrementalPlanParser:
+    """
+    Parser de planes que se alimenta con fragmentos de texto (tokens).
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._lineas_genericas = []
+        self.comandos_emitidos = 0
+
+    def feed(self, chunk):
+        """
+        Añade un fragmento de texto y devuelve las tareas completadas con él.
+
+        :param chunk: Fragmento de la respuesta del modelo.
+        :return: Lista (posiblemente vacía) de tareas con comando.
+        """
+        self._buffer += chunk
+        tareas = []
+        while '\n' in self._buffer:
+            linea, self._buffer = self._buffer.split('\n', 1)
+            tarea = self._procesar_linea(linea)
+            if tarea is not None:
+                tareas.append(tarea)
+        return tareas
+
+    def close(self):
+        """
+        Procesa el texto pendiente al terminar la generación.
+
+        Si no se ha emitido ningún comando, devuelve las líneas recibidas como
+        tareas genéricas (mismo criterio que parse_plan).
+
+        :return: Lista de tareas pendientes.
+        """
+        tareas = []
+        linea, self._buffer = self._buffer, ""
+        tarea = self._procesar_linea(linea)
+        if tarea is not None:
+            tareas.append(tarea)
+
+        if not self.comandos_emitidos:
+            tareas.extend({"tarea": linea} for linea in self._lineas_genericas)
+        self._lineas_genericas = []
+        return tareas
+
+    def _procesar_linea(self, linea):
+        linea = linea.strip()
+        if not linea:
+            return None
+
+        tarea = parse_line(linea)
+        if tarea is not None:
+            self.comandos_emitidos += 1
+            return tarea
+
+        if not self.comandos_emitidos:
+            self._lineas_genericas.append(linea)
+        return None
+
+
+def parse_json_items(response):
+    """
+    Extrae los elementos del primer array JSON de una respuesta completa.
+
+    :param response: Texto devuelto por el modelo.
+    :return: Lista de elementos (normalmente diccionarios).
+    """
+    parser = IncrementalJSONArrayParser()
+    items = parser.feed(response)
+    items.extend(parser.close())
+    return items
+
+
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_UNQUOTED_KEY_RE = re.compile(r'([{,]\s*)([A-Za-z_][\w-]*)\s*:')
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_PY_LITERAL_RE = re.compile(r"\b(True|False|None)\b")
+
+
+def repair_json(text):
+    """
+    Intenta reparar un elemento JSON mal formado con arreglos baratos: comas
+    finales, claves sin comillas, comillas simples, literales de Python y
+    cadenas o llaves sin cerrar.
+
+    :param text: Texto del elemento.
+    :return: Valor decodificado, o None si no se puede reparar.
+    """
+    candidate = text.strip().rstrip(",")
+    if not candidate:
+        return None
+    candidate = _PY_LITERAL_RE.sub(lambda m: _PY_LITERALS[m.group(1)], candidate)
+    if "'" in candidate:
+        candidate = _double_quote_strings(candidate)
+    candidate = _UNQUOTED_KEY_RE.sub(r'\1"\2":', candidate)
+    candidate = _close_open_structures(candidate)
+    candidate = _TRAILING_COMMA_RE.sub(r"\1", candidate)
+    try:
+        return json.loads(candidate)
+    except ValueError:
+        return None
+
+
+def _double_quote_strings(text):
+    # Convierte las cadenas entre comillas simples que están fuera de una
+    # cadena JSON; los apóstrofos dentro de "..." (p. ej. grep '^x') se respetan
+    out = []
+    quote = None
+    escape = False
+    for char in text:
+        if quote:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == quote:
+                quote = None
+                char = '"'
+            elif char == '"':
+                char = '\\"'
+        elif char in "'\"":
+            quote = char
+            char = '"'
+        out.append(char)
+    return "".join(out)
+
+
+def _close_open_structures(text):
+    stack = []
+    in_string = False
+    escape = False
+    for char in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+    if in_string:
+        text += '"'
+    return text + "".join(reversed(stack))
+
+
+class IncrementalJSONArrayParser:
+    """
+    Parser de un array JSON que se alimenta con fragmentos de texto y devuelve
+    cada elemento en cuanto se cierra.
+
+    Ignora el texto previo al primer '[' (explicaciones, bloques ```json o un
+    objeto envolvente como {"tasks": [...]}), de modo que sirve tanto para el
+    modo JSON de OpenAI como para la respuesta con prefill de Claude.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._item_start = None
+        self._done = False
+        self.items = 0
+        self.repaired = 0
+        self.dropped = 0
+
+    def feed(self, chunk):
+        """
+        Añade un fragmento y devuelve los elementos completados con él.
+
+        :param chunk: Fragmento de la respuesta del modelo.
+        :return: Lista (posiblemente vacía) de elementos decodificados.
+        """
+        self.text += chunk
+        items = []
+        text = self.text
+        while self._pos < len(text) and not self._done:
+            char = text[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                if self._depth >= 1:
+                    self._in_string = True
+                    if self._depth == 1 and self._item_start is None:
+                        self._item_start = self._pos
+            elif char == "[" or char == "{":
+                if self._depth == 0:
+                    if char == "[":
+                        self._depth = 1
+                elif self._depth == 1:
+                    self._item_start = self._pos if self._item_start is None else self._item_start
+                    self._depth += 1
+                else:
+                    self._depth += 1
+            elif char == "]" or char == "}":
+                if self._depth == 1:
+                    if char == "]":
+                        self._emit(self._pos, items)
+                        self._done = True
+                elif self._depth > 1:
+                    self._depth -= 1
+                    if self._depth == 1:
+                        self._emit(self._pos + 1, items)
+            elif char == "," and self._depth == 1:
+                self._emit(self._pos, items)
+            elif self._depth == 1 and self._item_start is None and not char.isspace():
+                # Escalares sin comillas (números, true, etc.)
+                self._item_start = self._pos
+            self._pos += 1
+        return items
+
+    def close(self):
+        """
+        Procesa el elemento pendiente si la respuesta se cortó a medias
+        (p. ej. por max_tokens), reparándolo si es posible. Si el corte cae
+        dentro de una cadena el elemento se descarta.
+
+        :return: Lista con el elemento recuperado o vacía.
+        """
+        items = []
+        if not self._done and self._depth >= 1:
+            if self._in_string:
+                # Cortado dentro de una cadena: el valor (p. ej. un comando)
+                # estaría incompleto, así que el elemento se descarta
+                if self._item_start is not None:
+                    self.dropped += 1
+                self._item_start = None
+            else:
+                self._emit(len(self.text), items)
+        self._done = True
+        return items
+
+    def _emit(self, end, items):
+        start, self._item_start = self._item_start, None
+        if start is None:
+            return
+        raw = self.text[start:end].strip()
+        if not raw:
+            return
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            value = repair_json(raw)
+            if value is None:
+                self.dropped += 1
+                return
+            self.repaired += 1
+        self.items += 1
+        items.append(value)
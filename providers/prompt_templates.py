@@ -2,7 +2,55 @@
 prompt_templates.py
 
 Este módulo contiene plantillas de prompts reutilizables para los proveedores.
+
+Los prompts de generación de tareas se dividen en un prefijo estático
+(instrucciones, idéntico en todas las peticiones) y un sufijo dinámico
+(objetivo y contexto). Los proveedores envían el prefijo como mensaje de
+sistema para aprovechar la caché de prompts de la API.
 """
+from .context_packer import ContextPacker
+
+# Prefijo estático de los prompts de generación de tareas. No debe contener
+# nada que dependa de la petición: cualquier cambio invalida la caché.
+TASK_SYSTEM_PROMPT = (
+    "Actúa como un experto en sistemas Linux y un asistente técnico que genera "
+    "comandos precisos para ejecutar en una terminal.\n\n"
+    "Reglas:\n"
+    "- Genera una lista de MÁXIMO 4 comandos de terminal ejecutables que cumplan "
+    "con el objetivo del usuario.\n"
+    "- No expliques qué hacen los comandos, solo lístalos.\n"
+    "- Cada comando debe ser ejecutable directamente en una terminal Linux.\n"
+    "- Para objetivos simples, un solo comando es preferible.\n\n"
+    "Según el tipo de petición:\n"
+    "- Información del sistema: muestra información del host, CPU, memoria RAM, "
+    "uso de disco y versión del sistema operativo. Usa comandos como hostnamectl, "
+    "lscpu, free, df, etc. Preferiblemente en un solo comando con && para encadenarlos.\n"
+    "- Abrir o ejecutar aplicaciones: genera comandos que funcionen para la mayoría "
+    "de distribuciones Linux. Si es un navegador, considera alternativas como "
+    "sensible-browser.\n"
+    "- Archivos o directorios: realiza la operación solicitada de manera segura. "
+    "Verifica la existencia de archivos/directorios cuando sea necesario y añade "
+    "confirmación del resultado cuando sea posible.\n\n"
+    "Ejemplo de formato:\n"
+    "1. comando 1\n"
+    "2. comando 2\n"
+)
+
+# Tipos de petición (palabras clave del objetivo -> etiqueta del prompt)
+_OBJECTIVE_KINDS = [
+    (("info sistema", "información sistema"), "información del sistema"),
+    (("abre", "abrir", "ejecuta", "ejecutar"), "abrir o ejecutar aplicaciones"),
+    (("archivo", "carpeta", "directorio", "crear"), "archivos o directorios"),
+]
+
+
+def _context_text(context, objective=""):
+    # El contexto ya empaquetado llega como texto; cualquier otro valor se
+    # empaqueta con el presupuesto por defecto para no desbordar el prompt
+    if isinstance(context, str):
+        return context
+    return ContextPacker().pack(context, objective)["text"]
+
 
 class PromptTemplates:
     """
@@ -17,28 +65,59 @@ class PromptTemplates:
         :param objective: Descripción del objetivo.
         :return: Cadena con el prompt generado.
         """
+        context = _context_text(context, objective)
         return f"Contexto: {context}\n\nObjetivo: {objective}\n\nPor favor, genera una respuesta adecuada."
 
+    @staticmethod
+    def objective_kind(objective):
+        """
+        Clasifica el objetivo según las palabras clave que contiene.
+
+        :param objective: Descripción del objetivo.
+        :return: Etiqueta del tipo de petición ('general' si no encaja en ninguno).
+        """
+        objective = objective.lower()
+        for keywords, kind in _OBJECTIVE_KINDS:
+            if any(keyword in objective for keyword in keywords):
+                return kind
+        return "general"
+
+    @staticmethod
+    def task_generation_parts(objective, constraints):
+        """
+        Genera el prompt de creación de tareas dividido en prefijo estático y
+        sufijo dinámico.
+
+        :param objective: Descripción del objetivo.
+        :param constraints: Restricciones o contexto para las tareas (texto ya
+                            empaquetado o datos a empaquetar).
+        :return: Diccionario con 'system' (prefijo estático, TASK_SYSTEM_PROMPT)
+                 y 'prompt' (tipo de petición, objetivo y contexto).
+        """
+        constraints = _context_text(constraints, objective)
+        contexto = f"\n\nContexto disponible:\n{constraints}" if constraints else ""
+        return {
+            "system": TASK_SYSTEM_PROMPT,
+            "prompt": (
+                f"Objetivo del usuario: {objective}\n"
+                f"Tipo de petición: {PromptTemplates.objective_kind(objective)}"
+                f"{contexto}"
+            ),
+        }
+
     @staticmethod
     def task_generation_prompt(objective, constraints):
         """
-        Genera un prompt para la creación de tareas basado en un objetivo y restricciones.
+        Genera un prompt para la creación de tareas basado en un objetivo y
+        restricciones, como un único texto (prefijo estático + sufijo dinámico).
 
         :param objective: Descripción del objetivo.
-        :param constraints: Restricciones o condiciones para las tareas.
+        :param constraints: Restricciones o contexto para las tareas (texto ya
+                            empaquetado o datos a empaquetar).
         :return: Cadena con el prompt generado.
         """
-        return (
-            f"Actúa como un asistente técnico que genera comandos precisos para ejecutar en Linux.\n\n"
-            f"Objetivo del usuario: {objective}\n\n"
-            f"Genera una lista de MÁXIMO 4 comandos de terminal ejecutables que cumplan con este objetivo. "
-            f"No expliques qué hacen los comandos, solo lístalos. "
-            f"Cada comando debe ser ejecutable directamente en una terminal Linux. "
-            f"Para objetivos simples, un solo comando es preferible.\n\n"
-            f"Ejemplo de formato:\n"
-            f"1. comando 1\n"
-            f"2. comando 2\n"
-        )
+        parts = PromptTemplates.task_generation_parts(objective, constraints)
+        return f"{parts['system']}\n{parts['prompt']}\n"
 
     @staticmethod
     def evaluation_prompt(task, result):
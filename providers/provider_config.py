@@ -0,0 +1,109 @@
+"""
+provider_config.py
+
+Lectura de la configuración de proveedores desde config/settings.yaml.
+"""
+import os
+
+from config.settings import load_settings
+
+_settings_cache = None
+_environment_loaded = False
+
+
+def load_environment():
+    """
+    Carga (una sola vez) las variables del archivo .env.
+
+    Se llama desde la inicialización de los proveedores y de main.py en lugar
+    de hacerlo al importar los módulos.
+    """
+    global _environment_loaded
+    if _environment_loaded:
+        return
+    from dotenv import load_dotenv
+    load_dotenv()
+    _environment_loaded = True
+
+
+def load_settings_file():
+    """
+    Carga (una sola vez) el archivo de configuración del proyecto.
+
+    La búsqueda y la lectura las hace config.settings.load_settings (variable
+    AGENT_SETTINGS, config/settings.yaml en el directorio actual o junto al
+    paquete). Si no existe ningún archivo se devuelve un diccionario vacío.
+
+    :return: Diccionario con la configuración.
+    """
+    global _settings_cache
+    if _settings_cache is None:
+        _settings_cache = load_settings(create_default=False)
+    return _settings_cache
+
+
+def user_cache_dir():
+    """
+    Devuelve el directorio de caché del usuario para el agente.
+
+    Es AGENT_CACHE_DIR si está definida y, si no, agent-general dentro de
+    XDG_CACHE_HOME (por defecto ~/.cache).
+
+    :return: Ruta absoluta del directorio (puede no existir todavía).
+    """
+    base = os.getenv("AGENT_CACHE_DIR")
+    if base:
+        return os.path.abspath(os.path.expanduser(base))
+    root = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(os.path.abspath(root), "agent-general")
+
+
+def resolve_cache_path(path):
+    """
+    Resuelve la ruta de un archivo de caché.
+
+    Las rutas relativas se toman dentro de user_cache_dir(), de modo que la
+    caché es la misma se lance el agente desde donde se lance.
+
+    :param path: Ruta del archivo (absoluta, relativa o con ~). None se devuelve tal cual.
+    :return: Ruta absoluta del archivo o None.
+    """
+    if path is None:
+        return None
+    path = os.path.expanduser(path)
+    if os.path.isabs(path):
+        return path
+    return os.path.join(user_cache_dir(), path)
+
+
+def get_section(name, default=None):
+    """
+    Devuelve una sección de primer nivel de la configuración.
+
+    :param name: Nombre de la sección (p. ej. 'cache').
+    :param default: Valor por defecto si la sección no existe.
+    :return: Diccionario con la sección.
+    """
+    value = load_settings_file().get(name)
+    if value is None:
+        return dict(default or {})
+    return value
+
+
+def get_provider_settings(provider_name):
+    """
+    Devuelve la configuración de un proveedor concreto (sección providers.<nombre>).
+
+    :param provider_name: Nombre del proveedor ('openai', 'claude', ...).
+    :return: Diccionario con la configuración del proveedor.
+    """
+    providers = load_settings_file().get("providers") or {}
+    return providers.get(provider_name) or {}
+
+
+def reset_settings_cache():
+    """
+    Olvida la configuración cargada (útil en pruebas o tras editar el archivo).
+    """
+    global _settings_cache
+    _settings_cache = None
@@ -0,0 +1,180 @@
+"""
+rate_limiter.py
+
+Limitador de peticiones y tokens por minuto compartido por proveedor.
+
+Cada proveedor tiene un único RateLimiter por proceso (ver get_rate_limiter),
+de modo que todos los hilos y corrutinas que lo usan respetan juntos la cuota
+de la API en lugar de saturarla y recibir errores 429.
+"""
+import asyncio
+import threading
+import time
+
+from .context_packer import estimate_tokens
+from .key_pool import configured_api_keys
+from .provider_config import get_provider_settings
+
+
+def estimate_request_tokens(prompt, max_tokens):
+    """
+    Estimación barata de los tokens que consumirá una petición.
+
+    :param prompt: Prompt enviado.
+    :param max_tokens: Máximo de tokens de la respuesta.
+    :return: Número estimado de tokens (prompt + respuesta).
+    """
+    return estimate_tokens(prompt) + (max_tokens or 0)
+
+
+class TokenBucket:
+    """
+    Cubo de tokens con reservas: quien reserva más de lo disponible recibe el
+    tiempo que debe esperar y el saldo queda negativo hasta que se recarga.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        """
+        :param rate_per_minute: Unidades que se recargan por minuto.
+        :param capacity: Ráfaga máxima (por defecto, un minuto de cuota).
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+
+    def reserve(self, amount, now):
+        """
+        Reserva unidades del cubo.
+
+        :param amount: Unidades a consumir.
+        :param now: Instante actual (time.monotonic()).
+        :return: Segundos que hay que esperar antes de usar la reserva.
+        """
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= min(amount, self.capacity)
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.rate
+
+
+class RateLimiter:
+    """
+    Limita peticiones/minuto y tokens/minuto y contabiliza el tiempo de espera.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        """
+        :param requests_per_minute: Cuota de peticiones por minuto (None = sin límite).
+        :param tokens_per_minute: Cuota de tokens por minuto (None = sin límite).
+        """
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._lock = threading.Lock()
+        self._counters = {
+            "requests": 0,
+            "throttled_requests": 0,
+            "throttled_seconds": 0.0,
+            "retries": 0,
+            "backoff_seconds": 0.0,
+        }
+
+    @classmethod
+    def from_settings(cls, provider_name):
+        """
+        Crea el limitador a partir de providers.<nombre>.rate_limit en settings.yaml.
+
+        La cuota configurada es la de una clave de API; con un pool de claves
+        (ver key_pool) se multiplica por el número de claves.
+
+        :param provider_name: Nombre del proveedor.
+        :return: Instancia de RateLimiter.
+        """
+        config = get_provider_settings(provider_name).get("rate_limit") or {}
+        keys = max(1, len(configured_api_keys(provider_name)))
+        requests_per_minute = config.get("requests_per_minute")
+        tokens_per_minute = config.get("tokens_per_minute")
+        return cls(
+            requests_per_minute=requests_per_minute * keys if requests_per_minute else None,
+            tokens_per_minute=tokens_per_minute * keys if tokens_per_minute else None,
+        )
+
+    def reserve(self, tokens=0):
+        """
+        Reserva cupo para una petición.
+
+        :param tokens: Tokens estimados de la petición.
+        :return: Segundos que hay que esperar antes de enviarla.
+        """
+        with self._lock:
+            now = time.monotonic()
+            delay = 0.0
+            if self._requests is not None:
+                delay = max(delay, self._requests.reserve(1, now))
+            if self._tokens is not None and tokens:
+                delay = max(delay, self._tokens.reserve(tokens, now))
+
+            self._counters["requests"] += 1
+            if delay > 0:
+                self._counters["throttled_requests"] += 1
+                self._counters["throttled_seconds"] += delay
+            return delay
+
+    def acquire(self, tokens=0):
+        """
+        Espera (bloqueando el hilo) hasta que haya cupo para la petición.
+
+        :param tokens: Tokens estimados de la petición.
+        """
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def aacquire(self, tokens=0):
+        """
+        Versión asíncrona de acquire.
+
+        :param tokens: Tokens estimados de la petición.
+        """
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def record_backoff(self, seconds):
+        """
+        Registra un reintento y el tiempo de espera asociado.
+
+        :param seconds: Segundos de espera antes del reintento.
+        """
+        with self._lock:
+            self._counters["retries"] += 1
+            self._counters["backoff_seconds"] += seconds
+
+    def stats(self):
+        """
+        Devuelve los contadores del limitador.
+
+        :return: Diccionario con peticiones, esperas y reintentos.
+        """
+        with self._lock:
+            return dict(self._counters)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider_name):
+    """
+    Devuelve el limitador compartido de un proveedor, creándolo si no existe.
+
+    :param provider_name: Nombre del proveedor ('openai', 'claude', ...).
+    :return: Instancia de RateLimiter.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(provider_name)
+        if limiter is None:
+            limiter = RateLimiter.from_settings(provider_name)
+            _limiters[provider_name] = limiter
+        return limiter
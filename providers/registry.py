@@ -0,0 +1,74 @@
+# providers/registry.py
+"""
+Registro de proveedores con carga perezosa.
+
+Cada proveedor se registra con la ruta de su módulo y el nombre de su clase;
+el módulo (y sus dependencias, como el SDK de OpenAI o requests) solo se
+importa la primera vez que se pide la clase.
+"""
+import importlib
+import threading
+
+_REGISTRY = {
+    "openai": ("providers.openai_provider", "OpenAIProvider"),
+    "claude": ("providers.claude_provider", "ClaudeProvider"),
+    "fake": ("providers.fake_provider", "FakeLLMProvider"),
+    "router": ("providers.router_provider", "RouterProvider"),
+}
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+def register_provider(name, module_path, class_name):
+    """
+    Registra (o reemplaza) un proveedor.
+
+    :param name: Nombre corto del proveedor ('openai', 'claude', ...).
+    :param module_path: Ruta del módulo que define la clase.
+    :param class_name: Nombre de la clase dentro del módulo.
+    """
+    with _lock:
+        _REGISTRY[name] = (module_path, class_name)
+        _loaded.pop(name, None)
+
+
+def available_providers():
+    """
+    Devuelve los nombres de los proveedores registrados.
+
+    :return: Lista de nombres.
+    """
+    return sorted(_REGISTRY)
+
+
+def get_provider_class(name):
+    """
+    Devuelve la clase de un proveedor, importando su módulo si hace falta.
+
+    :param name: Nombre corto del proveedor.
+    :return: Clase del proveedor.
+    """
+    with _lock:
+        cls = _loaded.get(name)
+        if cls is not None:
+            return cls
+        if name not in _REGISTRY:
+            raise ValueError(f"Proveedor desconocido: {name}")
+        module_path, class_name = _REGISTRY[name]
+
+    cls = getattr(importlib.import_module(module_path), class_name)
+    with _lock:
+        _loaded[name] = cls
+    return cls
+
+
+def create_provider(name, **kwargs):
+    """
+    Crea una instancia de un proveedor registrado.
+
+    :param name: Nombre corto del proveedor.
+    :param kwargs: Argumentos para el constructor del proveedor.
+    :return: Instancia del proveedor.
+    """
+    return get_provider_class(name)(**kwargs)
@@ -0,0 +1,279 @@
+"""
+response_cache.py
+
+Caché persistente de respuestas de los proveedores de IA.
+
+Combina una LRU en memoria (aciertos en microsegundos) con un almacén en disco
+basado en SQLite que sobrevive entre ejecuciones. Ambos niveles aplican TTL y
+expulsión por tamaño.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .provider_config import get_section, resolve_cache_path
+
+
+def make_cache_key(namespace, prompt, model, max_tokens, temperature, **params):
+    """
+    Construye una clave determinista para una petición de generación.
+
+    :param namespace: Espacio de nombres (normalmente el nombre del proveedor).
+    :param prompt: Prompt enviado al modelo.
+    :param model: Modelo utilizado.
+    :param max_tokens: Máximo de tokens solicitados.
+    :param temperature: Temperatura de muestreo.
+    :param params: Otros parámetros que alteran la respuesta.
+    :return: Hash SHA-256 en hexadecimal.
+    """
+    payload = {
+        "namespace": namespace,
+        "prompt": prompt,
+        "model": model,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "params": params,
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Caché de dos niveles (memoria + disco) para respuestas de texto.
+    """
+
+    def __init__(self, path="responses.sqlite3", ttl=86400,
+                 memory_entries=256, max_disk_entries=10000, enabled=True):
+        """
+        Inicializa la caché.
+
+        :param path: Ruta del archivo SQLite; las relativas se toman dentro del
+                     directorio de caché del usuario (ver provider_config.user_cache_dir).
+                     None desactiva el nivel en disco.
+        :param ttl: Tiempo de vida de cada entrada en segundos (None = sin caducidad).
+        :param memory_entries: Número máximo de entradas en la LRU en memoria.
+        :param max_disk_entries: Número máximo de entradas en disco.
+        :param enabled: Si es False la caché nunca devuelve ni guarda nada.
+        """
+        self.path = resolve_cache_path(path)
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.enabled = enabled
+
+        self._memory = OrderedDict()
+        self._lock = threading.RLock()
+        self._conn = None
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    @classmethod
+    def from_settings(cls):
+        """
+        Crea una caché a partir de la sección 'cache' de config/settings.yaml.
+
+        :return: Instancia de ResponseCache.
+        """
+        config = get_section("cache")
+        return cls(
+            path=config.get("path", "responses.sqlite3"),
+            ttl=config.get("ttl_seconds", 86400),
+            memory_entries=config.get("memory_entries", 256),
+            max_disk_entries=config.get("max_disk_entries", 10000),
+            enabled=config.get("enabled", True),
+        )
+
+    # ------------------------------------------------------------------ #
+    # API pública
+    # ------------------------------------------------------------------ #
+    def get(self, key):
+        """
+        Busca una respuesta en la caché.
+
+        :param key: Clave generada con make_cache_key.
+        :return: Texto almacenado o None si no existe o ha caducado.
+        """
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._counters["hits"] += 1
+                    self._counters["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+                self._counters["expirations"] += 1
+
+            value, expires_at = self._disk_get(key, now)
+            if value is not None:
+                self._memory_put(key, value, expires_at)
+                self._counters["hits"] += 1
+                self._counters["disk_hits"] += 1
+                return value
+
+            self._counters["misses"] += 1
+            return None
+
+    def set(self, key, value):
+        """
+        Guarda una respuesta en ambos niveles de la caché.
+
+        :param key: Clave generada con make_cache_key.
+        :param value: Texto a guardar.
+        """
+        if not self.enabled or value is None:
+            return
+
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+        with self._lock:
+            self._memory_put(key, value, expires_at)
+            self._disk_set(key, value, now, expires_at)
+            self._counters["stores"] += 1
+
+    def clear(self):
+        """
+        Elimina todas las entradas de la caché (memoria y disco).
+        """
+        with self._lock:
+            self._memory.clear()
+            conn = self._connection()
+            if conn is not None:
+                conn.execute("DELETE FROM responses")
+                conn.commit()
+
+    def stats(self):
+        """
+        Devuelve los contadores de uso de la caché.
+
+        :return: Diccionario con aciertos, fallos, expulsiones, etc.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+            stats["memory_size"] = len(self._memory)
+            return stats
+
+    def close(self):
+        """
+        Cierra la conexión con el almacén en disco.
+        """
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ------------------------------------------------------------------ #
+    # Nivel en memoria
+    # ------------------------------------------------------------------ #
+    def _memory_put(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    # ------------------------------------------------------------------ #
+    # Nivel en disco
+    # ------------------------------------------------------------------ #
+    def _connection(self):
+        if self.path is None:
+            return None
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _disk_get(self, key, now):
+        conn = self._connection()
+        if conn is None:
+            return None, None
+
+        row = conn.execute(
+            "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None, None
+
+        value, expires_at = row
+        if expires_at is not None and expires_at <= now:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            conn.commit()
+            self._counters["expirations"] += 1
+            return None, None
+
+        conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        conn.commit()
+        return value, expires_at
+
+    def _disk_set(self, key, value, now, expires_at):
+        conn = self._connection()
+        if conn is None:
+            return
+
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at)"
+            " VALUES (?, ?, ?, ?)",
+            (key, value, expires_at, now),
+        )
+        conn.execute(
+            "DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+        )
+        count = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,),
+            )
+            self._counters["evictions"] += overflow
+        conn.commit()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """
+    Devuelve la caché compartida por todos los proveedores del proceso.
+
+    :return: Instancia de ResponseCache configurada desde settings.yaml.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache.from_settings()
+        return _default_cache
@@ -0,0 +1,118 @@
+"""
+retry.py
+
+Reintentos con backoff exponencial y jitter para las llamadas a los proveedores.
+"""
+import email.utils
+import random
+import time
+
+from .provider_config import get_provider_settings
+
+# Códigos HTTP que indican un error transitorio
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+class ProviderHTTPError(RuntimeError):
+    """
+    Error de una llamada HTTP a un proveedor.
+
+    Conserva el código de estado y la cabecera Retry-After para que la política
+    de reintentos pueda decidir si y cuándo repetir la petición, y las
+    cabeceras de la respuesta para seguir la cuota de la clave (ver key_pool).
+    """
+
+    def __init__(self, message, status_code=None, retry_after=None, retryable=None,
+                 headers=None):
+        """
+        :param message: Mensaje de error.
+        :param status_code: Código HTTP de la respuesta (None si no hubo respuesta).
+        :param retry_after: Segundos indicados por el servidor en Retry-After.
+        :param retryable: Fuerza si el error es reintentable; por defecto se deduce
+                          del código de estado (sin código = error de conexión).
+        :param headers: Cabeceras de la respuesta (None si no hubo respuesta).
+        """
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.headers = headers
+        if retryable is None:
+            retryable = status_code is None or status_code in RETRYABLE_STATUS_CODES
+        self.retryable = retryable
+
+
+def parse_retry_after(value):
+    """
+    Interpreta el valor de una cabecera Retry-After.
+
+    :param value: Segundos o fecha HTTP.
+    :return: Segundos a esperar, o None si el valor no es válido.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        fecha = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if fecha is None:
+        return None
+    return max(0.0, fecha.timestamp() - time.time())
+
+
+class RetryPolicy:
+    """
+    Política de reintentos: backoff exponencial con jitter que respeta Retry-After.
+    """
+
+    def __init__(self, max_retries=3, base_delay=0.5, max_delay=30.0, jitter=0.5):
+        """
+        :param max_retries: Número máximo de reintentos (0 = sin reintentos).
+        :param base_delay: Espera base del primer reintento en segundos.
+        :param max_delay: Espera máxima entre reintentos en segundos.
+        :param jitter: Fracción aleatoria (0-1) aplicada a cada espera.
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    @classmethod
+    def from_settings(cls, provider_name):
+        """
+        Crea la política a partir de providers.<nombre>.retry en settings.yaml.
+
+        :param provider_name: Nombre del proveedor.
+        :return: Instancia de RetryPolicy.
+        """
+        config = get_provider_settings(provider_name).get("retry") or {}
+        return cls(
+            max_retries=config.get("max_retries", 3),
+            base_delay=config.get("base_delay", 0.5),
+            max_delay=config.get("max_delay", 30.0),
+            jitter=config.get("jitter", 0.5),
+        )
+
+    def next_delay(self, attempt, error):
+        """
+        Calcula la espera antes del siguiente intento.
+
+        :param attempt: Número de reintentos ya realizados.
+        :param error: Excepción producida por el último intento.
+        :return: Segundos a esperar, o None si no se debe reintentar.
+        """
+        if attempt >= self.max_retries:
+            return None
+        if not isinstance(error, ProviderHTTPError) or not error.retryable:
+            return None
+
+        if error.retry_after is not None:
+            # El servidor sabe cuándo habrá cupo: se respeta su indicación
+            return min(error.retry_after, self.max_delay)
+
+        delay = min(self.base_delay * (2 ** attempt), self.max_delay)
+        return delay * (1 - self.jitter * random.random())
@@ -0,0 +1,420 @@
+# providers/router_provider.py
+"""
+Proveedor enrutador que reparte las peticiones entre varios proveedores.
+
+Políticas disponibles:
+- fallback: usa el primer proveedor y pasa al siguiente si falla.
+- hedged: si el primero no responde antes de su p95 de latencia, lanza la misma
+  petición al siguiente; gana la primera respuesta correcta. Si todos los
+  proveedores tienen cliente asíncrono nativo la petición perdedora se cancela
+  (también desde generate_text, que ejecuta la versión asíncrona con
+  run_sync); si no, la perdedora termina en segundo plano y se descarta.
+- weighted: reparte la carga al azar según pesos, con fallback ante errores.
+
+En todas ellas los proveedores con el circuito abierto (ver circuit_breaker.py)
+pasan al final del orden, de modo que no se espera a un proveedor degradado.
+"""
+import asyncio
+import concurrent.futures
+import random
+import threading
+import time
+from collections import deque
+
+from .async_utils import run_sync
+from .base_provider import ProviderBase
+from .circuit_breaker import CircuitBreaker
+from .key_pool import configured_api_keys
+from .provider_config import get_provider_settings, load_environment
+from .rate_limiter import RateLimiter
+from .response_cache import ResponseCache
+from .retry import RetryPolicy
+
+
+class RouterProvider(ProviderBase):
+    provider_name = "router"
+    POLICIES = ("fallback", "hedged", "weighted")
+
+    def __init__(self, backends, policy="fallback", weights=None, hedge_delay=None,
+                 default_hedge_delay=2.0, min_samples=20, cache=None, plan_cache=None):
+        """
+        Inicializa el enrutador.
+
+        :param backends: Lista de proveedores (ProviderBase) en orden de preferencia.
+        :param policy: 'fallback', 'hedged' o 'weighted'.
+        :param weights: Pesos para la política 'weighted' (mismo orden que backends).
+        :param hedge_delay: Espera fija antes de lanzar la petición de respaldo.
+                            Si es None se usa el p95 de latencia del proveedor.
+        :param default_hedge_delay: Espera usada mientras no hay muestras suficientes.
+        :param min_samples: Muestras de latencia necesarias para usar el p95.
+        :param cache: Caché propia del enrutador. Por defecto desactivada, ya que
+                      cada proveedor subyacente tiene la suya.
+        :param plan_cache: Caché de planes (por defecto la compartida).
+        """
+        if not backends:
+            raise ValueError("Se necesita al menos un proveedor")
+        if policy not in self.POLICIES:
+            raise ValueError(f"Política desconocida: {policy}")
+
+        # La cuota, los reintentos y el cortacircuitos los gestiona cada
+        # proveedor subyacente
+        super().__init__(cache=cache or ResponseCache(path=None, enabled=False),
+                         rate_limiter=RateLimiter(), retry_policy=RetryPolicy(max_retries=0),
+                         plan_cache=plan_cache,
+                         circuit_breaker=CircuitBreaker("router", enabled=False))
+        self.backends = list(backends)
+        self.policy = policy
+        self.weights = list(weights) if weights else [1.0] * len(self.backends)
+        self.hedge_delay = hedge_delay
+        self.default_hedge_delay = default_hedge_delay
+        self.min_samples = min_samples
+
+        self._latencies = [deque(maxlen=200) for _ in self.backends]
+        self._lock = threading.Lock()
+        self._pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(4, 4 * len(self.backends)), thread_name_prefix="router")
+        self._counters = {
+            "requests": 0,
+            "fallbacks": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "circuit_skips": 0,
+            "errors": [0] * len(self.backends),
+            "wins": [0] * len(self.backends),
+        }
+
+    @property
+    def cache_namespace(self):
+        return "router:" + ",".join(b.cache_namespace for b in self.backends)
+
+    # ------------------------------------------------------------------ #
+    # Generación síncrona
+    # ------------------------------------------------------------------ #
+    def _generate_text(self, prompt, model, max_tokens, temperature, **kwargs):
+        self._count("requests")
+        params = dict(kwargs, model=model, max_tokens=max_tokens, temperature=temperature)
+        if self.policy == "hedged" and len(self.backends) > 1:
+            if all(_has_native_async(backend) for backend in self.backends):
+                # Cancelar una tarea asyncio corta de verdad la petición HTTP perdedora
+                return run_sync(self._agenerate_hedged(prompt, params))
+            return self._generate_hedged(prompt, params)
+        return self._generate_in_order(self._order(), prompt, params)
+
+    def _generate_in_order(self, order, prompt, params):
+        last_error = None
+        for position, idx in enumerate(order):
+            if position:
+                self._count("fallbacks")
+            try:
+                return self._timed_call(idx, prompt, params)
+            except Exception as e:
+                last_error = e
+        raise RuntimeError(f"Failed to generate text: todos los proveedores fallaron: {last_error}")
+
+    def _generate_hedged(self, prompt, params):
+        """
+        Versión con hilos de la política hedged, para proveedores sin cliente
+        asíncrono: un hilo no se puede interrumpir, así que la petición
+        perdedora sigue hasta terminar (y consume cuota) y su resultado se
+        descarta.
+        """
+        order = self._order()
+        pending = {}
+        last_error = None
+        next_position = 0
+
+        def launch():
+            nonlocal next_position
+            idx = order[next_position]
+            next_position += 1
+            pending[self._pool.submit(self._timed_call, idx, prompt, params)] = idx
+
+        launch()
+        while pending:
+            # Mientras queden proveedores de respaldo, esperar solo hasta el p95
+            timeout = self._hedge_delay(order[next_position - 1]) if next_position < len(order) else None
+            done, _ = concurrent.futures.wait(pending, timeout=timeout,
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
+            if not done:
+                self._count("hedges")
+                launch()
+                continue
+
+            for future in done:
+                idx = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    if next_position < len(order) and not pending:
+                        self._count("fallbacks")
+                        launch()
+                    continue
+
+                if idx != order[0]:
+                    self._count("hedge_wins")
+                # Solo se evita la petición perdedora si aún no empezó
+                for loser in pending:
+                    loser.cancel()
+                return result
+
+        raise RuntimeError(f"Failed to generate text: todos los proveedores fallaron: {last_error}")
+
+    def _timed_call(self, idx, prompt, params):
+        start = time.monotonic()
+        try:
+            result = self.backends[idx].generate_text(prompt, **params)
+        except Exception:
+            with self._lock:
+                self._counters["errors"][idx] += 1
+            raise
+        with self._lock:
+            self._latencies[idx].append(time.monotonic() - start)
+            self._counters["wins"][idx] += 1
+        return result
+
+    # ------------------------------------------------------------------ #
+    # Generación asíncrona
+    # ------------------------------------------------------------------ #
+    async def _agenerate_text(self, prompt, model, max_tokens, temperature, **kwargs):
+        self._count("requests")
+        params = dict(kwargs, model=model, max_tokens=max_tokens, temperature=temperature)
+        if self.policy == "hedged" and len(self.backends) > 1:
+            return await self._agenerate_hedged(prompt, params)
+        last_error = None
+        for position, idx in enumerate(self._order()):
+            if position:
+                self._count("fallbacks")
+            try:
+                return await self._atimed_call(idx, prompt, params)
+            except Exception as e:
+                last_error = e
+        raise RuntimeError(f"Failed to generate text: todos los proveedores fallaron: {last_error}")
+
+    async def _agenerate_hedged(self, prompt, params):
+        order = self._order()
+        pending = {}
+        last_error = None
+        next_position = 0
+
+        def launch():
+            nonlocal next_position
+            idx = order[next_position]
+            next_position += 1
+            task = asyncio.ensure_future(self._atimed_call(idx, prompt, params))
+            pending[task] = idx
+
+        launch()
+        try:
+            while pending:
+                timeout = self._hedge_delay(order[next_position - 1]) if next_position < len(order) else None
+                done, _ = await asyncio.wait(pending, timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self._count("hedges")
+                    launch()
+                    continue
+
+                for task in done:
+                    idx = pending.pop(task)
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        if next_position < len(order) and not pending:
+                            self._count("fallbacks")
+                            launch()
+                        continue
+                    if idx != order[0]:
+                        self._count("hedge_wins")
+                    return task.result()
+        finally:
+            # Cancelar las peticiones perdedoras que sigan en vuelo
+            for task in pending:
+                task.cancel()
+
+        raise RuntimeError(f"Failed to generate text: todos los proveedores fallaron: {last_error}")
+
+    async def _atimed_call(self, idx, prompt, params):
+        start = time.monotonic()
+        try:
+            result = await self.backends[idx].agenerate_text(prompt, **params)
+        except Exception:
+            with self._lock:
+                self._counters["errors"][idx] += 1
+            raise
+        with self._lock:
+            self._latencies[idx].append(time.monotonic() - start)
+            self._counters["wins"][idx] += 1
+        return result
+
+    # ------------------------------------------------------------------ #
+    # Streaming
+    # ------------------------------------------------------------------ #
+    def _stream_text(self, prompt, model, max_tokens, temperature, **kwargs):
+        params = dict(kwargs, model=model, max_tokens=max_tokens, temperature=temperature)
+        last_error = None
+        for position, idx in enumerate(self._order()):
+            if position:
+                self._count("fallbacks")
+            emitted = False
+            try:
+                for chunk in self.backends[idx].stream_text(prompt, **params):
+                    emitted = True
+                    yield chunk
+                return
+            except Exception as e:
+                # Una vez entregado texto no se puede cambiar de proveedor
+                if emitted:
+                    raise
+                last_error = e
+        raise RuntimeError(f"Failed to generate text: todos los proveedores fallaron: {last_error}")
+
+    # ------------------------------------------------------------------ #
+    # Resto de la interfaz
+    # ------------------------------------------------------------------ #
+    def list_models(self):
+        models = []
+        for backend in self.backends:
+            try:
+                models.extend(backend.list_models())
+            except Exception:
+                continue
+        return models
+
+    def warm_up(self):
+        """
+        Calienta todos los proveedores en paralelo.
+
+        :return: Diccionario con el resultado de cada proveedor en 'backends'.
+        """
+        futures = [self._pool.submit(backend.warm_up) for backend in self.backends]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append({"error": str(e)})
+        return {"provider": self.provider_name, "backends": results}
+
+    def _crear_prompt_partes(self, objetivo, contexto):
+        return self.backends[0]._crear_prompt_partes(objetivo, contexto)
+
+    def stats(self):
+        """
+        Devuelve los contadores del enrutador, el p95 y el estado del circuito
+        de cada proveedor.
+
+        :return: Diccionario con peticiones, fallbacks, hedges y victorias.
+        """
+        with self._lock:
+            stats = {k: list(v) if isinstance(v, list) else v for k, v in self._counters.items()}
+        stats["p95"] = [self._percentile(idx, 0.95) for idx in range(len(self.backends))]
+        stats["circuits"] = [backend.circuit_breaker.state for backend in self.backends]
+        return stats
+
+    def close(self):
+        """
+        Libera el pool de hilos usado para las peticiones de respaldo.
+        """
+        self._pool.shutdown(wait=False)
+
+    # ------------------------------------------------------------------ #
+    # Utilidades internas
+    # ------------------------------------------------------------------ #
+    def _order(self):
+        indices = list(range(len(self.backends)))
+        if self.policy != "weighted":
+            order = indices
+        else:
+            # Muestreo ponderado sin reemplazo: el primero recibe la carga,
+            # los demás quedan como respaldo
+            order = []
+            weights = list(self.weights)
+            while indices:
+                idx = random.choices(indices, weights=[weights[i] for i in indices])[0]
+                order.append(idx)
+                indices.remove(idx)
+
+        # Los circuitos abiertos van al final: si todos lo están, cada uno
+        # falla al instante con CircuitOpenError
+        available = [idx for idx in order if self.backends[idx].circuit_breaker.allows_request()]
+        if len(available) == len(order):
+            return order
+        with self._lock:
+            self._counters["circuit_skips"] += len(order) - len(available)
+        return available + [idx for idx in order if idx not in available]
+
+    def _hedge_delay(self, idx):
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        p95 = self._percentile(idx, 0.95)
+        return p95 if p95 is not None else self.default_hedge_delay
+
+    def _percentile(self, idx, quantile):
+        with self._lock:
+            samples = sorted(self._latencies[idx])
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(quantile * len(samples)))]
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+
+def _has_native_async(backend):
+    """
+    True si el proveedor sobrescribe _agenerate_text (la versión por defecto
+    ejecuta la llamada síncrona en un hilo, que no se puede cancelar).
+    """
+    return type(backend)._agenerate_text is not ProviderBase._agenerate_text
+
+
+def build_provider(providers_config=None):
+    """
+    Crea el proveedor a usar según la configuración.
+
+    Se instancian los proveedores que tengan clave de API (api_key o api_keys en
+    la configuración, o las del entorno y settings.yaml, ver key_pool) y no
+    estén desactivados (enabled: False), en el orden de providers.router.order.
+    Si solo hay uno se
+    devuelve directamente; si hay varios se envuelven en un RouterProvider.
+
+    :param providers_config: Configuración de proveedores ({'openai': {...}, ...}).
+    :return: Instancia de ProviderBase.
+    """
+    load_environment()
+    providers_config = providers_config or {}
+    router_config = dict(get_provider_settings("router"))
+    router_config.update(providers_config.get("router") or {})
+
+    backends = []
+    weights = []
+    for name in router_config.get("order", ["openai", "claude"]):
+        config = providers_config.get(name) or {}
+        if not config.get("enabled", get_provider_settings(name).get("enabled", True)):
+            continue
+        api_keys = list(config.get("api_keys") or [])
+        if not api_keys:
+            api_keys = [config["api_key"]] if config.get("api_key") else configured_api_keys(name)
+        if not api_keys:
+            continue
+        backends.append(_create_backend(name, api_keys))
+        weights.append((router_config.get("weights") or {}).get(name, 1.0))
+
+    if not backends:
+        raise ValueError("❌ No se encontró ninguna clave de API de proveedor.")
+    if len(backends) == 1:
+        return backends[0]
+
+    return RouterProvider(
+        backends,
+        policy=router_config.get("policy", "fallback"),
+        weights=weights,
+        hedge_delay=router_config.get("hedge_delay"),
+    )
+
+
+def _create_backend(name, api_keys):
+    # El registro importa el módulo del proveedor solo cuando se usa
+    from .registry import create_provider
+    return create_provider(name, api_keys=api_keys)
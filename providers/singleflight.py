@@ -0,0 +1,130 @@
+"""
+singleflight.py
+
+Agrupación de peticiones idénticas concurrentes ("single flight").
+
+Mientras una petición con una clave dada está en curso, las demás llamadas con
+la misma clave no lanzan otra: esperan a la primera y reciben su resultado (o
+su excepción).
+"""
+import asyncio
+import threading
+
+from .async_utils import LoopLocal
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Comparte una única ejecución entre las llamadas concurrentes con la misma clave.
+
+    Las llamadas síncronas se agrupan entre hilos; las asíncronas, dentro de
+    cada event loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tasks = LoopLocal(dict)
+        self.stats = {"leaders": 0, "coalesced": 0, "errors": 0}
+
+    def do(self, key, fn):
+        """
+        Ejecuta fn() o, si ya hay una ejecución en curso con la misma clave,
+        espera su resultado.
+
+        :param key: Clave de la petición.
+        :param fn: Función sin argumentos que realiza la petición.
+        :return: Resultado de fn().
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.stats["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.stats["leaders"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self.stats["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def ado(self, key, coro_fn):
+        """
+        Versión asíncrona de do().
+
+        La petición se ejecuta en una tarea propia: si uno de los que esperan
+        se cancela, los demás siguen recibiendo el resultado; la tarea solo se
+        cancela cuando no queda nadie esperándola.
+
+        :param key: Clave de la petición.
+        :param coro_fn: Función sin argumentos que devuelve la corrutina.
+        :return: Resultado de la corrutina.
+        """
+        tasks = self._tasks.get()
+        entry = tasks.get(key)
+        if entry is None:
+            task = asyncio.ensure_future(coro_fn())
+            entry = [task, 0]
+            tasks[key] = entry
+            task.add_done_callback(lambda t: self._task_done(tasks, key, t))
+            self._count("leaders")
+        else:
+            self._count("coalesced")
+
+        task = entry[0]
+        entry[1] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and entry[1] == 1:
+                task.cancel()
+            raise
+        finally:
+            entry[1] -= 1
+
+    def in_flight(self):
+        """
+        Número de peticiones síncronas en curso.
+        """
+        with self._lock:
+            return len(self._calls)
+
+    def _task_done(self, tasks, key, task):
+        entry = tasks.get(key)
+        if entry is not None and entry[0] is task:
+            del tasks[key]
+        if not task.cancelled() and task.exception() is not None:
+            self._count("errors")
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
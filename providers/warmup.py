@@ -0,0 +1,84 @@
+"""
+warmup.py
+
+Calentamiento de proveedores en segundo plano.
+
+Mientras el usuario elige el modo y escribe la petición, un hilo prepara el
+proveedor: importa el SDK, resuelve el DNS, abre la conexión TLS del pool y
+guarda la lista de modelos en la caché con TTL. Así la primera llamada de
+generar_tareas reutiliza una conexión ya abierta.
+"""
+import threading
+import time
+
+from .provider_config import get_section
+
+
+class WarmUp:
+    """
+    Calentamiento en curso de un proveedor (ver start_warmup).
+    """
+
+    def __init__(self, provider):
+        """
+        :param provider: Proveedor (ProviderBase) a calentar.
+        """
+        self.provider = provider
+        self.result = None
+        self._done = threading.Event()
+        # Hilo demonio: si el usuario sale antes de que termine no retrasa la salida
+        self._thread = threading.Thread(target=self._run, name="provider-warmup", daemon=True)
+
+    def start(self):
+        """
+        Lanza el calentamiento sin bloquear.
+
+        :return: La propia instancia.
+        """
+        self._thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        """
+        Espera a que termine el calentamiento.
+
+        :param timeout: Segundos máximos de espera (None = sin límite).
+        :return: Resultado de provider.warm_up(), o None si no terminó a tiempo.
+        """
+        self._done.wait(timeout)
+        return self.result
+
+    @property
+    def done(self):
+        """
+        Indica si el calentamiento ha terminado.
+        """
+        return self._done.is_set()
+
+    def _run(self):
+        start = time.monotonic()
+        try:
+            result = self.provider.warm_up()
+            error = None
+        except Exception as e:
+            # El calentamiento es oportunista: un fallo aquí no debe impedir
+            # que la petición real lo intente de nuevo
+            result, error = {}, str(e)
+        self.result = dict(result, seconds=time.monotonic() - start, error=error)
+        self._done.set()
+
+
+def start_warmup(provider, enabled=None):
+    """
+    Inicia el calentamiento del proveedor en un hilo en segundo plano.
+
+    :param provider: Proveedor (ProviderBase) a calentar.
+    :param enabled: Fuerza si se calienta; por defecto warmup.enabled en
+                    settings.yaml (activado si no se indica).
+    :return: Instancia de WarmUp, o None si está desactivado.
+    """
+    if enabled is None:
+        enabled = get_section("warmup").get("enabled", True)
+    if not enabled:
+        return None
+    return WarmUp(provider).start()
@@ -11,6 +11,7 @@ setup(
         "PyYAML>=6.0",
         "click>=8.1.3",
         "requests>=2.31.0",
+        "httpx>=0.27.0",
     ],
     entry_points={
         'console_scripts': [
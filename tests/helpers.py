@@ -0,0 +1,27 @@
+"""
+Utilidades compartidas por los tests de los proveedores.
+"""
+
+from providers.circuit_breaker import CircuitBreaker
+from providers.openai_provider import OpenAIProvider
+from providers.plan_cache import PlanCache
+from providers.rate_limiter import RateLimiter
+from providers.response_cache import ResponseCache
+from providers.retry import RetryPolicy
+
+
+def make_provider(cls, server, **kwargs):
+    """
+    Crea un proveedor contra el servidor simulado sin caché, reintentos,
+    circuit breaker ni registros en logs/ (salvo que se indique otra cosa).
+    """
+    if "api_keys" not in kwargs:
+        kwargs.setdefault("api_key", "test")
+    if issubclass(cls, OpenAIProvider):
+        kwargs.setdefault("log_level", "off")
+    kwargs.setdefault("cache", ResponseCache(path=None, enabled=False))
+    kwargs.setdefault("rate_limiter", RateLimiter())
+    kwargs.setdefault("retry_policy", RetryPolicy(max_retries=0))
+    kwargs.setdefault("plan_cache", PlanCache(enabled=False))
+    kwargs.setdefault("circuit_breaker", CircuitBreaker(enabled=False))
+    return cls(base_url=server.base_url, **kwargs)
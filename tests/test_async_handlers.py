@@ -0,0 +1,80 @@
+import asyncio
+import sys
+import threading
+import time
+import unittest
+
+from utils.async_handlers import AsyncCommandRunner, execute_command_async, execute_commands
+from utils.system_handlers import execute_command
+
+
+class ThreadCounter:
+    """
+    Anota el máximo de hilos vivos mientras está activo.
+    """
+
+    def __enter__(self):
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+        self._thread.start()
+        return self
+
+    def _watch(self):
+        while not self._stop.wait(0.01):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class TestAsyncHandlers(unittest.TestCase):
+
+    def test_same_contract_as_execute_command(self):
+        for command in ["echo hola", "ls /no/existe", "reboot"]:
+            result = asyncio.run(execute_command_async(command))
+            expected = execute_command(command)
+            self.assertEqual(result.keys(), expected.keys())
+            self.assertEqual(result["success"], expected["success"])
+            self.assertEqual(result["output"], expected["output"])
+            self.assertEqual(result.get("returncode"), expected.get("returncode"))
+
+        result = asyncio.run(execute_command_async(["echo", "a b"]))
+        self.assertEqual((result["output"], result["command"]), ("a b", "echo 'a b'"))
+
+    def test_hundreds_of_commands_at_once(self):
+        with ThreadCounter() as threads:
+            start = time.perf_counter()
+            results = execute_commands(["/bin/sleep 0.2"] * 200, max_concurrency=200)
+            elapsed = time.perf_counter() - start
+
+        self.assertTrue(all(r["success"] for r in results))
+        # En serie serían 40s
+        self.assertLess(elapsed, 5)
+        if sys.version_info >= (3, 12):
+            # Con pidfd el loop espera a los hijos sin un hilo por proceso
+            self.assertLess(threads.peak, 20)
+
+    def test_concurrency_limit(self):
+        runner = AsyncCommandRunner(max_concurrency=3)
+        start = time.perf_counter()
+        asyncio.run(runner.execute_many(["/bin/sleep 0.1"] * 6))
+
+        self.assertGreaterEqual(time.perf_counter() - start, 0.2)
+        self.assertEqual(runner.stats()["peak_running"], 3)
+        self.assertEqual(runner.stats()["completed"], 6)
+
+    def test_timeout_kills_process_group(self):
+        start = time.perf_counter()
+        result = asyncio.run(execute_command_async(
+            "/bin/sh -c '/bin/sleep 5 & /bin/sleep 5'", timeout=0.2))
+
+        self.assertFalse(result["success"])
+        self.assertIn("tiempo máximo", result["error"])
+        # Se termina el grupo entero, no solo la shell
+        self.assertLess(time.perf_counter() - start, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
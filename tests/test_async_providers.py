@@ -0,0 +1,51 @@
+import asyncio
+import time
+import unittest
+
+from providers.async_utils import run_sync
+from providers.fake_provider import FakeLLMProvider
+
+
+PLAN = "1. uname -a\n2. df -h"
+
+
+def sleepy_provider(delay):
+    """Proveedor simulado que tarda delay segundos en devolver PLAN."""
+    return FakeLLMProvider(script=[PLAN], latency=delay)
+
+
+class TestAsyncProviders(unittest.TestCase):
+
+    def test_many_generations_run_concurrently(self):
+        provider = sleepy_provider(delay=0.2)
+
+        async def run_all():
+            prompts = [f"p{i}" for i in range(50)]
+            return await asyncio.gather(*(provider.agenerate_text(p) for p in prompts))
+
+        start = time.perf_counter()
+        results = run_sync(run_all())
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(results), 50)
+        self.assertLess(elapsed, 2.0)
+
+    def test_agenerar_tareas_parses_commands(self):
+        provider = sleepy_provider(delay=0)
+        tareas = run_sync(provider.agenerar_tareas("hola", {}))
+        self.assertEqual(tareas, [
+            {"tarea": "Ejecutar: uname -a", "comando": "uname -a"},
+            {"tarea": "Ejecutar: df -h", "comando": "df -h"},
+        ])
+
+    def test_run_sync_inside_running_loop(self):
+        provider = sleepy_provider(delay=0)
+
+        async def outer():
+            return run_sync(provider.agenerate_text("dentro"))
+
+        self.assertEqual(asyncio.run(outer()), PLAN)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import time
+import unittest
+
+from agent.task_decomposer import TaskDecomposer
+from providers.circuit_breaker import CircuitBreaker, CircuitOpenError
+from providers.fake_provider import FakeLLMProvider
+from providers.plan_cache import PlanCache
+from providers.retry import ProviderHTTPError
+from providers.router_provider import RouterProvider
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_opens_on_failure_rate_and_fails_fast(self):
+        breaker = CircuitBreaker("x", window_size=10, min_calls=4, failure_rate=0.5)
+        for ok in (True, False, True):
+            breaker.before_call()
+            breaker.record_success() if ok else breaker.record_failure(RuntimeError())
+        self.assertEqual(breaker.state, "closed")
+
+        breaker.before_call()
+        breaker.record_failure(RuntimeError())
+        self.assertEqual(breaker.state, "open")
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+        self.assertEqual(breaker.stats()["rejected"], 1)
+        self.assertEqual(breaker.stats()["opened"], 1)
+
+    def test_half_open_probes(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker("x", min_calls=1, open_seconds=10, clock=clock)
+        breaker.record_failure(RuntimeError())
+        self.assertFalse(breaker.allows_request())
+
+        clock.now = 10
+        self.assertEqual(breaker.state, "half_open")
+        breaker.before_call()
+        # Solo una sonda a la vez
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_failure(RuntimeError())
+        self.assertEqual(breaker.state, "open")
+
+        clock.now = 20
+        breaker.before_call()
+        breaker.record_success(0.1)
+        self.assertEqual(breaker.state, "closed")
+        self.assertEqual([t[2] for t in breaker.stats()["transitions"]],
+                         ["open", "half_open", "open", "half_open", "closed"])
+
+    def test_slow_calls_and_client_errors(self):
+        breaker = CircuitBreaker("x", min_calls=3, slow_call_seconds=1.0, slow_call_rate=0.6)
+        breaker.record_failure(ProviderHTTPError("400", status_code=400))
+        breaker.record_success(2.0)
+        self.assertEqual(breaker.state, "closed")
+        breaker.record_success(3.0)
+        self.assertEqual(breaker.state, "open")
+        self.assertEqual(breaker.stats()["failures"], 0)
+
+
+class TestCircuitBreakerIntegration(unittest.TestCase):
+
+    def test_provider_fails_fast_while_open(self):
+        provider = FakeLLMProvider(latency=0.05, error_rate=1.0, error_status=503,
+                                   circuit_breaker=CircuitBreaker("fake", min_calls=3))
+        for i in range(3):
+            with self.assertRaises(ProviderHTTPError):
+                provider.generate_text(f"hola {i}")
+
+        start = time.perf_counter()
+        with self.assertRaises(CircuitOpenError):
+            provider.generate_text("hola otra vez")
+        self.assertLess(time.perf_counter() - start, 0.05)
+        self.assertEqual(provider.calls, 3)
+        self.assertEqual(provider.circuit_stats()["state"], "open")
+
+    def test_router_skips_open_circuit(self):
+        caido = FakeLLMProvider(script=["a"], circuit_breaker=CircuitBreaker("a", min_calls=1))
+        caido.circuit_breaker.record_failure(RuntimeError())
+        sano = FakeLLMProvider(script=["b"])
+        router = RouterProvider([caido, sano])
+
+        self.assertEqual(router.generate_text("hola"), "b")
+        self.assertEqual(caido.calls, 0)
+        self.assertEqual(router.stats()["circuit_skips"], 1)
+        self.assertEqual(router.stats()["circuits"], ["open", "closed"])
+
+    def test_decomposer_degrades_instantly(self):
+        provider = FakeLLMProvider(circuit_breaker=CircuitBreaker("fake", min_calls=1))
+        provider.circuit_breaker.record_failure(RuntimeError())
+        decomposer = TaskDecomposer({}, provider=provider, plan_cache=PlanCache(enabled=False))
+
+        tasks = decomposer.decompose({"type": "GENERAL", "description": "revisa el sistema"})
+        self.assertEqual([t.id for t in tasks], ["fallback_task"])
+        self.assertEqual(provider.calls, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
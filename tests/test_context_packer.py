@@ -0,0 +1,65 @@
+import unittest
+
+from providers.context_packer import (ContextPacker, estimate_tokens, packing_stats,
+                                      reset_packing_stats)
+from providers.fake_provider import FakeLLMProvider
+from providers.prompt_templates import PromptTemplates
+from providers.response_cache import ResponseCache
+
+
+class TestEstimateTokens(unittest.TestCase):
+
+    def test_estimate_is_close_to_bpe_counts(self):
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens("ls -la"), 3)
+        # Las palabras largas cuentan más de un token
+        self.assertGreater(estimate_tokens("internacionalización"), 3)
+
+
+class TestContextPacker(unittest.TestCase):
+
+    def setUp(self):
+        reset_packing_stats()
+
+    def test_small_context_is_kept_whole(self):
+        result = ContextPacker(budget_tokens=100).pack({"archivos": ["a.py", "b.py", "a.py"]})
+        self.assertEqual(result["text"], "archivos: a.py, b.py")
+        self.assertEqual(result["items_total"], 2)
+        self.assertEqual(result["items_included"], 2)
+
+    def test_huge_listing_fits_budget_and_is_summarized(self):
+        archivos = [f"file_{i}.txt" for i in range(50000)] + ["backup.tar.gz"]
+        result = ContextPacker(budget_tokens=200).pack({"archivos": archivos}, "comprime el backup")
+
+        self.assertLessEqual(result["tokens"], 200)
+        # Los elementos relevantes para el objetivo van primero
+        self.assertTrue(result["text"].startswith("archivos: backup.tar.gz, file_0.txt"))
+        self.assertIn("… y ", result["text"])
+        self.assertIn(".txt: ", result["text"])
+        self.assertGreater(result["tokens_saved"], 100000)
+        self.assertEqual(packing_stats()["tokens_saved"], result["tokens_saved"])
+
+    def test_long_text_is_truncated(self):
+        result = ContextPacker(budget_tokens=50).pack({"nota": "palabra " * 500})
+        self.assertLessEqual(result["tokens"], 50)
+        self.assertTrue(result["text"].endswith("…"))
+
+
+class TestPromptContext(unittest.TestCase):
+
+    def test_templates_pack_raw_context(self):
+        prompt = PromptTemplates.task_generation_prompt(
+            "lista", {"archivos": [f"f{i}" for i in range(100000)]})
+        self.assertLess(estimate_tokens(prompt), 1000)
+        self.assertIn("Contexto disponible:\narchivos: f0", prompt)
+
+    def test_provider_uses_its_budget(self):
+        provider = FakeLLMProvider(cache=ResponseCache(path=None))
+        archivos = [f"f{i}.log" for i in range(20000)]
+        prompt = provider._crear_prompt_especializado("lista los logs", {"archivos": archivos})
+        self.assertLess(estimate_tokens(prompt), 1000)
+        self.assertIn("… y ", prompt)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import contextlib
+import io
+import os
+import threading
+import time
+import unittest
+
+from agent.execution_engine import ExecutionEngine
+from agent.executor import Executor
+from agent.task import Task
+
+
+class TestExecutionEngine(unittest.TestCase):
+
+    def engines(self):
+        for strategy in ("thread", "process", "async"):
+            engine = ExecutionEngine(strategy=strategy, max_workers=4, timeout=5)
+            self.addCleanup(engine.close)
+            yield strategy, engine
+
+    def test_structured_results_for_every_strategy(self):
+        for strategy, engine in self.engines():
+            with self.subTest(strategy=strategy):
+                result = engine.execute_task(Task("eco", command="echo hola"))
+                self.assertEqual((result["success"], result["output"], result["exit_code"]),
+                                 (True, "hola", 0))
+                self.assertEqual(result["strategy"], strategy)
+                self.assertGreaterEqual(result["finished_at"], result["started_at"])
+
+                result = engine.execute_task({"tarea": "falla", "comando": "ls /no/existe"})
+                self.assertFalse(result["success"])
+                self.assertEqual(result["exit_code"], 2)
+                self.assertIn("/no/existe", result["error"])
+
+                result = engine.execute_task(Task("x", command="reboot"))
+                self.assertIn("Comando no válido", result["error"])
+                self.assertEqual(engine.stats()["rejected"], 1)
+
+    def test_execute_many_runs_concurrently(self):
+        for strategy, engine in self.engines():
+            with self.subTest(strategy=strategy):
+                start = time.perf_counter()
+                results = engine.execute_many([Task("espera", command="/bin/sleep 0.2")] * 4
+                                              + [Task("eco", command="echo fin")])
+                self.assertLess(time.perf_counter() - start, 0.6)
+                self.assertEqual(results[-1]["output"], "fin")
+                self.assertTrue(all(r["success"] for r in results))
+
+    def test_timeout_and_cancellation(self):
+        for strategy, engine in self.engines():
+            with self.subTest(strategy=strategy):
+                engine.timeout = 0.2
+                result = engine.execute_task(Task("lento", command="/bin/sleep 3"))
+                self.assertIn("tiempo máximo", result["error"])
+                self.assertLess(result["duration"], 1)
+
+                cancel = threading.Event()
+                threading.Timer(0.1, cancel.set).start()
+                result = engine.execute_task(Task("espera", command="tail -f /dev/null"), cancel)
+                self.assertTrue(result["cancelled"])
+                self.assertEqual(engine.stats()["cancelled"], 1)
+
+    def test_python_runs_out_of_process(self):
+        engine = ExecutionEngine(allow_python=True)
+        result = engine.execute_task({"tarea": "py",
+                                      "comando": "python: import os; print(os.getpid())"})
+        self.assertTrue(result["success"])
+        self.assertNotEqual(int(result["output"]), os.getpid())
+
+        result = ExecutionEngine().execute_task({"tarea": "py", "comando": "python: import os"})
+        self.assertIn("Python está desactivada", result["error"])
+
+        # 'import' de ImageMagick es un comando de la shell, no código Python
+        result = engine.execute_task({"tarea": "captura", "comando": "import captura.png"})
+        self.assertIn("Comando no válido", result["error"])
+
+    def test_output_is_streamed_line_by_line(self):
+        for strategy, engine in self.engines():
+            with self.subTest(strategy=strategy):
+                lines = []
+                result = engine.execute_task(
+                    Task("eco", command="echo uno; /bin/sleep 0.3; echo dos"),
+                    on_line=lambda line: lines.append((line, time.time())))
+                self.assertEqual([line for line, _ in lines], ["uno", "dos"])
+                self.assertEqual(result["output"], "uno\ndos")
+                if strategy == "thread":
+                    self.assertLess(lines[0][1], result["finished_at"] - 0.2)
+
+    def test_executor_reports_exit_code_without_stderr(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            Executor(strategy="thread")._ejecutar_tarea(
+                1, {"tarea": "comprobar", "comando": "test -d /no/existe"}, "auto")
+        self.assertIn("código de salida 1", output.getvalue())
+        self.assertNotIn("None", output.getvalue())
+
+    def test_executor_delegates_to_engine(self):
+        executor = Executor(strategy="async", max_workers=2)
+        self.assertEqual((executor.engine.strategy, executor.max_workers), ("async", 2))
+        result = executor.execute_tasks([Task("a", id="a", command="echo a"),
+                                         Task("b", id="b", command="echo b", depends_on=["a"])])
+        self.assertEqual(result["results"]["b"]["output"], "b")
+        self.assertEqual(result["results"]["b"]["strategy"], "async")
+
+
+if __name__ == "__main__":
+    unittest.main()
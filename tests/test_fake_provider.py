@@ -0,0 +1,75 @@
+import time
+import unittest
+
+from providers.async_utils import run_sync
+from providers.fake_provider import FakeLLMProvider
+from providers.retry import ProviderHTTPError, RetryPolicy
+
+
+class TestFakeLLMProvider(unittest.TestCase):
+
+    def test_pattern_matched_plan(self):
+        provider = FakeLLMProvider()
+        tareas = provider.generar_tareas("muestra la info del sistema", {})
+        self.assertEqual(tareas[0]["comando"], "hostnamectl && lscpu && free -h && df -h")
+
+    def test_scripted_responses_in_order(self):
+        provider = FakeLLMProvider(script=["1. uname -a", "1. df -h"])
+        self.assertEqual(provider.generate_text("a"), "1. uname -a")
+        self.assertEqual(provider.generate_text("b"), "1. df -h")
+        self.assertEqual(provider.generate_text("c"), "1. uname -a")
+
+    def test_unknown_prompt_is_deterministic(self):
+        a = FakeLLMProvider().generate_text("algo raro")
+        b = FakeLLMProvider().generate_text("algo raro")
+        self.assertEqual(a, b)
+
+    def test_latency_distribution_is_reproducible(self):
+        spec = {"distribution": "uniform", "low": 0.0, "high": 0.01}
+        a = [FakeLLMProvider(latency=spec, seed=7)._sample_latency() for _ in range(3)]
+        b = [FakeLLMProvider(latency=spec, seed=7)._sample_latency() for _ in range(3)]
+        self.assertEqual(a, b)
+
+    def test_constant_latency(self):
+        provider = FakeLLMProvider(latency=0.05)
+        start = time.perf_counter()
+        provider.generate_text("hola")
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)
+
+    def test_error_injection(self):
+        provider = FakeLLMProvider(error_rate=1.0, error_status=503)
+        with self.assertRaises(ProviderHTTPError) as ctx:
+            provider.generate_text("hola")
+        self.assertEqual(ctx.exception.status_code, 503)
+
+    def test_injected_errors_are_retried(self):
+        provider = FakeLLMProvider(error_rate=0.3, retry_after=0, seed=1,
+                                   retry_policy=RetryPolicy(max_retries=20))
+        for i in range(20):
+            provider.generate_text(f"p{i}")
+        self.assertGreater(provider.errors, 0)
+
+    def test_scripted_failures_come_first(self):
+        provider = FakeLLMProvider(script=["ok"], failures=[ProviderHTTPError("503", status_code=503)],
+                                   retry_policy=RetryPolicy(max_retries=1, base_delay=0))
+        self.assertEqual(provider.generate_text("hola"), "ok")
+        self.assertEqual((provider.calls, provider.errors), (2, 1))
+
+    def test_streaming_yields_tokens(self):
+        provider = FakeLLMProvider(script=["1. lsblk\n2. mount | column -t"])
+        chunks = list(provider.stream_text("montar"))
+        self.assertGreater(len(chunks), 2)
+        self.assertEqual("".join(chunks), "1. lsblk\n2. mount | column -t")
+
+        provider = FakeLLMProvider(script=["1. lsblk\n2. mount | column -t"])
+        tareas = list(provider.generar_tareas_stream("montar", {}))
+        self.assertEqual([t["comando"] for t in tareas], ["lsblk", "mount | column -t"])
+
+    def test_async_api(self):
+        provider = FakeLLMProvider()
+        tareas = run_sync(provider.agenerar_tareas("archivos ocultos", {}))
+        self.assertEqual(tareas[0]["comando"], "ls -la | grep '^\\.'")
+
+
+if __name__ == '__main__':
+    unittest.main()
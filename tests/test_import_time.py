@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Presupuesto de importación de main.py (microsegundos acumulados según -X importtime).
+# Antes de la carga perezosa rondaba 1 s por el SDK de OpenAI.
+MAIN_IMPORT_BUDGET_US = 400_000
+
+HEAVY_MODULES = ("openai", "requests", "httpx", "yaml")
+
+
+def _importtime(statement, cwd):
+    """
+    Ejecuta una importación en un intérprete nuevo con -X importtime.
+
+    :return: Diccionario módulo -> tiempo acumulado en microsegundos.
+    """
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            cwd=cwd, env=env, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line.split("|")
+        try:
+            times[module.strip()] = int(cumulative)
+        except ValueError:
+            continue  # cabecera
+    return times
+
+
+class TestImportTime(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_providers_package_is_lazy(self):
+        times = _importtime("import providers", self.tmpdir.name)
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, times)
+        self.assertNotIn("providers.openai_provider", times)
+        self.assertNotIn("providers.claude_provider", times)
+
+    def test_main_import_within_budget(self):
+        times = _importtime("import main", self.tmpdir.name)
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, times)
+        self.assertLess(times["main"], MAIN_IMPORT_BUDGET_US)
+
+    def test_imports_have_no_filesystem_side_effects(self):
+        _importtime("import main, providers.openai_provider, utils.logger, utils.tracing",
+                    self.tmpdir.name)
+        self.assertEqual(os.listdir(self.tmpdir.name), [])
+
+    def test_lazy_attributes_resolve(self):
+        import providers
+        from providers.fake_provider import FakeLLMProvider
+
+        self.assertIs(providers.FakeLLMProvider, FakeLLMProvider)
+        self.assertIs(providers.get_provider_class("fake"), FakeLLMProvider)
+        self.assertIsInstance(providers.create_provider("fake"), FakeLLMProvider)
+        with self.assertRaises(AttributeError):
+            providers.NoExiste
+        with self.assertRaises(ValueError):
+            providers.get_provider_class("no-existe")
+
+
+if __name__ == "__main__":
+    unittest.main()
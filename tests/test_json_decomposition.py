@@ -0,0 +1,93 @@
+import unittest
+
+from agent.task import TaskPriority
+from agent.task_decomposer import TaskDecomposer
+from providers.claude_provider import ClaudeProvider
+from providers.fake_provider import FakeLLMProvider
+from providers.mock_server import MockLLMServer
+from providers.plan_cache import PlanCache
+from providers.plan_parser import IncrementalJSONArrayParser, parse_json_items, repair_json
+from providers.rate_limiter import RateLimiter
+from providers.response_cache import ResponseCache
+from providers.retry import RetryPolicy
+
+RESPUESTA = ('```json\n[{"id": "disk", "description": "Uso de disco", "command": "df -h", '
+             '"priority": "HIGH", "critical": true},\n'
+             ' {"id": "mem", "description": "Memoria", "command": "free -h", "priority": "LOW"}]\n```')
+
+GENERAL = {"type": "GENERAL", "description": "revisa los recursos del sistema"}
+
+
+class TestJSONArrayParser(unittest.TestCase):
+
+    def test_items_are_emitted_as_they_close(self):
+        parser = IncrementalJSONArrayParser()
+        emitidos = []
+        for i in range(0, len(RESPUESTA), 7):
+            emitidos.append(parser.feed(RESPUESTA[i:i + 7]))
+        emitidos.append(parser.close())
+
+        items = [item for lote in emitidos for item in lote]
+        self.assertEqual([item["command"] for item in items], ["df -h", "free -h"])
+        # El primer elemento sale antes de que termine la respuesta
+        self.assertTrue(emitidos.index([items[0]]) < len(emitidos) - 2)
+
+    def test_wrapping_object_and_repairs(self):
+        items = parse_json_items('{"tasks": [{id: "a", "command": \'ls\',}, '
+                                 '{"command": "uptime", "critical": True}]}')
+        self.assertEqual(items, [{"id": "a", "command": "ls"},
+                                 {"command": "uptime", "critical": True}])
+
+    def test_truncated_response(self):
+        parser = IncrementalJSONArrayParser()
+        self.assertEqual(parser.feed('[{"command": "uname -a"}, {"command": "free'), [{"command": "uname -a"}])
+        self.assertEqual(parser.close(), [])
+        self.assertEqual(parser.dropped, 1)
+
+        self.assertEqual(repair_json('{"command": "df -h", "critical": false'),
+                         {"command": "df -h", "critical": False})
+
+
+class TestJSONDecomposition(unittest.TestCase):
+
+    def test_decomposer_builds_tasks_from_json(self):
+        provider = FakeLLMProvider(script=[RESPUESTA])
+        decomposer = TaskDecomposer({}, provider=provider, plan_cache=PlanCache(enabled=False))
+        tasks = decomposer.decompose(GENERAL)
+
+        self.assertEqual([t.command for t in tasks], ["df -h", "free -h"])
+        self.assertEqual(tasks[0].priority, TaskPriority.HIGH)
+        self.assertTrue(tasks[0].critical)
+        self.assertEqual(provider.calls, 1)
+
+    def test_repeated_ids_resolve_to_latest_task(self):
+        respuesta = ('[{"id": "check", "command": "df -h"},'
+                     ' {"id": "check", "command": "free -h", "depends_on": "check"},'
+                     ' {"id": "report", "command": "echo fin", "depends_on": ["check"]}]')
+        provider = FakeLLMProvider(script=[respuesta])
+        decomposer = TaskDecomposer({}, provider=provider, plan_cache=PlanCache(enabled=False))
+        tasks = decomposer.decompose(GENERAL)
+
+        self.assertEqual([t.id for t in tasks], ["check", "check_2", "report"])
+        self.assertEqual(tasks[1].depends_on, ["check"])
+        self.assertEqual(tasks[2].depends_on, ["check_2"])
+
+    def test_numbered_plan_fallback(self):
+        provider = FakeLLMProvider(script=["1. df -h\n2. free -h\n"])
+        decomposer = TaskDecomposer({}, provider=provider, plan_cache=PlanCache(enabled=False))
+        self.assertEqual([t.command for t in decomposer.decompose(GENERAL)], ["df -h", "free -h"])
+
+    def test_claude_prefill_streams_tasks(self):
+        with MockLLMServer(responder=lambda prompt: '{"command": "uptime"}, {"command": "who"}]') as server:
+            provider = ClaudeProvider(api_key="test", base_url=server.base_url,
+                                      cache=ResponseCache(path=None, enabled=False),
+                                      rate_limiter=RateLimiter(), plan_cache=PlanCache(enabled=False),
+                                      retry_policy=RetryPolicy(max_retries=0))
+            decomposer = TaskDecomposer({}, provider=provider, plan_cache=PlanCache(enabled=False))
+            tasks = list(decomposer.decompose_stream(GENERAL))
+
+        self.assertEqual([t.command for t in tasks], ["uptime", "who"])
+
+
+if __name__ == "__main__":
+    unittest.main()
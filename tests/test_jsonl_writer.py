@@ -0,0 +1,48 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from utils.jsonl_writer import BackgroundJSONLWriter
+
+
+class TestBackgroundJSONLWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "logs", "requests.jsonl")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_records_are_written_as_compact_jsonl(self):
+        writer = BackgroundJSONLWriter(self.path, batch_size=10, flush_interval=0.01)
+        for i in range(25):
+            writer.write({"i": i, "texto": "año"})
+        writer.write(lambda: {"lazy": True})
+        writer.close()
+
+        with open(self.path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 26)
+        self.assertEqual(lines[0], '{"i":0,"texto":"año"}')
+        self.assertEqual(json.loads(lines[-1]), {"lazy": True})
+        self.assertGreaterEqual(writer.stats["batches"], 3)
+
+    def test_write_does_not_block_and_drops_when_full(self):
+        writer = BackgroundJSONLWriter(self.path, max_queue=5, flush_interval=0.01)
+        # Un registro que tarda en serializarse mantiene ocupado al escritor
+        writer.write(lambda: time.sleep(0.2) or {"lento": True})
+        time.sleep(0.05)
+
+        start = time.perf_counter()
+        accepted = sum(writer.write({"i": i}) for i in range(20))
+        self.assertLess(time.perf_counter() - start, 0.05)
+        self.assertLess(accepted, 20)
+        self.assertEqual(writer.stats["dropped"], 20 - accepted)
+        writer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
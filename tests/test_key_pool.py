@@ -0,0 +1,95 @@
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+from providers.claude_provider import ClaudeProvider
+from providers.key_pool import KeyPool, parse_reset
+from providers.mock_server import MockLLMServer
+from providers.openai_provider import OpenAIProvider
+from providers.retry import ProviderHTTPError, RetryPolicy
+
+from helpers import make_provider
+
+
+class TestKeyPool(unittest.TestCase):
+
+    def test_parse_reset(self):
+        self.assertEqual(parse_reset("6m0s"), 360)
+        self.assertAlmostEqual(parse_reset("1.5s"), 1.5)
+        self.assertAlmostEqual(parse_reset("20ms"), 0.02)
+        futuro = (datetime.now(timezone.utc) + timedelta(seconds=30)).isoformat()
+        self.assertAlmostEqual(parse_reset(futuro), 30, delta=1)
+        self.assertIsNone(parse_reset("mañana"))
+
+    def test_strategies(self):
+        pool = KeyPool(["a", "b", "c"], strategy="round_robin")
+        self.assertEqual([pool.acquire().key for _ in range(4)], ["a", "b", "c", "a"])
+
+        pool = KeyPool(["a", "b", "c"])
+        ocupada = pool.acquire()
+        with pool.acquire() as lease:
+            lease.headers = {"x-ratelimit-remaining-requests": "3"}
+        pool.acquire().release()
+        # 'a' sigue ocupada y a 'b' le queda menos cuota que a 'c' (desconocida)
+        self.assertEqual([ocupada.key, lease.key], ["a", "b"])
+        self.assertEqual(pool.acquire().key, "c")
+
+    def test_throttled_key_is_parked(self):
+        pool = KeyPool(["a", "b"], strategy="round_robin")
+        with self.assertRaises(ProviderHTTPError):
+            with pool.acquire():
+                raise ProviderHTTPError("429", status_code=429, retry_after=0.2)
+        self.assertEqual([pool.acquire().key for _ in range(2)], ["b", "b"])
+        self.assertEqual(pool.available(), 1)
+
+        # Cuota agotada según las cabeceras: aparcada hasta el reinicio
+        with pool.acquire() as lease:
+            lease.headers = {"anthropic-ratelimit-requests-remaining": "0",
+                             "anthropic-ratelimit-requests-reset": "100ms"}
+        lease, delay = pool.reserve()
+        self.assertEqual(lease.key, "b")
+        self.assertAlmostEqual(delay, 0.1, delta=0.05)
+        self.assertEqual(pool.stats()["keys"][0]["throttled"], 1)
+
+
+class TestKeyPoolProviders(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockLLMServer(key_requests_per_second=4).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_openai_spreads_load_across_keys(self):
+        keys = ["key-uno", "key-dos", "key-tres"]
+        provider = make_provider(OpenAIProvider, self.server, api_keys=keys)
+        for i in range(12):
+            provider.generate_text(f"hola {i}")
+
+        # Una sola clave habría recibido 429 a partir de la quinta petición
+        self.assertEqual(self.server.counters["throttled"], 0)
+        stats = provider.key_pool.stats()["keys"]
+        self.assertEqual([k["requests"] for k in stats], [4, 4, 4])
+        self.assertEqual([k["remaining_requests"] for k in stats], [0, 0, 0])
+
+    def test_claude_retries_with_another_key(self):
+        # Se agota la cuota de la primera clave fuera del proveedor
+        for _ in range(4):
+            requests.post(f"{self.server.base_url}/messages", headers={"x-api-key": "key-uno"},
+                          json={"messages": [{"role": "user", "content": "hola"}]})
+        provider = make_provider(ClaudeProvider, self.server, api_keys=["key-uno", "key-dos"],
+                                 retry_policy=RetryPolicy(max_retries=1))
+        provider.key_pool = KeyPool(["key-uno", "key-dos"], strategy="round_robin")
+
+        start = time.perf_counter()
+        self.assertTrue(provider.generate_text("info sistema"))
+        # Sin esperar el Retry-After: el reintento usa la otra clave
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(self.server.counters["throttled"], 1)
+        self.assertEqual(provider.key_pool.stats()["parked"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
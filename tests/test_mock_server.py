@@ -0,0 +1,82 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from providers.async_utils import run_sync
+from providers.claude_provider import ClaudeProvider
+from providers.mock_server import MockLLMServer
+from providers.openai_provider import OpenAIProvider
+from providers.retry import ProviderHTTPError, RetryPolicy
+from utils.jsonl_writer import BackgroundJSONLWriter
+
+from helpers import make_provider
+
+
+class TestMockServer(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockLLMServer().start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_claude_messages(self):
+        provider = make_provider(ClaudeProvider, self.server)
+        self.assertEqual(provider.generate_text("info sistema"),
+                         "1. hostnamectl && lscpu && free -h && df -h")
+
+    def test_claude_streaming(self):
+        provider = make_provider(ClaudeProvider, self.server)
+        tareas = list(provider.generar_tareas_stream("montar disco", {}))
+        self.assertEqual([t["comando"] for t in tareas], ["lsblk", "mount | column -t"])
+
+    def test_openai_chat_completions(self):
+        provider = make_provider(OpenAIProvider, self.server)
+        self.assertEqual(provider.generate_text("info sistema"),
+                         "1. hostnamectl && lscpu && free -h && df -h")
+        self.assertIn("gpt-3.5-turbo", provider.list_models())
+
+    def test_openai_streaming_and_async(self):
+        provider = make_provider(OpenAIProvider, self.server)
+        self.assertEqual("".join(provider.stream_text("archivos ocultos")), "1. ls -la | grep '^\\.'")
+        self.assertEqual(run_sync(provider.agenerate_text("memoria")), "1. free -h")
+
+    def test_injected_429_carries_retry_after(self):
+        self.server.error_rate = 1.0
+        self.server.retry_after = 0
+        provider = make_provider(ClaudeProvider, self.server)
+        with self.assertRaises(ProviderHTTPError) as ctx:
+            provider.generate_text("hola")
+        self.assertEqual(ctx.exception.status_code, 429)
+        self.assertEqual(ctx.exception.retry_after, 0)
+
+    def test_openai_errors_only_reach_console_when_asked(self):
+        self.server.error_rate = 1.0
+        self.server.retry_after = 0
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        for log_level, shown in (("off", False), ("console", True)):
+            provider = make_provider(OpenAIProvider, self.server, log_level=log_level)
+            for name in ("_request_log", "_response_log"):
+                writer = BackgroundJSONLWriter(os.path.join(tmpdir.name, name + ".jsonl"))
+                self.addCleanup(writer.close)
+                setattr(provider, name, writer)
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output), self.assertRaises(ProviderHTTPError):
+                provider.generate_text("hola")
+            self.assertEqual("ERROR EN PETICIÓN A OPENAI" in output.getvalue(), shown)
+
+    def test_throughput_limit_is_absorbed_by_retries(self):
+        self.server.max_requests_per_second = 5
+        self.server.retry_after = 0.2
+        provider = make_provider(ClaudeProvider, self.server,
+                                 retry_policy=RetryPolicy(max_retries=10))
+        for i in range(8):
+            provider.generate_text(f"p{i}")
+        self.assertGreater(self.server.counters["throttled"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
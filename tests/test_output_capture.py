@@ -0,0 +1,62 @@
+import io
+import os
+import subprocess
+import unittest
+
+from utils.output_capture import OutputCapture, pump
+from utils.system_handlers import execute_command
+
+
+class TestOutputCapture(unittest.TestCase):
+
+    def test_small_output_is_kept_whole(self):
+        with OutputCapture(head_bytes=8, tail_bytes=8) as capture:
+            for chunk in (b"hola ", b"mundo\n", b"adios"):
+                capture.feed(chunk)
+            self.assertEqual(capture.text(), "hola mundo\nadios")
+            self.assertFalse(capture.truncated)
+            self.assertIsNone(capture.spill_path)
+
+    def test_head_tail_and_capped_spill(self):
+        capture = OutputCapture(head_bytes=4, tail_bytes=4, spill_limit=10)
+        for chunk in (b"0123", b"4567", b"89ab", b"cdef"):
+            capture.feed(chunk)
+
+        self.assertTrue(capture.truncated)
+        self.assertEqual(capture.text(), "0123\n[... 8 bytes omitidos ...]\ncdef")
+        capture.close()
+        with open(capture.spill_path, "rb") as f:
+            self.assertEqual(f.read(), b"0123456789")
+        self.assertTrue(capture.spill_truncated)
+        path = capture.spill_path
+        capture.close(keep_spill=False)
+        self.assertFalse(os.path.exists(path))
+
+    def test_iter_lines(self):
+        capture = OutputCapture(max_line_bytes=5)
+        stream = io.BytesIO(b"uno\ndos\nlarguisima\nfin")
+        self.assertEqual(list(capture.iter_lines(stream, chunk_size=3)),
+                         ["uno", "dos", "largu", "isima", "fin"])
+        self.assertEqual(capture.total_bytes, 22)
+
+    def test_pump_reads_both_pipes(self):
+        process = subprocess.Popen("head -c 300000 /dev/zero; echo error >&2", shell=True,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        with process, OutputCapture(head_bytes=10, tail_bytes=10) as out:
+            err = OutputCapture()
+            self.assertIsNone(pump(process, out, err, timeout=5))
+            self.assertEqual(out.total_bytes, 300000)
+            self.assertEqual(len(out.text().split("\n")[0]), 10)
+            self.assertEqual(err.text(), "error\n")
+
+    def test_execute_command_reports_truncation(self):
+        result = execute_command("head -c 200000 /dev/zero")
+        self.assertTrue(result["success"])
+        self.assertTrue(result["output_truncated"])
+        self.assertLess(len(result["output"]), 70000)
+        self.assertEqual(os.path.getsize(result["output_file"]), 200000)
+        os.unlink(result["output_file"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import os
+import tempfile
+import unittest
+
+from agent.task_decomposer import TaskDecomposer
+from providers.fake_provider import FakeLLMProvider
+from providers.plan_cache import PlanCache, extract_slots
+
+PLAN = [{"tarea": "Ejecutar: ls -la /tmp | grep '^\\.'", "comando": "ls -la /tmp | grep '^\\.'"}]
+
+
+class TestPlanCache(unittest.TestCase):
+
+    def test_slots_and_accent_normalization(self):
+        template, kinds, values = extract_slots("Muéstrame los archivos ocultos de /tmp")
+        self.assertEqual(template, "listar archivos ocultos pathslot")
+        self.assertEqual(kinds, ("path",))
+        self.assertEqual(values, ["/tmp"])
+
+    def test_similar_objective_reuses_plan_with_rebound_slots(self):
+        cache = PlanCache()
+        cache.store("listar archivos ocultos en /tmp", PLAN)
+
+        hit = cache.lookup("muestra los archivos ocultos de /var/log")
+        self.assertIsNotNone(hit)
+        self.assertEqual(hit["plan"][0]["comando"], "ls -la /var/log | grep '^\\.'")
+        self.assertEqual(hit["objective"], "listar archivos ocultos en /tmp")
+
+    def test_different_action_or_content_is_not_reused(self):
+        cache = PlanCache()
+        cache.store("listar archivos ocultos en /tmp", PLAN)
+
+        self.assertIsNone(cache.lookup("borra los archivos ocultos de /tmp"))
+        self.assertIsNone(cache.lookup("listar archivos grandes en /tmp"))
+        self.assertIsNone(cache.lookup("muestra el uso de memoria"))
+        self.assertEqual(cache.stats()["hits"], 0)
+
+    def test_slots_are_rebound_only_as_whole_tokens(self):
+        cache = PlanCache()
+        cache.store("mostrar las 5 ultimas lineas de app.txt",
+                    [{"tarea": "cola", "comando": "tail -n 5 app.txt | cut -c1-50"}])
+
+        # '5' también aparece dentro de "-c1-50": el plan solo vale para 5
+        self.assertIsNone(cache.lookup("mostrar las 20 ultimas lineas de app.txt"))
+        hit = cache.lookup("mostrar las 5 ultimas lineas de app.txt")
+        self.assertEqual(hit["plan"][0]["comando"], "tail -n 5 app.txt | cut -c1-50")
+
+        cache.store("buscar programas en /", [{"tarea": "buscar", "comando": "ls / | grep usr/bin"}])
+        self.assertIsNone(cache.lookup("buscar programas en /home/x"))
+
+        cache.store("listar archivos ocultos en /tmp", PLAN)
+        hit = cache.lookup("muestra los archivos ocultos de /var/log")
+        self.assertEqual(hit["plan"][0]["comando"], "ls -la /var/log | grep '^\\.'")
+
+    def test_negations_and_destructive_actions_need_exact_match(self):
+        cache = PlanCache()
+        cache.store("borrar archivos temporales en /tmp",
+                    [{"tarea": "borrar", "comando": "rm -f /tmp/*.tmp"}])
+
+        self.assertIsNone(cache.lookup("borrar archivos no temporales en /tmp"))
+        self.assertIsNone(cache.lookup("borrar los archivos temporales viejos en /tmp"))
+        self.assertIsNotNone(cache.lookup("borra los archivos temporales de /tmp"))
+
+        cache.store("listar archivos en /tmp", PLAN)
+        self.assertIsNone(cache.lookup("listar archivos excepto en /tmp"))
+
+    def test_shutdown_and_reboot_are_different_actions(self):
+        cache = PlanCache()
+        cache.store("apaga el equipo", [{"tarea": "apagar", "comando": "shutdown now"}])
+
+        self.assertIsNone(cache.lookup("reinicia el equipo"))
+        self.assertIsNotNone(cache.lookup("apaga el equipo"))
+
+    def test_units_must_match(self):
+        cache = PlanCache()
+        cache.store("lista archivos de mas de 100 MB en /home",
+                    [{"tarea": "buscar", "comando": "find /home -size +100M"}])
+
+        self.assertIsNone(cache.lookup("lista archivos de mas de 100 KB en /home"))
+        self.assertIsNone(cache.lookup("lista archivos de mas de 100KB en /home"))
+        self.assertIsNotNone(cache.lookup("lista archivos de mas de 100 MB en /home"))
+
+        cache.store("procesos que llevan mas de 5 min", PLAN)
+        self.assertIsNone(cache.lookup("procesos que llevan mas de 5 h"))
+
+    def test_eviction_bounds_memory(self):
+        cache = PlanCache(max_entries=3)
+        for i, objetivo in enumerate(["listar procesos", "uso de disco", "memoria libre",
+                                      "versión del kernel"]):
+            cache.store(objetivo, [{"tarea": str(i), "comando": str(i)}])
+
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertIsNone(cache.lookup("listar procesos"))
+        self.assertIsNotNone(cache.lookup("versión del kernel"))
+
+    def test_plans_persist_on_disk(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "plans.sqlite3")
+            cache = PlanCache(path=path)
+            cache.store("listar archivos ocultos en /tmp", PLAN)
+            cache.close()
+
+            reopened = PlanCache(path=path)
+            self.assertIsNotNone(reopened.lookup("muestra los archivos ocultos de /srv"))
+            reopened.close()
+
+    def test_hits_refresh_used_at_on_disk(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "plans.sqlite3")
+            cache = PlanCache(path=path, max_entries=2)
+            cache.store("listar archivos ocultos en /tmp", PLAN)
+            cache.store("uso de disco", [{"tarea": "df", "comando": "df -h"}])
+            self.assertIsNotNone(cache.lookup("muestra los archivos ocultos de /srv"))
+            cache.close()
+
+            # Tras reiniciar, el plan usado sigue siendo el más reciente
+            reopened = PlanCache(path=path, max_entries=2)
+            reopened.store("memoria libre", [{"tarea": "free", "comando": "free -h"}])
+            self.assertIsNotNone(reopened.lookup("listar archivos ocultos en /home"))
+            self.assertIsNone(reopened.lookup("uso de disco"))
+            reopened.close()
+
+
+class TestPlanCacheIntegration(unittest.TestCase):
+
+    def test_provider_generar_tareas_uses_plan_cache(self):
+        provider = FakeLLMProvider(plan_cache=PlanCache())
+        primero = provider.generar_tareas("listar archivos ocultos en /tmp", {})
+        segundo = provider.generar_tareas("muestra los archivos ocultos de /tmp", {})
+
+        self.assertEqual(primero, segundo)
+        self.assertEqual(provider.calls, 1)
+
+    def test_task_decomposer_reuses_plans(self):
+        provider = FakeLLMProvider(script=['[{"description": "Estado de nginx.service", '
+                                           '"command": "systemctl status nginx.service"}]'])
+        decomposer = TaskDecomposer({}, provider=provider, plan_cache=PlanCache())
+        objetivo = {"type": "GENERAL", "description": "comprueba el estado de nginx.service"}
+        decomposer.decompose(objetivo)
+        tasks = decomposer.decompose({"type": "GENERAL",
+                                      "description": "verifica el estado de sshd.service"})
+
+        self.assertEqual(provider.calls, 1)
+        self.assertEqual(tasks[0].command, "systemctl status sshd.service")
+        self.assertIn("sshd.service", tasks[0].description)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import time
+import unittest
+
+from agent.executor import Executor
+from providers.plan_parser import IncrementalPlanParser, parse_plan
+
+
+class TestPlanParser(unittest.TestCase):
+
+    def test_parse_plan_numbered_commands(self):
+        tareas = parse_plan("1. uname -a\n2. df -h\n")
+        self.assertEqual([t["comando"] for t in tareas], ["uname -a", "df -h"])
+
+    def test_parse_plan_generic_fallback(self):
+        tareas = parse_plan("Revisa el sistema\nY luego el disco")
+        self.assertEqual(tareas, [{"tarea": "Revisa el sistema"}, {"tarea": "Y luego el disco"}])
+
+    def test_incremental_emits_on_line_completion(self):
+        parser = IncrementalPlanParser()
+        self.assertEqual(parser.feed("1. una"), [])
+        self.assertEqual(parser.feed("me -a\n2. d"), [{"tarea": "Ejecutar: uname -a", "comando": "uname -a"}])
+        self.assertEqual(parser.feed("f -h"), [])
+        self.assertEqual(parser.close(), [{"tarea": "Ejecutar: df -h", "comando": "df -h"}])
+
+    def test_execute_stream_overlaps_generation(self):
+        eventos = []
+
+        def generador():
+            for comando in ["echo uno", "echo dos", "echo tres"]:
+                eventos.append(("generada", comando))
+                yield {"tarea": f"Ejecutar: {comando}", "comando": comando}
+                time.sleep(0.2)
+
+        executor = Executor()
+        executor._ejecutar_tarea = lambda idx, tarea, mode: eventos.append(("ejecutada", tarea["comando"]))
+        recibidas = executor.execute_stream(generador(), mode="auto")
+
+        self.assertEqual(len(recibidas), 3)
+        self.assertLess(eventos.index(("ejecutada", "echo uno")), eventos.index(("generada", "echo dos")))
+
+    def test_execute_stream_rejects_invalid_commands(self):
+        ejecutadas = []
+        executor = Executor()
+        executor._ejecutar_tarea = lambda idx, tarea, mode: ejecutadas.append(tarea["comando"])
+
+        executor.execute_stream(iter([{"tarea": "x", "comando": "rm -rf /"},
+                                      {"tarea": "y", "comando": "ls"}]), mode="auto")
+
+        self.assertEqual(ejecutadas, ["ls"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+from providers.claude_provider import ClaudeProvider
+from providers.mock_server import MockLLMServer
+from providers.openai_provider import OpenAIProvider
+from providers.prompt_templates import TASK_SYSTEM_PROMPT, PromptTemplates
+
+from helpers import make_provider
+
+
+class TestPromptParts(unittest.TestCase):
+
+    def test_prefix_is_static(self):
+        uno = PromptTemplates.task_generation_parts("abre firefox", "")
+        dos = PromptTemplates.task_generation_parts("crear carpeta /tmp/x", {"usuario": "ana"})
+
+        self.assertEqual(uno["system"], TASK_SYSTEM_PROMPT)
+        self.assertEqual(uno["system"], dos["system"])
+        self.assertNotIn("firefox", uno["system"])
+        self.assertIn("Tipo de petición: abrir o ejecutar aplicaciones", uno["prompt"])
+        self.assertIn("Tipo de petición: archivos o directorios", dos["prompt"])
+
+    def test_claude_payload_marks_prefix_cacheable(self):
+        with MockLLMServer() as server:
+            provider = make_provider(ClaudeProvider, server)
+            payload = provider._payload("hola", provider.default_model, 10, 0.0, system="fijo")
+        self.assertEqual(payload["system"][0]["cache_control"], {"type": "ephemeral"})
+        self.assertEqual(payload["messages"], [{"role": "user", "content": "hola"}])
+
+
+class TestPromptCacheUsage(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockLLMServer().start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_claude_reports_cache_reads(self):
+        provider = make_provider(ClaudeProvider, self.server)
+        provider.generar_tareas("muestra la memoria", {})
+        self.assertGreater(provider.usage_stats()["cache_write_tokens"], 0)
+        self.assertEqual(provider.usage_stats()["cached_tokens"], 0)
+
+        tareas = list(provider.generar_tareas_stream("info sistema", {}))
+        self.assertEqual(tareas[0]["comando"], "hostnamectl && lscpu && free -h && df -h")
+        stats = provider.usage_stats()
+        self.assertEqual(stats["cached_tokens"], stats["cache_write_tokens"])
+        self.assertGreater(stats["cached_ratio"], 0)
+        self.assertIsNotNone(stats["avg_first_token_seconds"])
+
+    def test_openai_sends_system_first_and_reports_cached_tokens(self):
+        provider = make_provider(OpenAIProvider, self.server)
+        request = provider._build_request("hola", "gpt", 10, 0.0, system="fijo")
+        self.assertEqual([m["role"] for m in request["messages"]], ["system", "user"])
+
+        self.assertEqual(provider.generar_tareas("muestra la memoria", {}),
+                         [{"tarea": "Ejecutar: free -h", "comando": "free -h"}])
+        list(provider.generar_tareas_stream("muestra los archivos ocultos", {}))
+
+        stats = provider.usage_stats()
+        self.assertEqual(stats["responses"], 2)
+        self.assertEqual(stats["cached_tokens"], len(TASK_SYSTEM_PROMPT) // 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
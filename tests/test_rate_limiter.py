@@ -0,0 +1,70 @@
+import time
+import unittest
+
+from providers.fake_provider import FakeLLMProvider
+from providers.rate_limiter import RateLimiter
+from providers.retry import ProviderHTTPError, RetryPolicy, parse_retry_after
+
+
+def flaky_provider(failures, **kwargs):
+    """Proveedor simulado que falla con los errores indicados y luego responde 'ok'."""
+    return FakeLLMProvider(script=["ok"], failures=failures, **kwargs)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_requests_per_minute_throttles(self):
+        limiter = RateLimiter(requests_per_minute=600)  # 10/s, ráfaga de 600
+        for _ in range(600):
+            self.assertEqual(limiter.reserve(), 0.0)
+
+        delay = limiter.reserve()
+        self.assertGreater(delay, 0.0)
+        self.assertLessEqual(delay, 0.11)
+        self.assertEqual(limiter.stats()["throttled_requests"], 1)
+
+    def test_tokens_per_minute_throttles(self):
+        limiter = RateLimiter(tokens_per_minute=6000)
+        self.assertEqual(limiter.reserve(tokens=6000), 0.0)
+        self.assertAlmostEqual(limiter.reserve(tokens=100), 1.0, places=1)
+
+    def test_retry_honors_retry_after(self):
+        limiter = RateLimiter()
+        provider = flaky_provider(
+            [ProviderHTTPError("429", status_code=429, retry_after=0.05),
+             ProviderHTTPError("503", status_code=503)],
+            rate_limiter=limiter,
+            retry_policy=RetryPolicy(max_retries=3, base_delay=0.01),
+        )
+
+        start = time.perf_counter()
+        self.assertEqual(provider.generate_text("hola"), "ok")
+
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)
+        self.assertEqual(provider.calls, 3)
+        self.assertEqual(limiter.stats()["retries"], 2)
+
+    def test_non_retryable_errors_propagate(self):
+        provider = flaky_provider([ProviderHTTPError("400", status_code=400)],
+                                  rate_limiter=RateLimiter(),
+                                  retry_policy=RetryPolicy(max_retries=3))
+        with self.assertRaises(RuntimeError):
+            provider.generate_text("hola")
+        self.assertEqual(provider.calls, 1)
+
+    def test_gives_up_after_max_retries(self):
+        provider = flaky_provider([ProviderHTTPError("429", status_code=429, retry_after=0)] * 5,
+                                  rate_limiter=RateLimiter(),
+                                  retry_policy=RetryPolicy(max_retries=2))
+        with self.assertRaises(ProviderHTTPError):
+            provider.generate_text("hola")
+        self.assertEqual(provider.calls, 3)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("2"), 2.0)
+        self.assertIsNone(parse_retry_after("mañana"))
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
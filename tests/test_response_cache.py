@@ -0,0 +1,92 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from providers.fake_provider import FakeLLMProvider
+from providers.response_cache import ResponseCache, make_cache_key
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "responses.sqlite3")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_provider_hits_cache_for_identical_request(self):
+        cache = ResponseCache(path=self.path)
+        provider = FakeLLMProvider(cache=cache)
+
+        first = provider.generate_text("info sistema", max_tokens=300)
+        second = provider.generate_text("info sistema", max_tokens=300)
+
+        self.assertEqual(first, second)
+        self.assertEqual(provider.calls, 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_different_params_miss(self):
+        provider = FakeLLMProvider(cache=ResponseCache(path=self.path))
+
+        provider.generate_text("info sistema", max_tokens=300)
+        provider.generate_text("info sistema", max_tokens=100)
+        provider.generate_text("info sistema", max_tokens=300, temperature=0.0)
+
+        self.assertEqual(provider.calls, 3)
+
+    def test_bypass_flag(self):
+        provider = FakeLLMProvider(cache=ResponseCache(path=self.path))
+
+        provider.generate_text("hola")
+        provider.generate_text("hola", use_cache=False)
+
+        self.assertEqual(provider.calls, 2)
+
+    def test_disk_store_survives_new_instance(self):
+        key = make_cache_key("ns", "hola", "m", 10, 0.7)
+        cache = ResponseCache(path=self.path)
+        cache.set(key, "respuesta")
+        cache.close()
+
+        reopened = ResponseCache(path=self.path)
+        self.assertEqual(reopened.get(key), "respuesta")
+        self.assertEqual(reopened.stats()["disk_hits"], 1)
+
+    def test_ttl_expiration(self):
+        cache = ResponseCache(path=self.path, ttl=0.05)
+        cache.set("k", "v")
+        time.sleep(0.1)
+
+        self.assertIsNone(cache.get("k"))
+        self.assertGreaterEqual(cache.stats()["expirations"], 1)
+
+    def test_size_eviction(self):
+        cache = ResponseCache(path=self.path, memory_entries=2, max_disk_entries=3)
+        for i in range(5):
+            cache.set(f"k{i}", f"v{i}")
+
+        self.assertIsNone(cache.get("k0"))
+        self.assertEqual(cache.get("k4"), "v4")
+        self.assertEqual(cache.stats()["memory_size"], 2)
+
+    def test_relative_paths_live_in_user_cache_dir(self):
+        with mock.patch.dict(os.environ, {"AGENT_CACHE_DIR": self.tmpdir.name}):
+            cache = ResponseCache()
+            cache.set("k", "v")
+            cache.close()
+            self.assertEqual(cache.path, self.path)
+            self.assertTrue(os.path.exists(self.path))
+
+        with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": self.tmpdir.name}):
+            os.environ.pop("AGENT_CACHE_DIR", None)
+            self.assertEqual(ResponseCache(path="r.sqlite3").path,
+                             os.path.join(self.tmpdir.name, "agent-general", "r.sqlite3"))
+        self.assertEqual(ResponseCache(path="/tmp/r.sqlite3").path, "/tmp/r.sqlite3")
+
+
+if __name__ == '__main__':
+    unittest.main()
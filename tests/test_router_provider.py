@@ -0,0 +1,89 @@
+import time
+import unittest
+
+from providers.async_utils import run_sync
+from providers.base_provider import ProviderBase
+from providers.circuit_breaker import CircuitBreaker
+from providers.fake_provider import FakeLLMProvider
+from providers.router_provider import RouterProvider, build_provider
+
+
+def stub_provider(name, delay=0.0, fail=False, cls=FakeLLMProvider):
+    """
+    Proveedor simulado que responde su nombre. Cada uno representa un
+    proveedor distinto, con su propio circuito.
+    """
+    return cls(script=[name], latency=delay, error_rate=1.0 if fail else 0.0, error_status=503,
+               circuit_breaker=CircuitBreaker(name, enabled=False))
+
+
+class TestRouterProvider(unittest.TestCase):
+
+    def test_fallback_on_error(self):
+        router = RouterProvider([stub_provider("a", fail=True), stub_provider("b")])
+        self.assertEqual(router.generate_text("hola"), "b")
+        self.assertEqual(router.stats()["fallbacks"], 1)
+
+    def test_all_backends_fail(self):
+        router = RouterProvider([stub_provider("a", fail=True), stub_provider("b", fail=True)])
+        with self.assertRaises(RuntimeError):
+            router.generate_text("hola")
+
+    def test_hedged_sync_returns_fastest(self):
+        router = RouterProvider([stub_provider("lento", delay=1.0), stub_provider("rapido", delay=0.01)],
+                                policy="hedged", hedge_delay=0.05)
+        start = time.perf_counter()
+        self.assertEqual(router.generate_text("hola"), "rapido")
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(router.stats()["hedge_wins"], 1)
+
+    def test_hedged_async_cancels_loser(self):
+        lento = stub_provider("lento", delay=1.0)
+        router = RouterProvider([lento, stub_provider("rapido", delay=0.01)],
+                                policy="hedged", hedge_delay=0.05)
+        self.assertEqual(run_sync(router.agenerate_text("hola")), "rapido")
+        self.assertEqual(lento.cancelled, 1)
+
+    def test_hedged_sync_cancels_loser(self):
+        lento = stub_provider("lento", delay=1.0)
+        router = RouterProvider([lento, stub_provider("rapido", delay=0.01)],
+                                policy="hedged", hedge_delay=0.05)
+        self.assertEqual(router.generate_text("hola"), "rapido")
+        self.assertEqual(lento.cancelled, 1)
+
+    def test_hedged_sync_without_native_async(self):
+        class ThreadOnly(FakeLLMProvider):
+            _agenerate_text = ProviderBase._agenerate_text
+
+        router = RouterProvider([stub_provider("lento", delay=1.0, cls=ThreadOnly),
+                                 stub_provider("rapido", delay=0.01, cls=ThreadOnly)],
+                                policy="hedged", hedge_delay=0.05)
+        start = time.perf_counter()
+        self.assertEqual(router.generate_text("hola"), "rapido")
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_build_provider_skips_disabled_backends(self):
+        provider = build_provider({"openai": {"api_keys": ["sk-uno"]},
+                                   "claude": {"api_keys": ["sk-dos"], "enabled": False}})
+        self.assertEqual(provider.provider_name, "openai")
+        provider = build_provider({"openai": {"api_keys": ["sk-uno"]},
+                                   "claude": {"api_keys": ["sk-dos"], "enabled": True}})
+        self.assertEqual(provider.provider_name, "router")
+
+    def test_hedged_does_not_hedge_fast_primary(self):
+        secundario = stub_provider("b")
+        router = RouterProvider([stub_provider("a", delay=0.01), secundario],
+                                policy="hedged", hedge_delay=0.5)
+        self.assertEqual(router.generate_text("hola"), "a")
+        self.assertEqual(secundario.calls, 0)
+
+    def test_weighted_distribution(self):
+        a, b = stub_provider("a"), stub_provider("b")
+        router = RouterProvider([a, b], policy="weighted", weights=[1, 0.0001])
+        for i in range(50):
+            router.generate_text(f"p{i}")
+        self.assertGreater(a.calls, 45)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import time
+import unittest
+
+from agent.rule_engine import RuleEngine
+from agent.task import TaskPriority
+from agent.task_decomposer import TaskDecomposer
+from providers.fake_provider import FakeLLMProvider
+from providers.plan_cache import PlanCache
+from utils.command_validator import validate_command
+
+
+class TestRuleEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = RuleEngine.from_file("config/rules.yaml")
+
+    def test_known_intents(self):
+        self.assertEqual(self.engine.plan("Dame info del sistema"),
+                         [{"tarea": "Mostrar información del host, CPU, memoria y disco",
+                           "comando": "uname -a && lscpu && free -h && df -h"}])
+        match = self.engine.match("lista los archivos ocultos en el directorio /etc")
+        self.assertEqual(match["intent"], "hidden_files")
+        self.assertEqual(match["params"], {"directory": "/etc"})
+        self.assertEqual([t["command"] for t in match["tasks"]],
+                         ["test -d /etc", "ls -A /etc | grep '^\\.'"])
+        self.assertEqual(self.engine.match("muestra archivos")["params"], {"directory": "."})
+        self.assertEqual(self.engine.match("muestra los discos")["confidence"], 0.7)
+
+    def test_other_actions_do_not_match(self):
+        for request in ["desmonta el disco /dev/sdb1", "formatea el disco /dev/sdb",
+                        "mata los procesos de firefox", "borrar archivos ocultos en /tmp",
+                        "bórralos, son archivos ocultos", "cambiar mi ip a 10.0.0.5"]:
+            with self.subTest(request=request):
+                self.assertIsNone(self.engine.match(request))
+        self.assertEqual(self.engine.match("¿cuál es mi ip?")["intent"], "ip_address")
+
+    def test_partial_or_compound_requests_need_the_model(self):
+        for request in ["lista archivos de mas de 100 MB en /home",
+                        "muestra archivos de configuración en /etc"]:
+            with self.subTest(request=request):
+                match = self.engine.match(request)
+                self.assertEqual(match["params"], {"directory": "."})
+                self.assertLess(match["confidence"], 0.8)
+        for request in ["abre el puerto 22 y muestra mi ip",
+                        "sube el volumen y muestra los procesos"]:
+            with self.subTest(request=request):
+                self.assertIsNone(self.engine.match(request))
+
+    def test_plan_respects_min_confidence(self):
+        self.assertIsNone(self.engine.plan("muestra los discos", min_confidence=0.8))
+        self.assertIsNotNone(self.engine.plan("muestra los discos", min_confidence=0.6))
+
+        stats = self.engine.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["below_threshold"]), (1, 1, 1))
+
+    def test_plan_keeps_dependencies(self):
+        plan = self.engine.plan("archivos ocultos en /etc")
+        self.assertEqual((plan[0]["id"], plan[0]["critical"]), ("validate_directory", True))
+        self.assertEqual(plan[1]["depends_on"], ["validate_directory"])
+
+    def test_rule_commands_pass_validation(self):
+        for rule in self.engine.rules:
+            for task in rule.render(rule.params):
+                with self.subTest(intent=rule.intent, command=task["command"]):
+                    self.assertTrue(validate_command(task["command"])["valid"])
+
+    def test_home_directory_is_expanded(self):
+        match = self.engine.match("archivos ocultos en ~/docs")
+        self.assertEqual(match["tasks"][0]["command"],
+                         "test -d " + os.path.expanduser("~/docs"))
+
+    def test_unknown_requests_and_hit_rate(self):
+        self.assertIsNone(self.engine.plan("revisa los recursos del sistema"))
+        self.assertIsNone(self.engine.plan("comprueba el estado de nginx.service"))
+        self.engine.plan("¿cuánta memoria queda?")
+        self.engine.plan("espacio en disco")
+
+        stats = self.engine.stats()
+        self.assertEqual((stats["lookups"], stats["hits"], stats["misses"]), (4, 2, 2))
+        self.assertEqual(stats["hit_rate"], 0.5)
+        self.assertEqual(stats["intents"], {"memory": 1, "disk_usage": 1})
+
+    def test_parameters_are_quoted_in_commands(self):
+        engine = RuleEngine([{
+            "intent": "buscar",
+            "patterns": [r"busca (?P<nombre>.+)"],
+            "tasks": [{"description": "Buscar '{nombre}'", "command": "find . -name {nombre}"}],
+        }])
+        match = engine.match("busca x; rm -rf ~")
+        self.assertEqual(match["tasks"][0]["description"], "Buscar 'x; rm -rf ~'")
+        self.assertEqual(match["tasks"][0]["command"], "find . -name 'x; rm -rf ~'")
+
+    def test_disabled(self):
+        self.assertIsNone(RuleEngine.from_file("config/rules.yaml", enabled=False)
+                          .match("info sistema"))
+
+    def test_decomposer_skips_provider(self):
+        provider = FakeLLMProvider()
+        decomposer = TaskDecomposer({}, provider=provider, plan_cache=PlanCache(enabled=False),
+                                    rule_engine=self.engine)
+        start = time.perf_counter()
+        tasks = decomposer.decompose({"type": "GENERAL",
+                                      "description": "muestra los archivos ocultos"})
+        self.assertLess(time.perf_counter() - start, 0.05)
+
+        self.assertEqual(provider.calls, 0)
+        self.assertEqual([t.id for t in tasks], ["validate_directory", "list_hidden_files"])
+        self.assertEqual(tasks[0].priority, TaskPriority.HIGH)
+        self.assertTrue(tasks[0].critical)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import contextlib
+import io
+import threading
+import time
+import unittest
+from unittest import mock
+
+from agent.executor import Executor
+from agent.scheduler import DAGScheduler
+from agent.task import Task, TaskPriority, TaskStatus
+
+
+def sleeper(durations, failures=(), log=None):
+    """
+    Función run_task que espera durations[id] segundos (o hasta la cancelación).
+    """
+    def run(task, cancel):
+        if log is not None:
+            log.append(task.id)
+        if cancel.wait(durations.get(task.id, 0.0)):
+            return {"success": False, "output": None, "error": "Cancelada", "cancelled": True}
+        if task.id in failures:
+            return {"success": False, "output": None, "error": "falló"}
+        return {"success": True, "output": task.id}
+    return run
+
+
+class TestDAGScheduler(unittest.TestCase):
+
+    def test_runs_independent_tasks_in_parallel(self):
+        tasks = [Task("a", id="a"), Task("b", id="b"), Task("c", id="c", depends_on=["a"]),
+                 Task("d", id="d", depends_on=["b", "c"])]
+        durations = {"a": 0.1, "b": 0.15, "c": 0.1, "d": 0.05}
+
+        result = DAGScheduler(sleeper(durations), max_workers=4).run(tasks)
+
+        # Camino crítico a -> c -> d = 0.25s frente a 0.4s en serie
+        self.assertLess(result["seconds"], 0.35)
+        self.assertEqual(result["results"]["d"]["output"], "d")
+        self.assertEqual(result["order"][-1], "d")
+        self.assertTrue(all(t.status == TaskStatus.COMPLETED for t in tasks))
+        self.assertLess(tasks[2].started_at - tasks[0].completed_at, 0.05)
+
+    def test_priority_and_bounded_pool(self):
+        log = []
+        tasks = [Task("baja", id="baja", priority=TaskPriority.LOW),
+                 Task("media", id="media"),
+                 Task("alta", id="alta", priority=TaskPriority.HIGH)]
+        DAGScheduler(sleeper({}, log=log), max_workers=1).run(tasks)
+        self.assertEqual(log, ["alta", "media", "baja"])
+
+    def test_critical_failure_cancels_dependents_and_siblings(self):
+        tasks = [Task("validar", id="validar", critical=True),
+                 Task("lento", id="lento"),
+                 Task("usar", id="usar", depends_on=["validar"])]
+        result = DAGScheduler(sleeper({"validar": 0.05, "lento": 5}, failures={"validar"}),
+                              max_workers=2).run(tasks)
+
+        self.assertLess(result["seconds"], 1)
+        self.assertEqual(result["critical_failure"], "validar")
+        self.assertEqual([t.status for t in tasks],
+                         [TaskStatus.FAILED, TaskStatus.CANCELLED, TaskStatus.CANCELLED])
+        self.assertEqual(sorted(result["cancelled"]), ["lento", "usar"])
+        self.assertNotIn("usar", result["results"])
+
+    def test_non_critical_failure_only_cancels_dependents(self):
+        tasks = [Task("a", id="a"), Task("b", id="b", depends_on=["a"]), Task("c", id="c")]
+        DAGScheduler(sleeper({}, failures={"a"})).run(tasks)
+        self.assertEqual([t.status for t in tasks],
+                         [TaskStatus.FAILED, TaskStatus.CANCELLED, TaskStatus.COMPLETED])
+
+    def test_invalid_graphs(self):
+        with self.assertRaises(ValueError):
+            DAGScheduler(sleeper({})).run([Task("a", id="a", depends_on=["x"])])
+        with self.assertRaises(ValueError):
+            DAGScheduler(sleeper({})).run([Task("a", id="a", depends_on=["b"]),
+                                           Task("b", id="b", depends_on=["a"])])
+
+
+class TestExecutorTasks(unittest.TestCase):
+
+    def test_execute_task_and_cancellation(self):
+        executor = Executor(max_workers=2)
+        result = executor.execute_task(Task("eco", command="echo hola"))
+        self.assertEqual((result["success"], result["output"]), (True, "hola"))
+        self.assertFalse(executor.execute_task(Task("x", command="reboot"))["success"])
+
+        cancel = threading.Event()
+        threading.Timer(0.1, cancel.set).start()
+        start = time.perf_counter()
+        result = executor.execute_task(Task("espera", command="tail -f /dev/null"),
+                                       cancel)
+        self.assertTrue(result["cancelled"])
+        self.assertLess(time.perf_counter() - start, 1)
+
+    def test_execute_runs_plans_through_the_scheduler(self):
+        # Plan de una regla: las tareas independientes van en paralelo
+        plan = [{"tarea": "uno", "comando": "/bin/sleep 0.3", "id": "uno"},
+                {"tarea": "dos", "comando": "/bin/sleep 0.3", "id": "dos"}]
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = Executor(plan, max_workers=2).execute(mode="auto")
+        self.assertLess(time.perf_counter() - start, 0.55)
+        self.assertEqual(sorted(result["order"]), ["dos", "uno"])
+
+        # Una tarea crítica fallida detiene las que dependen de ella
+        plan = [{"tarea": "validar", "comando": "test -d /no/existe", "id": "validar",
+                 "critical": True},
+                {"tarea": "listar", "comando": "ls -A /no/existe", "id": "listar",
+                 "depends_on": ["validar"]}]
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = Executor(plan).execute(mode="auto")
+        self.assertEqual(result["critical_failure"], "validar")
+        self.assertEqual(result["order"], ["validar"])
+
+    def test_execute_keeps_provider_steps_in_order(self):
+        plan = [{"tarea": "a", "comando": "echo a"}, {"tarea": "b", "comando": "echo b"}]
+        tasks = Executor._plan(plan)
+        self.assertEqual([t.depends_on for t in tasks], [[], [tasks[0].id]])
+
+    def test_interactive_confirms_each_task(self):
+        plan = [{"tarea": "a", "comando": "echo a", "id": "a"},
+                {"tarea": "b", "comando": "echo b", "id": "b", "depends_on": ["a"]},
+                {"tarea": "c", "comando": "echo c", "id": "c"}]
+        output = io.StringIO()
+        with mock.patch("builtins.input", side_effect=["n", "s", "s"]), \
+                contextlib.redirect_stdout(output):
+            result = Executor(plan).execute(mode="interactive")
+        self.assertEqual(result["order"], ["a", "c"])
+        self.assertEqual(sorted(result["cancelled"]), ["a", "b"])
+        self.assertIn("[3] c", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from config.settings import load_settings
+from providers import provider_config
+
+
+class TestSettings(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        provider_config.reset_settings_cache()
+
+    def tearDown(self):
+        provider_config.reset_settings_cache()
+        self.tmpdir.cleanup()
+
+    def test_providers_read_the_same_file(self):
+        path = os.path.join(self.tmpdir.name, "settings.yaml")
+        with open(path, "w") as f:
+            f.write("cache:\n  enabled: false\nproviders:\n  openai:\n    log_level: file\n")
+
+        with mock.patch.dict(os.environ, {"AGENT_SETTINGS": path}):
+            self.assertEqual(load_settings()["cache"], {"enabled": False})
+            self.assertEqual(provider_config.get_section("cache"), {"enabled": False})
+            self.assertEqual(provider_config.get_provider_settings("openai"), {"log_level": "file"})
+
+    def test_missing_file_without_defaults(self):
+        path = os.path.join(self.tmpdir.name, "nada.yaml")
+        self.assertEqual(load_settings(path, create_default=False), {})
+        self.assertFalse(os.path.exists(path))
+
+        self.assertIn("providers", load_settings(path))
+        self.assertTrue(os.path.exists(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import concurrent.futures
+import time
+import unittest
+
+from utils.shell_pool import ShellPool
+from utils.system_handlers import execute_command
+
+
+class TestShellPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = ShellPool(size=2, max_commands=5)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_same_contract_as_execute_command(self):
+        for command in ["echo hola", "ls /no/existe", "reboot", "echo 'sin cerrar"]:
+            result = self.pool.execute(command)
+            expected = execute_command(command)
+            self.assertEqual(result.keys(), expected.keys())
+            self.assertEqual((result["success"], result["output"], result.get("returncode")),
+                             (expected["success"], expected["output"], expected.get("returncode")))
+
+    def test_cwd_and_env_are_isolated_per_command(self):
+        self.assertEqual(self.pool.execute("pwd", working_dir="/tmp")["output"], "/tmp")
+        self.assertEqual(self.pool.execute("echo $DATO", env={"DATO": "a 'b'"})["output"], "a 'b'")
+
+        self.pool.execute("cd /; echo $DATO")
+        result = self.pool.execute("echo \"[$DATO]\"; pwd", working_dir="/tmp")
+        self.assertEqual(result["output"], "[]\n/tmp")
+        self.assertEqual(self.pool.stats()["spawned"], 1)
+
+        with self.assertRaises(ValueError):
+            self.pool.execute("echo", env={"NO VALIDA": "x"})
+
+    def test_recycles_after_max_commands_and_timeout(self):
+        for _ in range(6):
+            self.assertTrue(self.pool.execute("echo hola")["success"])
+        self.assertEqual(self.pool.stats()["recycled"], 1)
+
+        start = time.perf_counter()
+        result = self.pool.execute("/bin/sleep 5", timeout=0.2)
+        self.assertIn("tiempo máximo", result["error"])
+        self.assertLess(time.perf_counter() - start, 2)
+        self.assertEqual(self.pool.stats()["recycled"], 2)
+        self.assertEqual(self.pool.execute("echo sigue")["output"], "sigue")
+
+    def test_concurrent_commands_share_bounded_workers(self):
+        with concurrent.futures.ThreadPoolExecutor(max_workers=6) as threads:
+            results = list(threads.map(lambda i: self.pool.execute(f"echo {i}"), range(30)))
+
+        self.assertEqual([r["output"] for r in results], [str(i) for i in range(30)])
+        self.assertLessEqual(self.pool.stats()["workers"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
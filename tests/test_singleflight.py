@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from providers.fake_provider import FakeLLMProvider
+from providers.retry import ProviderHTTPError, RetryPolicy
+from providers.singleflight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            started.set()
+            release.wait(2)
+            return "ok"
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            leader = pool.submit(flight.do, "k", fn)
+            started.wait(2)
+            waiters = [pool.submit(flight.do, "k", fn) for _ in range(7)]
+            while flight.stats["coalesced"] < 7:
+                threading.Event().wait(0.005)
+            release.set()
+            results = [leader.result()] + [w.result() for w in waiters]
+
+        self.assertEqual(results, ["ok"] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.stats, {"leaders": 1, "coalesced": 7, "errors": 0})
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_errors_propagate_to_all_waiters(self):
+        flight = SingleFlight()
+
+        async def main():
+            async def fn():
+                await asyncio.sleep(0.02)
+                raise ValueError("fallo")
+
+            return await asyncio.gather(*(flight.ado("k", fn) for _ in range(5)),
+                                        return_exceptions=True)
+
+        results = asyncio.run(main())
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        self.assertEqual(flight.stats, {"leaders": 1, "coalesced": 4, "errors": 1})
+
+    def test_cancelled_waiter_does_not_cancel_others(self):
+        flight = SingleFlight()
+
+        async def main():
+            async def fn():
+                await asyncio.sleep(0.05)
+                return "ok"
+
+            first = asyncio.ensure_future(flight.ado("k", fn))
+            second = asyncio.ensure_future(flight.ado("k", fn))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(main()), "ok")
+
+
+class TestProviderCoalescing(unittest.TestCase):
+
+    def test_burst_of_identical_requests_makes_one_call(self):
+        provider = FakeLLMProvider(latency=0.1)
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            results = list(pool.map(lambda _: provider.generate_text("estado del servicio"),
+                                    range(10)))
+
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(provider.calls, 1)
+        self.assertEqual(provider.coalescing_stats()["coalesced"], 9)
+
+    def test_async_burst_and_error_propagation(self):
+        provider = FakeLLMProvider(latency=0.05, error_rate=1.0, error_status=500,
+                                   retry_policy=RetryPolicy(max_retries=0))
+
+        async def main():
+            return await asyncio.gather(*(provider.agenerate_text("  ping \r\n") for _ in range(4)),
+                                        provider.agenerate_text("ping"),
+                                        return_exceptions=True)
+
+        results = asyncio.run(main())
+        self.assertTrue(all(isinstance(r, ProviderHTTPError) for r in results))
+        self.assertEqual(provider.calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
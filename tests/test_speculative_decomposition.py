@@ -0,0 +1,97 @@
+import threading
+import unittest
+
+from agent.rule_engine import RuleEngine
+from agent.task_decomposer import TaskDecomposer
+from providers.fake_provider import FakeLLMProvider
+from providers.plan_cache import PlanCache
+
+RESPUESTA_MONTAJE = ('[{"id": "mount_data", "description": "Montar la partición de datos", '
+                     '"command": "mount /dev/sdb1 /mnt/datos"}, '
+                     '{"id": "verify", "description": "Verificar", "command": "findmnt /mnt/datos"}]')
+
+
+class StreamProbe(FakeLLMProvider):
+    """
+    Proveedor simulado que anota cuántos fragmentos entrega y si se cerró el stream.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.yielded = 0
+        self.closed = threading.Event()
+
+    def _stream_text(self, *args, **kwargs):
+        try:
+            for token in super()._stream_text(*args, **kwargs):
+                self.yielded += 1
+                yield token
+        finally:
+            self.closed.set()
+
+
+def make_decomposer(provider, **kwargs):
+    return TaskDecomposer({}, provider=provider, plan_cache=PlanCache(enabled=False),
+                          rule_engine=RuleEngine.from_file("config/rules.yaml"), **kwargs)
+
+
+class TestSpeculativeDecomposition(unittest.TestCase):
+
+    def test_confident_rules_win_and_cancel_ai(self):
+        provider = StreamProbe(script=[RESPUESTA_MONTAJE], latency=0.2, token_delay=0.01)
+        decomposer = make_decomposer(provider)
+
+        # Primera petición sin regla: gana la IA y se aprende su latencia
+        primero = decomposer.decompose_speculative({"type": "GENERAL",
+                                                    "description": "prepara la copia de datos"})
+        self.assertEqual(primero["winner"], "ai")
+        self.assertEqual(primero["latency_saved"], 0.0)
+        self.assertIsNone(primero["confidence"])
+
+        provider.closed.clear()
+        provider.yielded = 0
+        result = decomposer.decompose_speculative({"type": "GENERAL",
+                                                   "description": "info del sistema"})
+        self.assertEqual(result["winner"], "rules")
+        self.assertEqual(result["source"], "rule:system_info")
+        self.assertEqual([t.command for t in result["tasks"]],
+                         ["uname -a && lscpu && free -h && df -h"])
+        self.assertLess(result["seconds"], 0.1)
+        self.assertGreater(result["latency_saved"], 0.1)
+
+        # La llamada a la IA se corta tras el primer fragmento
+        self.assertTrue(provider.closed.wait(2))
+        self.assertLessEqual(provider.yielded, 1)
+        self.assertEqual(decomposer.speculation_stats()["rules"], 1)
+        self.assertEqual(decomposer.speculation_stats()["ai"], 1)
+
+    def test_unsure_rules_wait_for_ai(self):
+        provider = FakeLLMProvider(script=[RESPUESTA_MONTAJE])
+        decomposer = make_decomposer(provider)
+        objective = {"type": "SYSTEM_MOUNT", "description": "monta la partición de datos",
+                     "confidence": 0.5}
+
+        result = decomposer.decompose_speculative(objective)
+        self.assertEqual(result["winner"], "ai")
+        # "de datos" queda fuera del patrón de la regla: confianza parcial
+        self.assertEqual(result["confidence"], 0.5)
+        self.assertEqual([t.id for t in result["tasks"]], ["mount_data", "verify"])
+
+        # Con un umbral más bajo basta el plan de inspección de las reglas
+        result = decomposer.decompose_speculative(objective, confidence_threshold=0.4)
+        self.assertEqual(result["winner"], "rules")
+        self.assertEqual([t.command for t in result["tasks"]], ["lsblk", "mount | column -t"])
+
+    def test_failed_ai_falls_back_to_weak_rules(self):
+        provider = FakeLLMProvider(error_rate=1.0, error_status=400)
+        decomposer = make_decomposer(provider, speculative=True)
+        tasks = decomposer.decompose({"type": "SYSTEM_FILE_OPERATION",
+                                      "description": "borra los temporales en el directorio /tmp",
+                                      "confidence": 0.9})
+
+        self.assertEqual([t.command for t in tasks], ["test -d /tmp"])
+        self.assertEqual(decomposer.speculation_stats()["rules"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import time
+import unittest
+
+from providers.claude_provider import ClaudeProvider
+from providers.fake_provider import FakeLLMProvider
+from providers.mock_server import MockLLMServer
+from providers.openai_provider import OpenAIProvider
+from providers.router_provider import RouterProvider
+from providers.warmup import start_warmup
+
+from helpers import make_provider
+
+
+class TestWarmUp(unittest.TestCase):
+
+    def setUp(self):
+        self.server = MockLLMServer().start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_openai_prefetches_models_into_ttl_cache(self):
+        provider = make_provider(OpenAIProvider, self.server)
+        fetches = []
+        fetch = provider._fetch_models
+        provider._fetch_models = lambda: fetches.append(1) or fetch()
+
+        result = start_warmup(provider, enabled=True).wait(5)
+        self.assertIsNone(result["error"])
+        self.assertEqual(result["models"], 2)
+
+        self.assertIn("gpt-3.5-turbo", provider.list_models())
+        self.assertEqual(len(fetches), 1)
+
+        provider._models_expires = time.monotonic()
+        provider.list_models()
+        self.assertEqual(len(fetches), 2)
+
+    def test_claude_opens_pooled_connection(self):
+        provider = make_provider(ClaudeProvider, self.server)
+        self.assertEqual(start_warmup(provider, enabled=True).wait(5)["status"], 200)
+
+        self.assertEqual(self.server.counters["connections"], 1)
+        # La primera petición real reutiliza la conexión abierta
+        provider.generate_text("info sistema")
+        self.assertEqual(self.server.counters["connections"], 1)
+
+    def test_errors_do_not_propagate(self):
+        router = RouterProvider([FakeLLMProvider(), make_provider(ClaudeProvider, self.server)])
+        self.server.stop()
+        result = start_warmup(router, enabled=True).wait(5)
+
+        self.assertIsNone(result["error"])
+        self.assertEqual(result["backends"][0]["models"], 1)
+        self.assertIn("error", result["backends"][1])
+        self.assertIsNone(start_warmup(router, enabled=False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ejecución asíncrona de comandos del sistema para el Agente Inteligente.
+
+Versión asyncio de system_handlers.execute_command: los comandos se lanzan con
+asyncio.create_subprocess_shell/_exec y un solo event loop supervisa cientos
+de procesos a la vez. Cada comando corre
+en su propio grupo de procesos para que un timeout o una cancelación terminen
+también a sus hijos, y un semáforo limita cuántos se ejecutan a la vez. La
+salida se lee en fragmentos con memoria acotada (ver utils/output_capture.py).
+
+La espera de los procesos hijos queda en manos del child watcher por defecto
+de asyncio: desde Python 3.12 usa pidfd en el propio loop; en versiones
+anteriores usa un hilo ligero por proceso, que solo espera a su salida.
+"""
+
+import asyncio
+import logging
+import os
+import shlex
+import signal
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+from providers.async_utils import LoopLocal, run_sync
+from utils.command_validator import validate_command
+from utils.output_capture import CHUNK_SIZE, OutputCapture
+
+logger = logging.getLogger(__name__)
+
+Command = Union[str, Sequence[str]]
+
+DEFAULT_MAX_CONCURRENCY = 64
+
+
+class AsyncCommandRunner:
+    """
+    Ejecuta comandos con asyncio respetando un límite de concurrencia.
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY, timeout: float = 30):
+        """
+        Inicializa el ejecutor.
+
+        Args:
+            max_concurrency: Número máximo de comandos en ejecución a la vez
+            timeout: Tiempo máximo por comando en segundos (por defecto)
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency debe ser al menos 1")
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        # El semáforo queda ligado al event loop en el que se usa
+        self._semaphores = LoopLocal(lambda: asyncio.Semaphore(max_concurrency))
+        self._lock = threading.Lock()
+        self._counters = {'started': 0, 'completed': 0, 'timeouts': 0, 'cancelled': 0,
+                          'running': 0, 'peak_running': 0}
+
+    async def execute(self, command: Command, timeout: Optional[float] = None,
+                      working_dir: Optional[str] = None, validate: bool = True) -> Dict[str, Any]:
+        """
+        Ejecuta un comando del sistema de forma segura.
+
+        Args:
+            command: Comando como texto (se ejecuta con la shell) o como lista
+                     de argumentos (se ejecuta sin shell)
+            timeout: Tiempo máximo de ejecución en segundos
+            working_dir: Directorio de trabajo para la ejecución
+            validate: Si es False no se valida el comando (el llamador ya lo hizo)
+
+        Returns:
+            Diccionario con el resultado de la ejecución (mismo formato que
+            system_handlers.execute_command)
+        """
+        timeout = self.timeout if timeout is None else timeout
+        text = command if isinstance(command, str) else shlex.join(command)
+
+        # Validar el comando antes de ejecutarlo
+        validation = validate_command(text) if validate else {'valid': True}
+        if not validation['valid']:
+            logger.warning(f"Comando no válido: {text}. Razón: {validation['reason']}")
+            return {
+                'success': False,
+                'output': None,
+                'error': f"Comando no válido: {validation['reason']}",
+                'command': text
+            }
+
+        async with self._semaphores.get():
+            try:
+                return await self._run(command, text, timeout, working_dir)
+            except asyncio.CancelledError:
+                self._count('cancelled')
+                raise
+            except Exception as e:
+                logger.error(f"Excepción al ejecutar comando: {text}. Error: {str(e)}")
+                return {
+                    'success': False,
+                    'output': None,
+                    'error': str(e),
+                    'command': text
+                }
+
+    async def execute_many(self, commands: Iterable[Command], timeout: Optional[float] = None,
+                           working_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Ejecuta varios comandos a la vez (como mucho max_concurrency).
+
+        Args:
+            commands: Comandos a ejecutar
+            timeout: Tiempo máximo de cada comando en segundos
+            working_dir: Directorio de trabajo para la ejecución
+
+        Returns:
+            Resultados en el mismo orden que los comandos
+        """
+        return list(await asyncio.gather(*(self.execute(c, timeout, working_dir)
+                                           for c in commands)))
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Devuelve los contadores del ejecutor.
+
+        Returns:
+            Diccionario con comandos iniciados, completados, con timeout,
+            cancelados, en curso y el máximo en curso a la vez
+        """
+        with self._lock:
+            return dict(self._counters)
+
+    async def _run(self, command: Command, text: str, timeout: float,
+                   working_dir: Optional[str]) -> Dict[str, Any]:
+        # Grupo de procesos propio: el timeout termina también a los hijos
+        if isinstance(command, str):
+            process = await asyncio.create_subprocess_shell(
+                command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                cwd=working_dir, start_new_session=True)
+        else:
+            process = await asyncio.create_subprocess_exec(
+                *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                cwd=working_dir, start_new_session=True)
+
+        self._started()
+        stdout, stderr = OutputCapture(), OutputCapture(spill_limit=0)
+        reading = asyncio.gather(_read(process.stdout, stdout), _read(process.stderr, stderr),
+                                 process.wait())
+        try:
+            await asyncio.wait_for(reading, timeout)
+        except asyncio.TimeoutError:
+            await _kill_group(process)
+            stdout.close(keep_spill=False)
+            self._count('timeouts')
+            logger.error(f"Timeout al ejecutar comando: {text}")
+            return {
+                'success': False,
+                'output': None,
+                'error': f"El comando excedió el tiempo máximo de ejecución ({timeout}s)",
+                'command': text
+            }
+        except asyncio.CancelledError:
+            await _kill_group(process)
+            stdout.close(keep_spill=False)
+            if reading.done() and not reading.cancelled():
+                reading.exception()  # Evita el aviso de excepción no recuperada
+            raise
+        finally:
+            self._finished()
+            stdout.close()
+
+        output = stdout.text().strip()
+        if process.returncode == 0:
+            logger.info(f"Comando ejecutado exitosamente: {text}")
+            result = {
+                'success': True,
+                'output': output,
+                'error': None,
+                'command': text,
+                'returncode': process.returncode
+            }
+        else:
+            error = stderr.text().strip()
+            logger.warning(f"Error al ejecutar comando: {text}. Error: {error}")
+            result = {
+                'success': False,
+                'output': output,
+                'error': error,
+                'command': text,
+                'returncode': process.returncode
+            }
+        if stdout.truncated:
+            result['output_truncated'] = True
+            result['output_file'] = stdout.spill_path
+        return result
+
+    def _started(self) -> None:
+        with self._lock:
+            self._counters['started'] += 1
+            self._counters['running'] += 1
+            self._counters['peak_running'] = max(self._counters['peak_running'],
+                                                 self._counters['running'])
+
+    def _finished(self) -> None:
+        with self._lock:
+            self._counters['running'] -= 1
+            self._counters['completed'] += 1
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+
+async def _read(stream: asyncio.StreamReader, capture: OutputCapture) -> None:
+    """
+    Lee un flujo del proceso en fragmentos hasta el final.
+    """
+    while True:
+        chunk = await stream.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        capture.feed(chunk)
+
+
+async def _kill_group(process: asyncio.subprocess.Process) -> None:
+    """
+    Termina el grupo de procesos de un comando y espera a que salga.
+    """
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    await process.wait()
+
+
+_default_runner = AsyncCommandRunner()
+
+
+async def execute_command_async(command: Command, timeout: float = 30,
+                                working_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Ejecuta un comando del sistema de forma asíncrona con el ejecutor compartido.
+
+    Args:
+        command: Comando como texto o como lista de argumentos
+        timeout: Tiempo máximo de ejecución en segundos
+        working_dir: Directorio de trabajo para la ejecución
+
+    Returns:
+        Diccionario con el resultado de la ejecución
+    """
+    return await _default_runner.execute(command, timeout, working_dir)
+
+
+def execute_commands(commands: Iterable[Command], timeout: float = 30,
+                     working_dir: Optional[str] = None,
+                     max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> List[Dict[str, Any]]:
+    """
+    Ejecuta varios comandos a la vez desde código síncrono.
+
+    Args:
+        commands: Comandos a ejecutar
+        timeout: Tiempo máximo de cada comando en segundos
+        working_dir: Directorio de trabajo para la ejecución
+        max_concurrency: Número máximo de comandos en ejecución a la vez
+
+    Returns:
+        Resultados en el mismo orden que los comandos
+    """
+    runner = AsyncCommandRunner(max_concurrency=max_concurrency, timeout=timeout)
+    return run_sync(runner.execute_many(commands, working_dir=working_dir))
+
@@ -37,9 +37,23 @@ ALLOWED_COMMANDS: Set[str] = {
     'ls', 'dir', 'pwd', 'cd', 'echo', 'cat', 'more', 'less', 'head', 'tail',
     'grep', 'find', 'cp', 'mv', 'mkdir', 'touch', 'chmod', 'chown', 'df', 'du',
     'ps', 'top', 'free', 'uname', 'whoami', 'date', 'uptime', 'which', 'whereis',
-    'man', 'mount', 'umount', 'fdisk -l', 'lsblk', 'history', 'ping', 'traceroute'
+    'man', 'mount', 'umount', 'fdisk -l', 'lsblk', 'history', 'ping', 'traceroute',
+    'test', 'column', 'lscpu', 'ip -brief address'
 }
 
+def _is_allowed(command: str) -> bool:
+    """
+    Comprueba si un comando (ya en minúsculas) está en la lista de permitidos.
+    
+    Las entradas de una palabra permiten el comando con cualquier argumento;
+    las de varias palabras ('fdisk -l') solo ese comando exacto, porque el
+    mismo programa con otros argumentos puede modificar el sistema.
+    """
+    words = command.split()
+    if not words:
+        return False
+    return words[0] in ALLOWED_COMMANDS or ' '.join(words) in ALLOWED_COMMANDS
+
 def validate_command(command: str) -> Dict[str, bool]:
     """
     Valida si un comando es seguro para ejecutar.
@@ -69,12 +83,12 @@ def validate_command(command: str) -> Dict[str, bool]:
     
     # Verificar comandos con tuberías (|), que pueden ser complejos
     if '|' in cleaned_command:
-        pipe_commands = [cmd.strip().split()[0] for cmd in cleaned_command.split('|') if cmd.strip()]
+        pipe_commands = [cmd.strip() for cmd in cleaned_command.split('|') if cmd.strip()]
         
         # Verificar cada comando en la tubería
         for cmd in pipe_commands:
-            if cmd not in ALLOWED_COMMANDS:
-                reason = f"El comando '{cmd}' en la tubería no está en la lista de permitidos"
+            if not _is_allowed(cmd):
+                reason = f"El comando '{cmd.split()[0]}' en la tubería no está en la lista de permitidos"
                 logger.warning(reason)
                 return {'valid': False, 'reason': reason}
     
@@ -88,7 +102,7 @@ def validate_command(command: str) -> Dict[str, bool]:
     
     # Verificar si el comando base está en la lista de permitidos
     # o si parece una ruta a un ejecutable válido
-    if (base_command in ALLOWED_COMMANDS or 
+    if (_is_allowed(cleaned_command) or 
         (os.path.exists(base_command) and os.access(base_command, os.X_OK))):
         return {'valid': True, 'reason': None}
     
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Escritor de logs JSONL en segundo plano para el Agente Inteligente.
+Este módulo permite registrar peticiones y respuestas sin bloquear el hilo
+que las produce: los registros se encolan en una cola acotada y un hilo
+dedicado los serializa y escribe por lotes.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+Record = Union[Dict[str, Any], Callable[[], Dict[str, Any]]]
+
+
+class BackgroundJSONLWriter:
+    """
+    Añade registros JSON (uno por línea) a un archivo desde un hilo propio.
+    """
+
+    def __init__(self, path: str, max_queue: int = 10000, batch_size: int = 200,
+                 flush_interval: float = 0.5):
+        """
+        Inicializa el escritor. El hilo se arranca con el primer registro.
+
+        Args:
+            path: Archivo JSONL de destino
+            max_queue: Tamaño máximo de la cola; si se llena, los registros se descartan
+            batch_size: Número máximo de registros escritos en cada lote
+            flush_interval: Segundos máximos que un registro espera en la cola
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        self.stats = {'written': 0, 'dropped': 0, 'batches': 0, 'errors': 0}
+
+    def write(self, record: Record) -> bool:
+        """
+        Encola un registro sin bloquear.
+
+        Args:
+            record: Diccionario a registrar, o función sin argumentos que lo
+                    devuelve (se evalúa en el hilo escritor)
+
+        Returns:
+            True si el registro se encoló, False si se descartó por cola llena
+        """
+        if self._closed:
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.stats['dropped'] += 1
+            return False
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """
+        Espera a que se escriban los registros pendientes.
+
+        Args:
+            timeout: Tiempo máximo de espera en segundos
+        """
+        deadline = time.monotonic() + timeout
+        while self._thread is not None and self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(0.005)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Escribe lo pendiente y detiene el hilo escritor.
+
+        Args:
+            timeout: Tiempo máximo de espera en segundos
+        """
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        if self._thread is not None:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                thread = threading.Thread(target=self._run, name="jsonl-writer", daemon=True)
+                thread.start()
+                self._thread = thread
+
+    def _run(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        while True:
+            batch = [self._queue.get()]
+            # Acumular registros hasta completar el lote o agotar el intervalo
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1] is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            stop = batch[-1] is None
+            records = [r for r in batch if r is not None]
+            self._write_batch(records)
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write_batch(self, records) -> None:
+        if not records:
+            return
+        lines = []
+        for record in records:
+            try:
+                data = record() if callable(record) else record
+                lines.append(json.dumps(data, ensure_ascii=False, separators=(',', ':'),
+                                        default=str))
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.warning(f"Registro JSONL descartado: {e}")
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+            self.stats['written'] += len(lines)
+            self.stats['batches'] += 1
+        except OSError as e:
+            self.stats['errors'] += len(lines)
+            logger.error(f"Error al escribir en '{self.path}': {e}")
+
+
+_writers: Dict[str, BackgroundJSONLWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_jsonl_writer(path: str) -> BackgroundJSONLWriter:
+    """
+    Devuelve el escritor compartido para un archivo, creándolo si no existe.
+
+    Args:
+        path: Archivo JSONL de destino
+
+    Returns:
+        Instancia de BackgroundJSONLWriter
+    """
+    with _writers_lock:
+        writer = _writers.get(path)
+        if writer is None:
+            writer = BackgroundJSONLWriter(path)
+            _writers[path] = writer
+        return writer
+
+
+@atexit.register
+def _close_writers() -> None:
+    # Al salir del proceso se vuelcan los registros pendientes
+    with _writers_lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        writer.close(timeout=2.0)
@@ -2,30 +2,47 @@ import logging
 import os
 from logging.handlers import RotatingFileHandler
 
-# Define the logger
-logger = logging.getLogger('my_project')
-logger.setLevel(logging.DEBUG)
+LOG_FILE = 'logs/my_project.log'
 
-# Create handlers
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
 
-log_file = 'logs/my_project.log'
-os.makedirs(os.path.dirname(log_file), exist_ok=True)
-file_handler = RotatingFileHandler(log_file, maxBytes=5*1024*1024, backupCount=5)
-file_handler.setLevel(logging.DEBUG)
+def get_project_logger():
+    """
+    Devuelve el logger 'my_project', configurando sus handlers en el primer uso.
+    El archivo de log no se crea al importar el módulo.
+    """
+    logger = logging.getLogger('my_project')
+    if logger.handlers:
+        return logger
+    logger.setLevel(logging.DEBUG)
 
-# Create formatters
-console_formatter = logging.Formatter('%(levelname)s - %(message)s')
-file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    # Create handlers
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
 
-# Add formatters to handlers
-console_handler.setFormatter(console_formatter)
-file_handler.setFormatter(file_formatter)
+    os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
+    file_handler = RotatingFileHandler(LOG_FILE, maxBytes=5*1024*1024, backupCount=5)
+    file_handler.setLevel(logging.DEBUG)
+
+    # Create formatters
+    console_formatter = logging.Formatter('%(levelname)s - %(message)s')
+    file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    # Add formatters to handlers
+    console_handler.setFormatter(console_formatter)
+    file_handler.setFormatter(file_formatter)
+
+    # Add handlers to the logger
+    logger.addHandler(console_handler)
+    logger.addHandler(file_handler)
+    return logger
+
+
+def __getattr__(name):
+    # Compatibilidad con "from utils.logger import logger"
+    if name == 'logger':
+        return get_project_logger()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Add handlers to the logger
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
 
 def get_logger():
     logger = logging.getLogger("agent-general")
@@ -35,4 +52,4 @@ def get_logger():
         handler.setFormatter(formatter)
         logger.addHandler(handler)
         logger.setLevel(logging.INFO)
-    return logger
\ No newline at end of file
+    return logger
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Captura acotada de la salida de los comandos para el Agente Inteligente.
+
+La salida se lee en fragmentos de tamaño fijo. En memoria solo se guardan el
+principio (head) y el final (tail) del flujo; el flujo completo se vuelca a un
+archivo temporal, con un límite de bytes, únicamente cuando no cabe en memoria.
+Así un 'find /' o un 'cat' de un archivo enorme no hace crecer la memoria del
+agente: el coste por comando es constante sea cual sea el tamaño de la salida.
+"""
+
+import logging
+import os
+import selectors
+import tempfile
+import threading
+import time
+from typing import BinaryIO, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+HEAD_BYTES = 32 * 1024
+TAIL_BYTES = 32 * 1024
+SPILL_LIMIT = 16 * 1024 * 1024
+MAX_LINE_BYTES = 64 * 1024
+
+
+class OutputCapture:
+    """
+    Acumula un flujo de bytes con memoria acotada.
+    """
+
+    def __init__(self, head_bytes: int = HEAD_BYTES, tail_bytes: int = TAIL_BYTES,
+                 spill_limit: int = SPILL_LIMIT, max_line_bytes: int = MAX_LINE_BYTES,
+                 encoding: str = 'utf-8'):
+        """
+        Inicializa la captura.
+
+        Args:
+            head_bytes: Bytes del principio del flujo que se guardan en memoria
+            tail_bytes: Bytes del final del flujo que se guardan en memoria
+            spill_limit: Bytes máximos volcados al archivo temporal (0 para no
+                         volcar nada)
+            max_line_bytes: Longitud máxima de una línea en iter_lines; las más
+                            largas se entregan en trozos
+            encoding: Codificación con la que se decodifica la salida
+        """
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.spill_limit = spill_limit
+        self.max_line_bytes = max_line_bytes
+        self.encoding = encoding
+        self.total_bytes = 0
+        self.spilled_bytes = 0
+        self.spill_path: Optional[str] = None
+        self._head = bytearray()
+        self._tail = bytearray()
+        self._spill: Optional[BinaryIO] = None
+
+    @property
+    def truncated(self) -> bool:
+        """
+        True si parte del flujo no está en memoria.
+        """
+        return self.total_bytes > len(self._head) + len(self._tail)
+
+    @property
+    def spill_truncated(self) -> bool:
+        """
+        True si el flujo tampoco cabía entero en el archivo temporal.
+        """
+        return self.spill_path is not None and self.spilled_bytes < self.total_bytes
+
+    def feed(self, chunk: bytes) -> None:
+        """
+        Añade un fragmento del flujo.
+
+        Args:
+            chunk: Bytes leídos
+        """
+        self.total_bytes += len(chunk)
+        if len(self._head) < self.head_bytes:
+            room = self.head_bytes - len(self._head)
+            self._head += chunk[:room]
+            chunk = chunk[room:]
+        if not chunk:
+            return
+
+        if self._spill is None and self.spill_limit > 0 and \
+                len(self._tail) + len(chunk) > self.tail_bytes:
+            # Primera vez que algo sale de memoria: hasta ahora estaba todo en head + tail
+            self._open_spill()
+            self._write_spill(bytes(self._head))
+            self._write_spill(bytes(self._tail))
+        if self._spill is not None:
+            self._write_spill(chunk)
+
+        self._tail += chunk
+        excess = len(self._tail) - self.tail_bytes
+        if excess > 0:
+            del self._tail[:excess]
+
+    def iter_lines(self, stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+        """
+        Lee un flujo hasta el final y entrega sus líneas a medida que llegan.
+
+        Todo lo leído se añade también a la captura, de modo que al terminar
+        text() devuelve el resumen acotado de la salida.
+
+        Args:
+            stream: Archivo binario o tubería (p. ej. Popen.stdout)
+            chunk_size: Bytes leídos en cada lectura
+
+        Yields:
+            Líneas decodificadas, sin el salto de línea final
+        """
+        read = getattr(stream, 'read1', stream.read)
+        pending = bytearray()
+        while True:
+            chunk = read(chunk_size)
+            if not chunk:
+                break
+            self.feed(chunk)
+            pending += chunk
+            start = 0
+            while True:
+                end = pending.find(b'\n', start)
+                if end < 0:
+                    break
+                yield self._decode(pending[start:end])
+                start = end + 1
+            del pending[:start]
+            while len(pending) > self.max_line_bytes:
+                yield self._decode(pending[:self.max_line_bytes])
+                del pending[:self.max_line_bytes]
+        if pending:
+            yield self._decode(pending)
+
+    def text(self) -> str:
+        """
+        Devuelve la salida capturada (principio y final si no cabía entera).
+
+        Returns:
+            Texto decodificado, con una marca en lugar de los bytes omitidos
+        """
+        if not self.truncated:
+            return self._decode(self._head + self._tail)
+        omitted = self.total_bytes - len(self._head) - len(self._tail)
+        return (f"{self._decode(self._head)}\n[... {omitted} bytes omitidos ...]\n"
+                f"{self._decode(self._tail)}")
+
+    def summary(self) -> Dict[str, object]:
+        """
+        Devuelve los datos de la captura para incluirlos en un resultado.
+
+        Returns:
+            Diccionario con total_bytes, truncated, spill_path y spill_truncated
+        """
+        return {
+            'total_bytes': self.total_bytes,
+            'truncated': self.truncated,
+            'spill_path': self.spill_path,
+            'spill_truncated': self.spill_truncated,
+        }
+
+    def close(self, keep_spill: bool = True) -> None:
+        """
+        Cierra el archivo temporal.
+
+        Args:
+            keep_spill: Si es False, el archivo temporal también se borra
+        """
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+        if not keep_spill and self.spill_path:
+            try:
+                os.unlink(self.spill_path)
+            except OSError:
+                pass
+            self.spill_path = None
+
+    def __enter__(self) -> 'OutputCapture':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close(keep_spill=False)
+
+    def _open_spill(self) -> None:
+        fd, self.spill_path = tempfile.mkstemp(prefix='agent-output-', suffix='.log')
+        self._spill = os.fdopen(fd, 'wb')
+
+    def _write_spill(self, data: bytes) -> None:
+        room = self.spill_limit - self.spilled_bytes
+        if room <= 0:
+            return
+        data = data[:room]
+        try:
+            self._spill.write(data)
+            self.spilled_bytes += len(data)
+        except OSError as e:
+            # Sin espacio en disco, etc.: se conserva lo que hay en memoria
+            logger.warning(f"No se pudo volcar la salida a {self.spill_path}: {str(e)}")
+            self.spill_limit = self.spilled_bytes
+
+    def _decode(self, data: bytes) -> str:
+        return bytes(data).decode(self.encoding, errors='replace')
+
+
+def pump(process, stdout: OutputCapture, stderr: OutputCapture,
+         timeout: Optional[float] = None, cancel: Optional[threading.Event] = None,
+         chunk_size: int = CHUNK_SIZE, poll_interval: float = 0.05) -> Optional[str]:
+    """
+    Lee stdout y stderr de un proceso en fragmentos hasta que se cierran.
+
+    Sustituye a Popen.communicate(), que acumula toda la salida en memoria.
+    No termina el proceso: si devuelve 'timeout' o 'cancelled' es el llamador
+    quien debe matarlo.
+
+    Args:
+        process: Proceso lanzado con stdout=PIPE y stderr=PIPE en modo binario
+        stdout: Captura de la salida estándar
+        stderr: Captura de la salida de error
+        timeout: Tiempo máximo en segundos (None para no limitarlo)
+        cancel: Evento que interrumpe la lectura
+        chunk_size: Bytes leídos en cada lectura
+        poll_interval: Cada cuántos segundos se comprueba el evento de cancelación
+
+    Returns:
+        None si los flujos se cerraron, 'timeout' o 'cancelled'
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    captures = {process.stdout.fileno(): stdout, process.stderr.fileno(): stderr}
+    with selectors.DefaultSelector() as selector:
+        for fd in captures:
+            selector.register(fd, selectors.EVENT_READ)
+        while captures:
+            if cancel is not None and cancel.is_set():
+                return 'cancelled'
+            wait = poll_interval if cancel is not None else None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return 'timeout'
+                wait = remaining if wait is None else min(wait, remaining)
+            for key, _ in selector.select(wait):
+                chunk = os.read(key.fd, chunk_size)
+                if chunk:
+                    captures[key.fd].feed(chunk)
+                else:
+                    selector.unregister(key.fd)
+                    del captures[key.fd]
+    return None
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Pool de shells persistentes para el Agente Inteligente.
+
+execute_command lanza un /bin/sh nuevo por comando; en planes de muchos
+comandos pequeños ('test -d', 'echo', 'uname') casi todo el tiempo se va en
+fork/exec de la shell. Aquí cada worker es una shell de larga duración que
+recibe los comandos por su entrada estándar. Tras cada comando imprime un
+centinela con el código de salida, que marca dónde acaba su salida.
+
+Cada comando se ejecuta en una subshell ( ... ) con su propio directorio de
+trabajo y sus variables de entorno, de modo que nada de lo que haga (cd,
+export, variables) afecta a los siguientes. Los workers se reciclan tras
+max_commands comandos o cuando algo va mal (timeout, la shell muere o se
+rompe el protocolo).
+"""
+
+import logging
+import os
+import re
+import secrets
+import selectors
+import shlex
+import signal
+import subprocess
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from providers.provider_config import get_section
+from utils.command_validator import validate_command
+from utils.output_capture import CHUNK_SIZE, OutputCapture
+
+logger = logging.getLogger(__name__)
+
+_ENV_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+class ShellWorkerError(Exception):
+    """
+    La shell de un worker murió o rompió el protocolo del centinela.
+    """
+
+
+class _SentinelStream:
+    """
+    Lee un flujo del worker hasta el centinela, pasando el resto a una captura.
+    """
+
+    def __init__(self, capture: OutputCapture, marker: bytes, with_code: bool):
+        self.capture = capture
+        self.marker = marker
+        self.with_code = with_code
+        self.done = False
+        self.code: Optional[int] = None
+        self._pending = bytearray()
+
+    def feed(self, chunk: bytes) -> None:
+        self._pending += chunk
+        index = self._pending.find(self.marker)
+        if index < 0:
+            # Se retiene lo justo para reconocer un centinela partido entre lecturas
+            keep = len(self.marker)
+            if len(self._pending) > keep:
+                self.capture.feed(bytes(self._pending[:-keep]))
+                del self._pending[:-keep]
+            return
+
+        end = index + len(self.marker)
+        if self.with_code:
+            newline = self._pending.find(b'\n', end)
+            if newline < 0:
+                return
+            self.code = int(self._pending[end:newline])
+            end = newline + 1
+        if end != len(self._pending):
+            # Algo escribió después del centinela (p. ej. un proceso en segundo plano)
+            raise ShellWorkerError("Salida inesperada tras el centinela")
+        self.capture.feed(bytes(self._pending[:index]))
+        self._pending.clear()
+        self.done = True
+
+
+class _ShellWorker:
+    """
+    Una shell persistente que ejecuta comandos uno detrás de otro.
+    """
+
+    def __init__(self, shell: str):
+        self.sentinel = f"__agent_done_{secrets.token_hex(8)}__"
+        self.commands = 0
+        # Sesión propia: un timeout termina la shell y todo lo que cuelga de ella
+        self.process = subprocess.Popen([shell], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.PIPE, bufsize=0,
+                                        start_new_session=True)
+
+    def run(self, command: str, timeout: float, working_dir: str,
+            env: Optional[Dict[str, str]], stdout: OutputCapture, stderr: OutputCapture,
+            cancel: Optional[threading.Event] = None) -> Tuple[Optional[str], Optional[int]]:
+        """
+        Ejecuta un comando y devuelve (estado, código de salida).
+
+        El estado es None si el comando terminó, 'timeout' o 'cancelled'.
+        """
+        self.commands += 1
+        steps = [f"cd -- {shlex.quote(working_dir)}"]
+        steps += [f"export {name}={shlex.quote(str(value))}" for name, value in (env or {}).items()]
+        steps.append(f"eval {shlex.quote(command)}")
+        # La subshell no hereda la entrada estándar: es el canal de comandos
+        script = (f"( {' && '.join(steps)} ) </dev/null\n"
+                  f"printf '\\n{self.sentinel} %d\\n' \"$?\"\n"
+                  f"printf '\\n{self.sentinel}\\n' >&2\n")
+        try:
+            self.process.stdin.write(script.encode())
+        except OSError as e:
+            raise ShellWorkerError(f"La shell no acepta comandos: {str(e)}")
+
+        marker = f"\n{self.sentinel}".encode()
+        streams = {self.process.stdout.fileno(): _SentinelStream(stdout, marker + b' ', True),
+                   self.process.stderr.fileno(): _SentinelStream(stderr, marker + b'\n', False)}
+        deadline = time.monotonic() + timeout
+        with selectors.DefaultSelector() as selector:
+            for fd in streams:
+                selector.register(fd, selectors.EVENT_READ)
+            while not all(stream.done for stream in streams.values()):
+                if cancel is not None and cancel.is_set():
+                    return 'cancelled', None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return 'timeout', None
+                wait = remaining if cancel is None else min(remaining, 0.05)
+                for key, _ in selector.select(wait):
+                    chunk = os.read(key.fd, CHUNK_SIZE)
+                    if not chunk:
+                        raise ShellWorkerError("La shell terminó inesperadamente")
+                    streams[key.fd].feed(chunk)
+        return None, streams[self.process.stdout.fileno()].code
+
+    def close(self) -> None:
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.process.wait()
+        for stream in (self.process.stdin, self.process.stdout, self.process.stderr):
+            stream.close()
+
+
+class ShellPool:
+    """
+    Ejecuta comandos en un conjunto acotado de shells persistentes.
+    """
+
+    def __init__(self, size: int = 4, max_commands: int = 100, shell: str = '/bin/sh',
+                 timeout: float = 30):
+        """
+        Inicializa el pool. Las shells se lanzan a medida que hacen falta.
+
+        Args:
+            size: Número máximo de shells (y de comandos en ejecución a la vez)
+            max_commands: Comandos que ejecuta una shell antes de reciclarla
+            shell: Shell que se usa como worker
+            timeout: Tiempo máximo por comando en segundos (por defecto)
+        """
+        if size < 1:
+            raise ValueError("size debe ser al menos 1")
+        self.size = size
+        self.max_commands = max_commands
+        self.shell = shell
+        self.timeout = timeout
+        self._idle: List[_ShellWorker] = []
+        self._workers = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._counters = {'commands': 0, 'spawned': 0, 'recycled': 0, 'timeouts': 0,
+                          'worker_errors': 0}
+
+    @classmethod
+    def from_settings(cls) -> 'ShellPool':
+        """
+        Crea el pool según la sección shell_pool de settings.yaml.
+
+        Returns:
+            Instancia de ShellPool
+        """
+        config = get_section('shell_pool')
+        return cls(size=config.get('size', 4), max_commands=config.get('max_commands', 100),
+                   shell=config.get('shell', '/bin/sh'))
+
+    def execute(self, command: str, timeout: Optional[float] = None,
+                working_dir: Optional[str] = None, env: Optional[Dict[str, str]] = None,
+                cancel: Optional[threading.Event] = None,
+                validate: bool = True) -> Dict[str, Any]:
+        """
+        Ejecuta un comando del sistema de forma segura en una shell del pool.
+
+        Args:
+            command: Comando a ejecutar
+            timeout: Tiempo máximo de ejecución en segundos
+            working_dir: Directorio de trabajo (por defecto el actual del proceso)
+            env: Variables de entorno adicionales solo para este comando
+            cancel: Evento que cancela el comando en curso (la shell se recicla)
+            validate: Si es False no se valida el comando (el llamador ya lo hizo)
+
+        Returns:
+            Diccionario con el resultado de la ejecución (mismo formato que
+            system_handlers.execute_command, con 'cancelled' si se canceló)
+        """
+        timeout = self.timeout if timeout is None else timeout
+
+        # Validar el comando antes de ejecutarlo
+        validation = validate_command(command) if validate else {'valid': True}
+        if not validation['valid']:
+            logger.warning(f"Comando no válido: {command}. Razón: {validation['reason']}")
+            return {
+                'success': False,
+                'output': None,
+                'error': f"Comando no válido: {validation['reason']}",
+                'command': command
+            }
+        for name in env or {}:
+            if not _ENV_NAME.match(name):
+                raise ValueError(f"Nombre de variable de entorno no válido: {name!r}")
+
+        stdout = OutputCapture()
+        stderr = OutputCapture(spill_limit=0)
+        worker = self._acquire()
+        recycle = True
+        try:
+            status, returncode = worker.run(command, timeout, working_dir or os.getcwd(), env,
+                                            stdout, stderr, cancel)
+            if status == 'cancelled':
+                stdout.close(keep_spill=False)
+                return {
+                    'success': False,
+                    'output': None,
+                    'error': "Cancelada",
+                    'command': command,
+                    'cancelled': True
+                }
+            if status == 'timeout':
+                logger.error(f"Timeout al ejecutar comando: {command}")
+                self._count('timeouts')
+                stdout.close(keep_spill=False)
+                return {
+                    'success': False,
+                    'output': None,
+                    'error': f"El comando excedió el tiempo máximo de ejecución ({timeout}s)",
+                    'command': command
+                }
+            recycle = False
+        except Exception as e:
+            logger.error(f"Excepción al ejecutar comando: {command}. Error: {str(e)}")
+            self._count('worker_errors')
+            stdout.close(keep_spill=False)
+            return {
+                'success': False,
+                'output': None,
+                'error': str(e),
+                'command': command
+            }
+        finally:
+            self._release(worker, recycle)
+            stdout.close()
+
+        output = stdout.text().strip()
+        if returncode == 0:
+            logger.info(f"Comando ejecutado exitosamente: {command}")
+            result = {
+                'success': True,
+                'output': output,
+                'error': None,
+                'command': command,
+                'returncode': returncode
+            }
+        else:
+            error = stderr.text().strip()
+            logger.warning(f"Error al ejecutar comando: {command}. Error: {error}")
+            result = {
+                'success': False,
+                'output': output,
+                'error': error,
+                'command': command,
+                'returncode': returncode
+            }
+        if stdout.truncated:
+            result['output_truncated'] = True
+            result['output_file'] = stdout.spill_path
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Devuelve los contadores del pool.
+
+        Returns:
+            Diccionario con comandos ejecutados, shells lanzadas, recicladas,
+            timeouts, errores de worker y shells vivas
+        """
+        with self._condition:
+            return dict(self._counters, workers=self._workers)
+
+    def close(self) -> None:
+        """
+        Termina todas las shells inactivas; las ocupadas terminan al liberarse.
+        """
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._workers -= len(idle)
+            self._condition.notify_all()
+        for worker in idle:
+            worker.close()
+
+    def __enter__(self) -> 'ShellPool':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _acquire(self) -> _ShellWorker:
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("El pool de shells está cerrado")
+                if self._idle:
+                    return self._idle.pop()
+                if self._workers < self.size:
+                    self._workers += 1
+                    self._counters['spawned'] += 1
+                    break
+                self._condition.wait()
+        try:
+            return _ShellWorker(self.shell)
+        except Exception:
+            with self._condition:
+                self._workers -= 1
+                self._condition.notify()
+            raise
+
+    def _release(self, worker: _ShellWorker, recycle: bool) -> None:
+        with self._condition:
+            self._counters['commands'] += 1
+            recycle = recycle or self._closed or worker.commands >= self.max_commands
+            if recycle:
+                self._workers -= 1
+                self._counters['recycled'] += 1
+            else:
+                self._idle.append(worker)
+            self._condition.notify()
+        if recycle:
+            worker.close()
+
+    def _count(self, name: str) -> None:
+        with self._condition:
+            self._counters[name] += 1
+
+
+_default_pool: Optional[ShellPool] = None
+_default_lock = threading.Lock()
+
+
+def get_default_shell_pool() -> ShellPool:
+    """
+    Devuelve el pool de shells compartido por el proceso (según settings.yaml).
+
+    Returns:
+        Instancia de ShellPool
+    """
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = ShellPool.from_settings()
+        return _default_pool
@@ -10,12 +10,16 @@ de manera segura y controlada.
 import os
 import subprocess
 import shutil
+import signal
 import logging
 from typing import Dict, Any, Tuple, List, Optional
 import platform
 
+from providers.provider_config import get_section
 from utils.command_validator import validate_command
+from utils.output_capture import OutputCapture, pump
 from utils.security import sanitize_path
+from utils.shell_pool import get_default_shell_pool
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +28,14 @@ def execute_command(command: str, timeout: int = 30,
     """
     Ejecuta un comando del sistema de forma segura.
     
+    Bloquea el hilo que la llama hasta que termina el comando; para supervisar
+    muchos comandos a la vez, ver utils.async_handlers. Si la salida no cabe
+    en memoria se devuelven su principio y su final, y el resultado incluye
+    'output_truncated' y 'output_file' (archivo temporal con la salida completa,
+    hasta un límite; ver utils.output_capture). Con shell_pool.enabled en
+    settings.yaml el comando se ejecuta en una shell persistente del pool
+    (ver utils.shell_pool) en lugar de lanzar una nueva.
+    
     Args:
         command: Comando a ejecutar
         timeout: Tiempo máximo de ejecución en segundos
@@ -32,6 +44,9 @@ def execute_command(command: str, timeout: int = 30,
     Returns:
         Diccionario con el resultado de la ejecución
     """
+    if get_section('shell_pool').get('enabled'):
+        return get_default_shell_pool().execute(command, timeout, working_dir)
+    
     # Validar el comando antes de ejecutarlo
     validation = validate_command(command)
     if not validation['valid']:
@@ -43,38 +58,52 @@ def execute_command(command: str, timeout: int = 30,
             'command': command
         }
     
+    stdout = OutputCapture()
+    stderr = OutputCapture(spill_limit=0)
     try:
-        # Ejecutar el comando
-        process = subprocess.run(
+        # Ejecutar el comando en su propio grupo de procesos y leer su salida
+        # en fragmentos (memoria acotada aunque la salida sea enorme)
+        process = subprocess.Popen(
             command,
             shell=True,
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-            cwd=working_dir
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=working_dir,
+            start_new_session=True
         )
+        with process:
+            if pump(process, stdout, stderr, timeout=timeout) == 'timeout':
+                os.killpg(process.pid, signal.SIGKILL)
+                raise subprocess.TimeoutExpired(command, timeout)
         
         # Procesar el resultado
+        output = stdout.text().strip()
         if process.returncode == 0:
             logger.info(f"Comando ejecutado exitosamente: {command}")
-            return {
+            result = {
                 'success': True,
-                'output': process.stdout.strip(),
+                'output': output,
                 'error': None,
                 'command': command,
                 'returncode': process.returncode
             }
         else:
-            logger.warning(f"Error al ejecutar comando: {command}. Error: {process.stderr}")
-            return {
+            error = stderr.text().strip()
+            logger.warning(f"Error al ejecutar comando: {command}. Error: {error}")
+            result = {
                 'success': False,
-                'output': process.stdout.strip(),
-                'error': process.stderr.strip(),
+                'output': output,
+                'error': error,
                 'command': command,
                 'returncode': process.returncode
             }
+        if stdout.truncated:
+            result['output_truncated'] = True
+            result['output_file'] = stdout.spill_path
+        return result
     except subprocess.TimeoutExpired:
         logger.error(f"Timeout al ejecutar comando: {command}")
+        stdout.close(keep_spill=False)
         return {
             'success': False,
             'output': None,
@@ -83,12 +112,15 @@ def execute_command(command: str, timeout: int = 30,
         }
     except Exception as e:
         logger.error(f"Excepción al ejecutar comando: {command}. Error: {str(e)}")
+        stdout.close(keep_spill=False)
         return {
             'success': False,
             'output': None,
             'error': str(e),
             'command': command
         }
+    finally:
+        stdout.close()
 
 def list_files(directory: str = '.', 
               show_hidden: bool = False, 
@@ -128,5 +128,24 @@ class ExecutionTracer:
         except Exception as e:
             self.logger.error(f"Error clearing log files: {e}")
 
-# Crear una instancia global para uso conveniente
-tracer = ExecutionTracer()
\ No newline at end of file
+# Instancia global, creada en el primer uso para no abrir archivos al importar
+_tracer = None
+
+
+def get_tracer() -> ExecutionTracer:
+    """
+    Devuelve la instancia global del trazador, creándola si no existe.
+
+    :return: Instancia de ExecutionTracer
+    """
+    global _tracer
+    if _tracer is None:
+        _tracer = ExecutionTracer()
+    return _tracer
+
+
+def __getattr__(name):
+    # Compatibilidad con "from utils.tracing import tracer"
+    if name == 'tracer':
+        return get_tracer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -19,8 +19,8 @@ colorama.init()
 
 # Configuración
 LOGS_DIR = "logs"
-REQUEST_LOG = os.path.join(LOGS_DIR, "openai_requests.log")
-RESPONSE_LOG = os.path.join(LOGS_DIR, "openai_responses.log")
+REQUEST_LOG = os.path.join(LOGS_DIR, "openai_requests.jsonl")
+RESPONSE_LOG = os.path.join(LOGS_DIR, "openai_responses.jsonl")
 
 # Crear directorio de logs si no existe
 os.makedirs(LOGS_DIR, exist_ok=True)
@@ -28,8 +28,7 @@ os.makedirs(LOGS_DIR, exist_ok=True)
 # Asegurar que los archivos de log existan
 for log_file in [REQUEST_LOG, RESPONSE_LOG]:
     if not os.path.exists(log_file):
-        with open(log_file, "w") as f:
-            f.write(f"# Log creado: {datetime.datetime.now()}\n")
+        open(log_file, "w").close()
 
 class LogReader:
     def __init__(self):
@@ -62,74 +61,61 @@ class LogReader:
             self.last_response_position = current_response_size
 
     def process_request_log(self, content):
-        """Procesa y muestra nuevas entradas de peticiones"""
-        entries = content.split("--- NUEVA PETICIÓN:")
-        for entry in entries:
-            if entry.strip() and "messages" in entry:
-                # Extraer fecha/hora si está disponible
-                timestamp = entry.split("---")[0].strip() if "---" in entry else "Sin fecha"
+        """Procesa y muestra nuevas entradas de peticiones (una por línea JSON)"""
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                request_id = entry.get("request_id") or hash(line)
                 
-                # Intentar analizar el JSON
-                try:
-                    # Encontrar el inicio del JSON
-                    json_start = entry.find("{")
-                    if json_start != -1:
-                        json_content = entry[json_start:]
-                        data = json.loads(json_content)
-                        
-                        # Crear un identificador único para esta petición
-                        request_id = hash(json.dumps(data))
-                        
-                        # Verificar si ya hemos visto esta petición
-                        if request_id not in self.requests_seen:
-                            self.requests_seen.add(request_id)
-                            
-                            # Mostrar información relevante
-                            print(f"\n{Fore.YELLOW}==== NUEVA PETICIÓN ({timestamp}) ===={Style.RESET_ALL}")
-                            print(f"{Fore.CYAN}Modelo:{Style.RESET_ALL} {data['model']}")
-                            print(f"{Fore.CYAN}Prompt:{Style.RESET_ALL}")
-                            
-                            # Mostrar cada mensaje con formato
-                            for msg in data['messages']:
-                                role = msg.get('role', 'unknown')
-                                content = msg.get('content', '')
-                                role_color = Fore.GREEN if role == 'user' else Fore.BLUE
-                                print(f"{role_color}{role}{Style.RESET_ALL}: {content}")
-                            
-                            print(f"{Fore.CYAN}Configuración:{Style.RESET_ALL} max_tokens={data.get('max_tokens', 'N/A')}, temperature={data.get('temperature', 'N/A')}")
-                except json.JSONDecodeError:
-                    print(f"{Fore.RED}Error al decodificar JSON en el log de peticiones{Style.RESET_ALL}")
-                except Exception as e:
-                    print(f"{Fore.RED}Error al procesar log de peticiones: {e}{Style.RESET_ALL}")
+                # Verificar si ya hemos visto esta petición
+                if request_id in self.requests_seen:
+                    continue
+                self.requests_seen.add(request_id)
+                
+                data = entry["request"]
+                timestamp = datetime.datetime.fromtimestamp(entry["ts"]) if "ts" in entry else "Sin fecha"
+                
+                # Mostrar información relevante
+                print(f"\n{Fore.YELLOW}==== NUEVA PETICIÓN ({timestamp}) ===={Style.RESET_ALL}")
+                print(f"{Fore.CYAN}Modelo:{Style.RESET_ALL} {data['model']}")
+                print(f"{Fore.CYAN}Prompt:{Style.RESET_ALL}")
+                
+                # Mostrar cada mensaje con formato
+                for msg in data['messages']:
+                    role = msg.get('role', 'unknown')
+                    content = msg.get('content', '')
+                    role_color = Fore.GREEN if role == 'user' else Fore.BLUE
+                    print(f"{role_color}{role}{Style.RESET_ALL}: {content}")
+                
+                print(f"{Fore.CYAN}Configuración:{Style.RESET_ALL} max_tokens={data.get('max_tokens', 'N/A')}, temperature={data.get('temperature', 'N/A')}")
+            except json.JSONDecodeError:
+                print(f"{Fore.RED}Error al decodificar JSON en el log de peticiones{Style.RESET_ALL}")
+            except Exception as e:
+                print(f"{Fore.RED}Error al procesar log de peticiones: {e}{Style.RESET_ALL}")
 
     def process_response_log(self, content):
-        """Procesa y muestra nuevas entradas de respuestas"""
-        entries = content.split("--- RESPUESTA:")
-        for entry in entries:
-            if entry.strip() and "content" in entry:
-                # Extraer fecha/hora si está disponible
-                timestamp = entry.split("---")[0].strip() if "---" in entry else "Sin fecha"
-                
-                # Crear un identificador único para esta respuesta
-                response_id = hash(entry)
+        """Procesa y muestra nuevas entradas de respuestas (una por línea JSON)"""
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                response_id = entry.get("request_id") or hash(line)
                 
                 # Verificar si ya hemos visto esta respuesta
-                if response_id not in self.responses_seen:
-                    self.responses_seen.add(response_id)
-                    
-                    print(f"\n{Fore.YELLOW}==== RESPUESTA RECIBIDA ({timestamp}) ===={Style.RESET_ALL}")
-                    
-                    # Extraer el contenido del mensaje
-                    content_start = entry.find("content='")
-                    if content_start != -1:
-                        content_start += 9  # Longitud de "content='"
-                        content_end = entry.find("'", content_start)
-                        if content_end != -1:
-                            message_content = entry[content_start:content_end]
-                            print(f"{Fore.MAGENTA}Contenido:{Style.RESET_ALL} {message_content}")
-                    else:
-                        # Si no podemos extraer limpiamente, mostrar todo
-                        print(entry.strip())
+                if response_id in self.responses_seen:
+                    continue
+                self.responses_seen.add(response_id)
+                
+                timestamp = datetime.datetime.fromtimestamp(entry["ts"]) if "ts" in entry else "Sin fecha"
+                print(f"\n{Fore.YELLOW}==== RESPUESTA RECIBIDA ({timestamp}) ===={Style.RESET_ALL}")
+                print(f"{Fore.MAGENTA}Contenido:{Style.RESET_ALL} {entry.get('content')}")
+                if entry.get("usage"):
+                    print(f"{Fore.CYAN}Uso:{Style.RESET_ALL} {entry['usage']}")
+            except json.JSONDecodeError:
+                print(f"{Fore.RED}Error al decodificar JSON en el log de respuestas{Style.RESET_ALL}")
 
 class LogFileHandler(FileSystemEventHandler):
     def __init__(self, log_reader):